@@ -4,13 +4,34 @@ from tools.api import get_financial_metrics, get_market_cap, search_line_items
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
+import asyncio
 import json
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from llm.prompts import encode_analysis
+from utils.llm import acall_llm_for_tickers, call_llm, call_llm_for_tickers, get_llm_batch_size
 import math
 
 
+# Line items this agent reads; also declared in ANALYST_CONFIG so they can be prefetched in batches
+BEN_GRAHAM_LINE_ITEMS = {
+    "line_items": [
+        "earnings_per_share",
+        "revenue",
+        "net_income",
+        "book_value_per_share",
+        "total_assets",
+        "total_liabilities",
+        "current_assets",
+        "current_liabilities",
+        "dividends_and_other_cash_distributions",
+        "outstanding_shares",
+    ],
+    "period": "annual",
+    "limit": 10,
+}
+
+
 class BenGrahamSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
@@ -29,51 +50,44 @@ def ben_graham_agent(state: AgentState):
     end_date = data["end_date"]
     tickers = data["tickers"]
 
-    analysis_data = {}
-    graham_analysis = {}
-
-    for ticker in tickers:
-        progress.update_status("ben_graham_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=10)
-
-        progress.update_status("ben_graham_agent", ticker, "Gathering financial line items")
-        financial_line_items = search_line_items(ticker, ["earnings_per_share", "revenue", "net_income", "book_value_per_share", "total_assets", "total_liabilities", "current_assets", "current_liabilities", "dividends_and_other_cash_distributions", "outstanding_shares"], end_date, period="annual", limit=10)
-
-        progress.update_status("ben_graham_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
+    analysis_data = {ticker: analyze_ben_graham_ticker(ticker, end_date) for ticker in tickers}
 
-        # Perform sub-analyses
-        progress.update_status("ben_graham_agent", ticker, "Analyzing earnings stability")
-        earnings_analysis = analyze_earnings_stability(metrics, financial_line_items)
+    # One call per ticker, or one per chunk of tickers when batching (see LLM_BATCH_SIZE)
+    llm_outputs = call_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        progress.update_status("ben_graham_agent", ticker, "Analyzing financial strength")
-        strength_analysis = analyze_financial_strength(metrics, financial_line_items)
 
-        progress.update_status("ben_graham_agent", ticker, "Analyzing Graham valuation")
-        valuation_analysis = analyze_valuation_graham(metrics, financial_line_items, market_cap)
+async def ben_graham_agent_async(state: AgentState):
+    """Async variant of ben_graham_agent: tickers are analyzed on worker threads and their LLM calls made concurrently."""
+    data = state["data"]
+    end_date = data["end_date"]
+    tickers = data["tickers"]
 
-        # Aggregate scoring
-        total_score = earnings_analysis["score"] + strength_analysis["score"] + valuation_analysis["score"]
-        max_possible_score = 15  # total possible from the three analysis functions
+    analyses = await asyncio.gather(*(asyncio.to_thread(analyze_ben_graham_ticker, ticker, end_date) for ticker in tickers))
+    analysis_data = dict(zip(tickers, analyses))
 
-        # Map total_score to signal
-        if total_score >= 0.7 * max_possible_score:
-            signal = "bullish"
-        elif total_score <= 0.3 * max_possible_score:
-            signal = "bearish"
-        else:
-            signal = "neutral"
+    llm_outputs = await acall_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        analysis_data[ticker] = {"signal": signal, "score": total_score, "max_score": max_possible_score, "earnings_analysis": earnings_analysis, "strength_analysis": strength_analysis, "valuation_analysis": valuation_analysis}
 
+def _llm_requests(state: AgentState, analysis_data: dict) -> dict:
+    """Build the Ben Graham LLM request for each analyzed ticker."""
+    llm_requests = {}
+    for ticker, analysis in analysis_data.items():
         progress.update_status("ben_graham_agent", ticker, "Generating Ben Graham analysis")
-        graham_output = generate_graham_output(
+        llm_requests[ticker] = graham_llm_request(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
+    return llm_requests
+
 
+def _agent_output(state: AgentState, llm_outputs: dict) -> dict:
+    """Collect Ben Graham's signals and publish them to the graph state."""
+    graham_analysis = {}
+    for ticker, graham_output in llm_outputs.items():
         graham_analysis[ticker] = {"signal": graham_output.signal, "confidence": graham_output.confidence, "reasoning": graham_output.reasoning}
 
         progress.update_status("ben_graham_agent", ticker, "Done")
@@ -91,6 +105,42 @@ def ben_graham_agent(state: AgentState):
     return {"messages": [message], "data": state["data"]}
 
 
+def analyze_ben_graham_ticker(ticker: str, end_date: str) -> dict:
+    """Fetch one ticker's data and score it the way Ben Graham would."""
+    progress.update_status("ben_graham_agent", ticker, "Fetching financial metrics")
+    metrics = get_financial_metrics(ticker, end_date, period="annual", limit=10)
+
+    progress.update_status("ben_graham_agent", ticker, "Gathering financial line items")
+    financial_line_items = search_line_items(ticker, end_date=end_date, **BEN_GRAHAM_LINE_ITEMS)
+
+    progress.update_status("ben_graham_agent", ticker, "Getting market cap")
+    market_cap = get_market_cap(ticker, end_date)
+
+    # Perform sub-analyses
+    progress.update_status("ben_graham_agent", ticker, "Analyzing earnings stability")
+    earnings_analysis = analyze_earnings_stability(metrics, financial_line_items)
+
+    progress.update_status("ben_graham_agent", ticker, "Analyzing financial strength")
+    strength_analysis = analyze_financial_strength(metrics, financial_line_items)
+
+    progress.update_status("ben_graham_agent", ticker, "Analyzing Graham valuation")
+    valuation_analysis = analyze_valuation_graham(metrics, financial_line_items, market_cap)
+
+    # Aggregate scoring
+    total_score = earnings_analysis["score"] + strength_analysis["score"] + valuation_analysis["score"]
+    max_possible_score = 15  # total possible from the three analysis functions
+
+    # Map total_score to signal
+    if total_score >= 0.7 * max_possible_score:
+        signal = "bullish"
+    elif total_score <= 0.3 * max_possible_score:
+        signal = "bearish"
+    else:
+        signal = "neutral"
+
+    return {"signal": signal, "score": total_score, "max_score": max_possible_score, "earnings_analysis": earnings_analysis, "strength_analysis": strength_analysis, "valuation_analysis": valuation_analysis}
+
+
 def analyze_earnings_stability(metrics: list, financial_line_items: list) -> dict:
     """
     Graham wants at least several years of consistently positive earnings (ideally 5+).
@@ -276,17 +326,13 @@ def analyze_valuation_graham(metrics: list, financial_line_items: list, market_c
     return {"score": score, "details": "; ".join(details)}
 
 
-def generate_graham_output(
+def graham_llm_request(
     ticker: str,
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> BenGrahamSignal:
-    """
-    Generates an investment decision in the style of Benjamin Graham:
-    - Value emphasis, margin of safety, net-nets, conservative balance sheet, stable earnings.
-    - Return the result in a JSON structure: { signal, confidence, reasoning }.
-    """
+) -> dict:
+    """Build the call_llm arguments for Ben Graham's decision on a ticker."""
 
     template = ChatPromptTemplate.from_messages([
         (
@@ -330,14 +376,14 @@ def generate_graham_output(
     ])
 
     prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
+        "analysis_data": encode_analysis(analysis_data),
         "ticker": ticker
     })
 
     def create_default_ben_graham_signal():
         return BenGrahamSignal(signal="neutral", confidence=0.0, reasoning="Error in generating analysis; defaulting to neutral.")
 
-    return call_llm(
+    return dict(
         prompt=prompt,
         model_name=model_name,
         model_provider=model_provider,
@@ -345,3 +391,17 @@ def generate_graham_output(
         agent_name="ben_graham_agent",
         default_factory=create_default_ben_graham_signal,
     )
+
+
+def generate_graham_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> BenGrahamSignal:
+    """
+    Generates an investment decision in the style of Benjamin Graham:
+    - Value emphasis, margin of safety, net-nets, conservative balance sheet, stable earnings.
+    - Return the result in a JSON structure: { signal, confidence, reasoning }.
+    """
+    return call_llm(**graham_llm_request(ticker=ticker, analysis_data=analysis_data, model_name=model_name, model_provider=model_provider))
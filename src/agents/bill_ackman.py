@@ -4,10 +4,31 @@ from tools.api import get_financial_metrics, get_market_cap, search_line_items
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
+import asyncio
 import json
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from llm.prompts import encode_analysis
+from utils.llm import acall_llm_for_tickers, call_llm, call_llm_for_tickers, get_llm_batch_size
+
+
+# Line items this agent reads; also declared in ANALYST_CONFIG so they can be prefetched in batches
+BILL_ACKMAN_LINE_ITEMS = {
+    "line_items": [
+        "revenue",
+        "operating_margin",
+        "debt_to_equity",
+        "free_cash_flow",
+        "total_assets",
+        "total_liabilities",
+        "dividends_and_other_cash_distributions",
+        "outstanding_shares",
+        # Optional: intangible_assets if available
+        # "intangible_assets"
+    ],
+    "period": "annual",
+    "limit": 5,
+}
 
 
 class BillAckmanSignal(BaseModel):
@@ -26,84 +47,44 @@ def bill_ackman_agent(state: AgentState):
     end_date = data["end_date"]
     tickers = data["tickers"]
     
-    analysis_data = {}
-    ackman_analysis = {}
+    analysis_data = {ticker: analyze_bill_ackman_ticker(ticker, end_date) for ticker in tickers}
+
+    # One call per ticker, or one per chunk of tickers when batching (see LLM_BATCH_SIZE)
+    llm_outputs = call_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
+
+
+async def bill_ackman_agent_async(state: AgentState):
+    """Async variant of bill_ackman_agent: tickers are analyzed on worker threads and their LLM calls made concurrently."""
+    data = state["data"]
+    end_date = data["end_date"]
+    tickers = data["tickers"]
     
-    for ticker in tickers:
-        progress.update_status("bill_ackman_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
-        
-        progress.update_status("bill_ackman_agent", ticker, "Gathering financial line items")
-        # Request multiple periods of data (annual or TTM) for a more robust long-term view.
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "operating_margin",
-                "debt_to_equity",
-                "free_cash_flow",
-                "total_assets",
-                "total_liabilities",
-                "dividends_and_other_cash_distributions",
-                "outstanding_shares",
-                # Optional: intangible_assets if available
-                # "intangible_assets"
-            ],
-            end_date,
-            period="annual",
-            limit=5
-        )
-        
-        progress.update_status("bill_ackman_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
-        
-        progress.update_status("bill_ackman_agent", ticker, "Analyzing business quality")
-        quality_analysis = analyze_business_quality(metrics, financial_line_items)
-        
-        progress.update_status("bill_ackman_agent", ticker, "Analyzing balance sheet and capital structure")
-        balance_sheet_analysis = analyze_financial_discipline(metrics, financial_line_items)
-        
-        progress.update_status("bill_ackman_agent", ticker, "Analyzing activism potential")
-        activism_analysis = analyze_activism_potential(financial_line_items)
-        
-        progress.update_status("bill_ackman_agent", ticker, "Calculating intrinsic value & margin of safety")
-        valuation_analysis = analyze_valuation(financial_line_items, market_cap)
-        
-        # Combine partial scores or signals
-        total_score = (
-            quality_analysis["score"]
-            + balance_sheet_analysis["score"]
-            + activism_analysis["score"]
-            + valuation_analysis["score"]
-        )
-        max_possible_score = 20  # Adjust weighting as desired (5 from each sub-analysis, for instance)
-        
-        # Generate a simple buy/hold/sell (bullish/neutral/bearish) signal
-        if total_score >= 0.7 * max_possible_score:
-            signal = "bullish"
-        elif total_score <= 0.3 * max_possible_score:
-            signal = "bearish"
-        else:
-            signal = "neutral"
-        
-        analysis_data[ticker] = {
-            "signal": signal,
-            "score": total_score,
-            "max_score": max_possible_score,
-            "quality_analysis": quality_analysis,
-            "balance_sheet_analysis": balance_sheet_analysis,
-            "activism_analysis": activism_analysis,
-            "valuation_analysis": valuation_analysis
-        }
-        
+    analyses = await asyncio.gather(*(asyncio.to_thread(analyze_bill_ackman_ticker, ticker, end_date) for ticker in tickers))
+    analysis_data = dict(zip(tickers, analyses))
+
+    llm_outputs = await acall_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
+
+
+def _llm_requests(state: AgentState, analysis_data: dict) -> dict:
+    """Build the Bill Ackman LLM request for each analyzed ticker."""
+    llm_requests = {}
+    for ticker, analysis in analysis_data.items():
         progress.update_status("bill_ackman_agent", ticker, "Generating Bill Ackman analysis")
-        ackman_output = generate_ackman_output(
-            ticker=ticker, 
-            analysis_data=analysis_data,
+        llm_requests[ticker] = ackman_llm_request(
+            ticker=ticker,
+            analysis_data=analysis,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
-        
+    return llm_requests
+
+
+def _agent_output(state: AgentState, llm_outputs: dict) -> dict:
+    """Collect Bill Ackman's signals and publish them to the graph state."""
+    ackman_analysis = {}
+    for ticker, ackman_output in llm_outputs.items():
         ackman_analysis[ticker] = {
             "signal": ackman_output.signal,
             "confidence": ackman_output.confidence,
@@ -111,7 +92,7 @@ def bill_ackman_agent(state: AgentState):
         }
         
         progress.update_status("bill_ackman_agent", ticker, "Done")
-    
+
     # Wrap results in a single message for the chain
     message = HumanMessage(
         content=json.dumps(ackman_analysis),
@@ -131,6 +112,58 @@ def bill_ackman_agent(state: AgentState):
     }
 
 
+def analyze_bill_ackman_ticker(ticker: str, end_date: str) -> dict:
+    """Fetch one ticker's data and score it the way Bill Ackman would."""
+    progress.update_status("bill_ackman_agent", ticker, "Fetching financial metrics")
+    metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
+    
+    progress.update_status("bill_ackman_agent", ticker, "Gathering financial line items")
+    # Request multiple periods of data (annual or TTM) for a more robust long-term view.
+    financial_line_items = search_line_items(ticker, end_date=end_date, **BILL_ACKMAN_LINE_ITEMS)
+    
+    progress.update_status("bill_ackman_agent", ticker, "Getting market cap")
+    market_cap = get_market_cap(ticker, end_date)
+    
+    progress.update_status("bill_ackman_agent", ticker, "Analyzing business quality")
+    quality_analysis = analyze_business_quality(metrics, financial_line_items)
+    
+    progress.update_status("bill_ackman_agent", ticker, "Analyzing balance sheet and capital structure")
+    balance_sheet_analysis = analyze_financial_discipline(metrics, financial_line_items)
+    
+    progress.update_status("bill_ackman_agent", ticker, "Analyzing activism potential")
+    activism_analysis = analyze_activism_potential(financial_line_items)
+    
+    progress.update_status("bill_ackman_agent", ticker, "Calculating intrinsic value & margin of safety")
+    valuation_analysis = analyze_valuation(financial_line_items, market_cap)
+    
+    # Combine partial scores or signals
+    total_score = (
+        quality_analysis["score"]
+        + balance_sheet_analysis["score"]
+        + activism_analysis["score"]
+        + valuation_analysis["score"]
+    )
+    max_possible_score = 20  # Adjust weighting as desired (5 from each sub-analysis, for instance)
+    
+    # Generate a simple buy/hold/sell (bullish/neutral/bearish) signal
+    if total_score >= 0.7 * max_possible_score:
+        signal = "bullish"
+    elif total_score <= 0.3 * max_possible_score:
+        signal = "bearish"
+    else:
+        signal = "neutral"
+    
+    return {
+        "signal": signal,
+        "score": total_score,
+        "max_score": max_possible_score,
+        "quality_analysis": quality_analysis,
+        "balance_sheet_analysis": balance_sheet_analysis,
+        "activism_analysis": activism_analysis,
+        "valuation_analysis": valuation_analysis
+    }
+
+
 def analyze_business_quality(metrics: list, financial_line_items: list) -> dict:
     """
     Analyze whether the company has a high-quality business with stable or growing cash flows,
@@ -390,17 +423,13 @@ def analyze_valuation(financial_line_items: list, market_cap: float) -> dict:
     }
 
 
-def generate_ackman_output(
+def ackman_llm_request(
     ticker: str,
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> BillAckmanSignal:
-    """
-    Generates investment decisions in the style of Bill Ackman.
-    Includes more explicit references to brand strength, activism potential, 
-    catalysts, and management changes in the system prompt.
-    """
+) -> dict:
+    """Build the call_llm arguments for Bill Ackman's decision on a ticker."""
     template = ChatPromptTemplate.from_messages([
         (
             "system",
@@ -442,7 +471,7 @@ def generate_ackman_output(
     ])
 
     prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
+        "analysis_data": encode_analysis(analysis_data),
         "ticker": ticker
     })
 
@@ -453,7 +482,7 @@ def generate_ackman_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
+    return dict(
         prompt=prompt, 
         model_name=model_name, 
         model_provider=model_provider, 
@@ -461,3 +490,17 @@ def generate_ackman_output(
         agent_name="bill_ackman_agent", 
         default_factory=create_default_bill_ackman_signal,
     )
+
+
+def generate_ackman_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> BillAckmanSignal:
+    """
+    Generates investment decisions in the style of Bill Ackman.
+    Includes more explicit references to brand strength, activism potential, 
+    catalysts, and management changes in the system prompt.
+    """
+    return call_llm(**ackman_llm_request(ticker=ticker, analysis_data=analysis_data, model_name=model_name, model_provider=model_provider))
@@ -4,10 +4,33 @@ from tools.api import get_financial_metrics, get_market_cap, search_line_items
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
+import asyncio
 import json
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from llm.prompts import encode_analysis
+from utils.llm import acall_llm_for_tickers, call_llm, call_llm_for_tickers, get_llm_batch_size
+
+# Line items this agent reads; also declared in ANALYST_CONFIG so they can be prefetched in batches
+CATHIE_WOOD_LINE_ITEMS = {
+    "line_items": [
+        "revenue",
+        "gross_margin",
+        "operating_margin",
+        "debt_to_equity",
+        "free_cash_flow",
+        "total_assets",
+        "total_liabilities",
+        "dividends_and_other_cash_distributions",
+        "outstanding_shares",
+        "research_and_development",
+        "capital_expenditure",
+        "operating_expense",
+    ],
+    "period": "annual",
+    "limit": 5,
+}
+
 
 class CathieWoodSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -27,77 +50,44 @@ def cathie_wood_agent(state: AgentState):
     end_date = data["end_date"]
     tickers = data["tickers"]
 
-    analysis_data = {}
-    cw_analysis = {}
-
-    for ticker in tickers:
-        progress.update_status("cathie_wood_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
-
-        progress.update_status("cathie_wood_agent", ticker, "Gathering financial line items")
-        # Request multiple periods of data (annual or TTM) for a more robust view.
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "gross_margin",
-                "operating_margin",
-                "debt_to_equity",
-                "free_cash_flow",
-                "total_assets",
-                "total_liabilities",
-                "dividends_and_other_cash_distributions",
-                "outstanding_shares",
-                "research_and_development",
-                "capital_expenditure",
-                "operating_expense",
-
-            ],
-            end_date,
-            period="annual",
-            limit=5
-        )
-
-        progress.update_status("cathie_wood_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
+    analysis_data = {ticker: analyze_cathie_wood_ticker(ticker, end_date) for ticker in tickers}
 
-        progress.update_status("cathie_wood_agent", ticker, "Analyzing disruptive potential")
-        disruptive_analysis = analyze_disruptive_potential(metrics, financial_line_items)
+    # One call per ticker, or one per chunk of tickers when batching (see LLM_BATCH_SIZE)
+    llm_outputs = call_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        progress.update_status("cathie_wood_agent", ticker, "Analyzing innovation-driven growth")
-        innovation_analysis = analyze_innovation_growth(metrics, financial_line_items)
 
-        progress.update_status("cathie_wood_agent", ticker, "Calculating valuation & high-growth scenario")
-        valuation_analysis = analyze_cathie_wood_valuation(financial_line_items, market_cap)
+async def cathie_wood_agent_async(state: AgentState):
+    """Async variant of cathie_wood_agent: tickers are analyzed on worker threads and their LLM calls made concurrently."""
+    data = state["data"]
+    end_date = data["end_date"]
+    tickers = data["tickers"]
 
-        # Combine partial scores or signals
-        total_score = disruptive_analysis["score"] + innovation_analysis["score"] + valuation_analysis["score"]
-        max_possible_score = 15  # Adjust weighting as desired
+    analyses = await asyncio.gather(*(asyncio.to_thread(analyze_cathie_wood_ticker, ticker, end_date) for ticker in tickers))
+    analysis_data = dict(zip(tickers, analyses))
 
-        if total_score >= 0.7 * max_possible_score:
-            signal = "bullish"
-        elif total_score <= 0.3 * max_possible_score:
-            signal = "bearish"
-        else:
-            signal = "neutral"
+    llm_outputs = await acall_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        analysis_data[ticker] = {
-            "signal": signal,
-            "score": total_score,
-            "max_score": max_possible_score,
-            "disruptive_analysis": disruptive_analysis,
-            "innovation_analysis": innovation_analysis,
-            "valuation_analysis": valuation_analysis
-        }
 
+def _llm_requests(state: AgentState, analysis_data: dict) -> dict:
+    """Build the Cathie Wood LLM request for each analyzed ticker."""
+    llm_requests = {}
+    for ticker, analysis in analysis_data.items():
         progress.update_status("cathie_wood_agent", ticker, "Generating Cathie Wood analysis")
-        cw_output = generate_cathie_wood_output(
+        llm_requests[ticker] = cathie_wood_llm_request(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
+    return llm_requests
+
 
+def _agent_output(state: AgentState, llm_outputs: dict) -> dict:
+    """Collect Cathie Wood's signals and publish them to the graph state."""
+    cw_analysis = {}
+    for ticker, cw_output in llm_outputs.items():
         cw_analysis[ticker] = {
             "signal": cw_output.signal,
             "confidence": cw_output.confidence,
@@ -122,6 +112,48 @@ def cathie_wood_agent(state: AgentState):
     }
 
 
+def analyze_cathie_wood_ticker(ticker: str, end_date: str) -> dict:
+    """Fetch one ticker's data and score it the way Cathie Wood would."""
+    progress.update_status("cathie_wood_agent", ticker, "Fetching financial metrics")
+    metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
+
+    progress.update_status("cathie_wood_agent", ticker, "Gathering financial line items")
+    # Request multiple periods of data (annual or TTM) for a more robust view.
+    financial_line_items = search_line_items(ticker, end_date=end_date, **CATHIE_WOOD_LINE_ITEMS)
+
+    progress.update_status("cathie_wood_agent", ticker, "Getting market cap")
+    market_cap = get_market_cap(ticker, end_date)
+
+    progress.update_status("cathie_wood_agent", ticker, "Analyzing disruptive potential")
+    disruptive_analysis = analyze_disruptive_potential(metrics, financial_line_items)
+
+    progress.update_status("cathie_wood_agent", ticker, "Analyzing innovation-driven growth")
+    innovation_analysis = analyze_innovation_growth(metrics, financial_line_items)
+
+    progress.update_status("cathie_wood_agent", ticker, "Calculating valuation & high-growth scenario")
+    valuation_analysis = analyze_cathie_wood_valuation(financial_line_items, market_cap)
+
+    # Combine partial scores or signals
+    total_score = disruptive_analysis["score"] + innovation_analysis["score"] + valuation_analysis["score"]
+    max_possible_score = 15  # Adjust weighting as desired
+
+    if total_score >= 0.7 * max_possible_score:
+        signal = "bullish"
+    elif total_score <= 0.3 * max_possible_score:
+        signal = "bearish"
+    else:
+        signal = "neutral"
+
+    return {
+        "signal": signal,
+        "score": total_score,
+        "max_score": max_possible_score,
+        "disruptive_analysis": disruptive_analysis,
+        "innovation_analysis": innovation_analysis,
+        "valuation_analysis": valuation_analysis
+    }
+
+
 def analyze_disruptive_potential(metrics: list, financial_line_items: list) -> dict:
     """
     Analyze whether the company has disruptive products, technology, or business model.
@@ -419,15 +451,13 @@ def analyze_cathie_wood_valuation(financial_line_items: list, market_cap: float)
     }
 
 
-def generate_cathie_wood_output(
+def cathie_wood_llm_request(
     ticker: str,
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> CathieWoodSignal:
-    """
-    Generates investment decisions in the style of Cathie Wood.
-    """
+) -> dict:
+    """Build the call_llm arguments for Cathie Wood's decision on a ticker."""
     template = ChatPromptTemplate.from_messages([
         (
             "system",
@@ -477,7 +507,7 @@ def generate_cathie_wood_output(
     ])
 
     prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
+        "analysis_data": encode_analysis(analysis_data),
         "ticker": ticker
     })
 
@@ -488,7 +518,7 @@ def generate_cathie_wood_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
+    return dict(
         prompt=prompt,
         model_name=model_name,
         model_provider=model_provider,
@@ -497,4 +527,16 @@ def generate_cathie_wood_output(
         default_factory=create_default_cathie_wood_signal,
     )
 
+
+def generate_cathie_wood_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> CathieWoodSignal:
+    """
+    Generates investment decisions in the style of Cathie Wood.
+    """
+    return call_llm(**cathie_wood_llm_request(ticker=ticker, analysis_data=analysis_data, model_name=model_name, model_provider=model_provider))
+
 # source: https://ark-invest.com
\ No newline at end of file
@@ -3,10 +3,35 @@ from tools.api import get_financial_metrics, get_market_cap, search_line_items,
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
+import asyncio
 import json
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from llm.prompts import encode_analysis
+from utils.llm import acall_llm_for_tickers, call_llm, call_llm_for_tickers, get_llm_batch_size
+
+# Line items this agent reads; also declared in ANALYST_CONFIG so they can be prefetched in batches
+CHARLIE_MUNGER_LINE_ITEMS = {
+    "line_items": [
+        "revenue",
+        "net_income",
+        "operating_income",
+        "return_on_invested_capital",
+        "gross_margin",
+        "operating_margin",
+        "free_cash_flow",
+        "capital_expenditure",
+        "cash_and_equivalents",
+        "total_debt",
+        "shareholders_equity",
+        "outstanding_shares",
+        "research_and_development",
+        "goodwill_and_intangible_assets",
+    ],
+    "period": "annual",
+    "limit": 10,  # Munger examines long-term trends
+}
+
 
 class CharlieMungerSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
@@ -23,111 +48,44 @@ def charlie_munger_agent(state: AgentState):
     end_date = data["end_date"]
     tickers = data["tickers"]
     
-    analysis_data = {}
-    munger_analysis = {}
+    analysis_data = {ticker: analyze_charlie_munger_ticker(ticker, end_date) for ticker in tickers}
+
+    # One call per ticker, or one per chunk of tickers when batching (see LLM_BATCH_SIZE)
+    llm_outputs = call_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
+
+
+async def charlie_munger_agent_async(state: AgentState):
+    """Async variant of charlie_munger_agent: tickers are analyzed on worker threads and their LLM calls made concurrently."""
+    data = state["data"]
+    end_date = data["end_date"]
+    tickers = data["tickers"]
     
-    for ticker in tickers:
-        progress.update_status("charlie_munger_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=10)  # Munger looks at longer periods
-        
-        progress.update_status("charlie_munger_agent", ticker, "Gathering financial line items")
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "net_income",
-                "operating_income",
-                "return_on_invested_capital",
-                "gross_margin",
-                "operating_margin",
-                "free_cash_flow",
-                "capital_expenditure",
-                "cash_and_equivalents",
-                "total_debt",
-                "shareholders_equity",
-                "outstanding_shares",
-                "research_and_development",
-                "goodwill_and_intangible_assets",
-            ],
-            end_date,
-            period="annual",
-            limit=10  # Munger examines long-term trends
-        )
-        
-        progress.update_status("charlie_munger_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
-        
-        progress.update_status("charlie_munger_agent", ticker, "Fetching insider trades")
-        # Munger values management with skin in the game
-        insider_trades = get_insider_trades(
-            ticker,
-            end_date,
-            # Look back 2 years for insider trading patterns
-            start_date=None,
-            limit=100
-        )
-        
-        progress.update_status("charlie_munger_agent", ticker, "Fetching company news")
-        # Munger avoids businesses with frequent negative press
-        company_news = get_company_news(
-            ticker,
-            end_date,
-            # Look back 1 year for news
-            start_date=None,
-            limit=100
-        )
-        
-        progress.update_status("charlie_munger_agent", ticker, "Analyzing moat strength")
-        moat_analysis = analyze_moat_strength(metrics, financial_line_items)
-        
-        progress.update_status("charlie_munger_agent", ticker, "Analyzing management quality")
-        management_analysis = analyze_management_quality(financial_line_items, insider_trades)
-        
-        progress.update_status("charlie_munger_agent", ticker, "Analyzing business predictability")
-        predictability_analysis = analyze_predictability(financial_line_items)
-        
-        progress.update_status("charlie_munger_agent", ticker, "Calculating Munger-style valuation")
-        valuation_analysis = calculate_munger_valuation(financial_line_items, market_cap)
-        
-        # Combine partial scores with Munger's weighting preferences
-        # Munger weights quality and predictability higher than current valuation
-        total_score = (
-            moat_analysis["score"] * 0.35 +
-            management_analysis["score"] * 0.25 +
-            predictability_analysis["score"] * 0.25 +
-            valuation_analysis["score"] * 0.15
-        )
-        
-        max_possible_score = 10  # Scale to 0-10
-        
-        # Generate a simple buy/hold/sell signal
-        if total_score >= 7.5:  # Munger has very high standards
-            signal = "bullish"
-        elif total_score <= 4.5:
-            signal = "bearish"
-        else:
-            signal = "neutral"
-        
-        analysis_data[ticker] = {
-            "signal": signal,
-            "score": total_score,
-            "max_score": max_possible_score,
-            "moat_analysis": moat_analysis,
-            "management_analysis": management_analysis,
-            "predictability_analysis": predictability_analysis,
-            "valuation_analysis": valuation_analysis,
-            # Include some qualitative assessment from news
-            "news_sentiment": analyze_news_sentiment(company_news) if company_news else "No news data available"
-        }
-        
+    analyses = await asyncio.gather(*(asyncio.to_thread(analyze_charlie_munger_ticker, ticker, end_date) for ticker in tickers))
+    analysis_data = dict(zip(tickers, analyses))
+
+    llm_outputs = await acall_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
+
+
+def _llm_requests(state: AgentState, analysis_data: dict) -> dict:
+    """Build the Charlie Munger LLM request for each analyzed ticker."""
+    llm_requests = {}
+    for ticker, analysis in analysis_data.items():
         progress.update_status("charlie_munger_agent", ticker, "Generating Charlie Munger analysis")
-        munger_output = generate_munger_output(
-            ticker=ticker, 
-            analysis_data=analysis_data,
+        llm_requests[ticker] = munger_llm_request(
+            ticker=ticker,
+            analysis_data=analysis,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
-        
+    return llm_requests
+
+
+def _agent_output(state: AgentState, llm_outputs: dict) -> dict:
+    """Collect Charlie Munger's signals and publish them to the graph state."""
+    munger_analysis = {}
+    for ticker, munger_output in llm_outputs.items():
         munger_analysis[ticker] = {
             "signal": munger_output.signal,
             "confidence": munger_output.confidence,
@@ -135,7 +93,7 @@ def charlie_munger_agent(state: AgentState):
         }
         
         progress.update_status("charlie_munger_agent", ticker, "Done")
-    
+
     # Wrap results in a single message for the chain
     message = HumanMessage(
         content=json.dumps(munger_analysis),
@@ -155,6 +113,81 @@ def charlie_munger_agent(state: AgentState):
     }
 
 
+def analyze_charlie_munger_ticker(ticker: str, end_date: str) -> dict:
+    """Fetch one ticker's data and score it the way Charlie Munger would."""
+    progress.update_status("charlie_munger_agent", ticker, "Fetching financial metrics")
+    metrics = get_financial_metrics(ticker, end_date, period="annual", limit=10)  # Munger looks at longer periods
+    
+    progress.update_status("charlie_munger_agent", ticker, "Gathering financial line items")
+    financial_line_items = search_line_items(ticker, end_date=end_date, **CHARLIE_MUNGER_LINE_ITEMS)
+    
+    progress.update_status("charlie_munger_agent", ticker, "Getting market cap")
+    market_cap = get_market_cap(ticker, end_date)
+    
+    progress.update_status("charlie_munger_agent", ticker, "Fetching insider trades")
+    # Munger values management with skin in the game
+    insider_trades = get_insider_trades(
+        ticker,
+        end_date,
+        # Look back 2 years for insider trading patterns
+        start_date=None,
+        limit=100
+    )
+    
+    progress.update_status("charlie_munger_agent", ticker, "Fetching company news")
+    # Munger avoids businesses with frequent negative press
+    company_news = get_company_news(
+        ticker,
+        end_date,
+        # Look back 1 year for news
+        start_date=None,
+        limit=100
+    )
+    
+    progress.update_status("charlie_munger_agent", ticker, "Analyzing moat strength")
+    moat_analysis = analyze_moat_strength(metrics, financial_line_items)
+    
+    progress.update_status("charlie_munger_agent", ticker, "Analyzing management quality")
+    management_analysis = analyze_management_quality(financial_line_items, insider_trades)
+    
+    progress.update_status("charlie_munger_agent", ticker, "Analyzing business predictability")
+    predictability_analysis = analyze_predictability(financial_line_items)
+    
+    progress.update_status("charlie_munger_agent", ticker, "Calculating Munger-style valuation")
+    valuation_analysis = calculate_munger_valuation(financial_line_items, market_cap)
+    
+    # Combine partial scores with Munger's weighting preferences
+    # Munger weights quality and predictability higher than current valuation
+    total_score = (
+        moat_analysis["score"] * 0.35 +
+        management_analysis["score"] * 0.25 +
+        predictability_analysis["score"] * 0.25 +
+        valuation_analysis["score"] * 0.15
+    )
+    
+    max_possible_score = 10  # Scale to 0-10
+    
+    # Generate a simple buy/hold/sell signal
+    if total_score >= 7.5:  # Munger has very high standards
+        signal = "bullish"
+    elif total_score <= 4.5:
+        signal = "bearish"
+    else:
+        signal = "neutral"
+    
+    return {
+        "signal": signal,
+        "score": total_score,
+        "max_score": max_possible_score,
+        "moat_analysis": moat_analysis,
+        "management_analysis": management_analysis,
+        "predictability_analysis": predictability_analysis,
+        "valuation_analysis": valuation_analysis,
+        # Include some qualitative assessment from news
+        "news_sentiment": analyze_news_sentiment(company_news) if company_news else "No news data available"
+    }
+
+
 def analyze_moat_strength(metrics: list, financial_line_items: list) -> dict:
     """
     Analyze the business's competitive advantage using Munger's approach:
@@ -659,15 +692,13 @@ def analyze_news_sentiment(news_items: list) -> str:
     return f"Qualitative review of {len(news_items)} recent news items would be needed"
 
 
-def generate_munger_output(
+def munger_llm_request(
     ticker: str,
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> CharlieMungerSignal:
-    """
-    Generates investment decisions in the style of Charlie Munger.
-    """
+) -> dict:
+    """Build the call_llm arguments for Charlie Munger's decision on a ticker."""
     template = ChatPromptTemplate.from_messages([
         (
             "system",
@@ -723,7 +754,7 @@ def generate_munger_output(
     ])
 
     prompt = template.invoke({
-        "analysis_data": json.dumps(analysis_data, indent=2),
+        "analysis_data": encode_analysis(analysis_data),
         "ticker": ticker
     })
 
@@ -734,11 +765,23 @@ def generate_munger_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
+    return dict(
         prompt=prompt, 
         model_name=model_name, 
         model_provider=model_provider, 
         pydantic_model=CharlieMungerSignal, 
         agent_name="charlie_munger_agent", 
         default_factory=create_default_charlie_munger_signal,
-    )
\ No newline at end of file
+    )
+
+
+def generate_munger_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> CharlieMungerSignal:
+    """
+    Generates investment decisions in the style of Charlie Munger.
+    """
+    return call_llm(**munger_llm_request(ticker=ticker, analysis_data=analysis_data, model_name=model_name, model_provider=model_provider))
\ No newline at end of file
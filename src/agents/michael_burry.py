@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
+import asyncio
 import json
 from typing_extensions import Literal
 
@@ -16,7 +17,8 @@ from tools.api import (
     get_market_cap,
     search_line_items,
 )
-from utils.llm import call_llm
+from llm.prompts import encode_analysis
+from utils.llm import acall_llm_for_tickers, call_llm, call_llm_for_tickers, get_llm_batch_size
 from utils.progress import progress
 
 __all__ = [
@@ -24,6 +26,23 @@ __all__ = [
     "michael_burry_agent",
 ]
 
+# Line items this agent reads; also declared in ANALYST_CONFIG so they can be prefetched in batches
+MICHAEL_BURRY_LINE_ITEMS = {
+    "line_items": [
+        "free_cash_flow",
+        "net_income",
+        "total_debt",
+        "cash_and_equivalents",
+        "total_assets",
+        "total_liabilities",
+        "outstanding_shares",
+        "issuance_or_purchase_of_equity_shares",
+    ],
+    "period": "ttm",
+    "limit": 10,
+}
+
+
 ###############################################################################
 # Pydantic output model
 ###############################################################################
@@ -42,7 +61,7 @@ class MichaelBurrySignal(BaseModel):
 ###############################################################################
 
 
-def michael_burry_agent(state: AgentState):  # noqa: C901  (complexity is fine here)
+def michael_burry_agent(state: AgentState):
     """Analyse stocks using Michael Burry's deep‑value, contrarian framework."""
 
     data = state["data"]
@@ -52,101 +71,48 @@ def michael_burry_agent(state: AgentState):  # noqa: C901  (complexity is fine h
     # We look one year back for insider trades / news flow
     start_date = (datetime.fromisoformat(end_date) - timedelta(days=365)).date().isoformat()
 
-    analysis_data: dict[str, dict] = {}
-    burry_analysis: dict[str, dict] = {}
-
-    for ticker in tickers:
-        # ------------------------------------------------------------------
-        # Fetch raw data
-        # ------------------------------------------------------------------
-        progress.update_status("michael_burry_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="ttm", limit=5)
-
-        progress.update_status("michael_burry_agent", ticker, "Fetching line items")
-        line_items = search_line_items(
-            ticker,
-            [
-                "free_cash_flow",
-                "net_income",
-                "total_debt",
-                "cash_and_equivalents",
-                "total_assets",
-                "total_liabilities",
-                "outstanding_shares",
-                "issuance_or_purchase_of_equity_shares",
-            ],
-            end_date,
-        )
+    analysis_data = {ticker: analyze_michael_burry_ticker(ticker, start_date, end_date) for ticker in tickers}
 
-        progress.update_status("michael_burry_agent", ticker, "Fetching insider trades")
-        insider_trades = get_insider_trades(ticker, end_date=end_date, start_date=start_date)
+    # One call per ticker, or one per chunk of tickers when batching (see LLM_BATCH_SIZE)
+    llm_outputs = call_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        progress.update_status("michael_burry_agent", ticker, "Fetching company news")
-        news = get_company_news(ticker, end_date=end_date, start_date=start_date, limit=250)
 
-        progress.update_status("michael_burry_agent", ticker, "Fetching market cap")
-        market_cap = get_market_cap(ticker, end_date)
+async def michael_burry_agent_async(state: AgentState):
+    """Async variant of michael_burry_agent: tickers are analyzed on worker threads and their LLM calls made concurrently."""
 
-        # ------------------------------------------------------------------
-        # Run sub‑analyses
-        # ------------------------------------------------------------------
-        progress.update_status("michael_burry_agent", ticker, "Analyzing value")
-        value_analysis = _analyze_value(metrics, line_items, market_cap)
+    data = state["data"]
+    end_date: str = data["end_date"]  # YYYY‑MM‑DD
+    tickers: list[str] = data["tickers"]
 
-        progress.update_status("michael_burry_agent", ticker, "Analyzing balance sheet")
-        balance_sheet_analysis = _analyze_balance_sheet(metrics, line_items)
+    # We look one year back for insider trades / news flow
+    start_date = (datetime.fromisoformat(end_date) - timedelta(days=365)).date().isoformat()
 
-        progress.update_status("michael_burry_agent", ticker, "Analyzing insider activity")
-        insider_analysis = _analyze_insider_activity(insider_trades)
+    analyses = await asyncio.gather(*(asyncio.to_thread(analyze_michael_burry_ticker, ticker, start_date, end_date) for ticker in tickers))
+    analysis_data = dict(zip(tickers, analyses))
 
-        progress.update_status("michael_burry_agent", ticker, "Analyzing contrarian sentiment")
-        contrarian_analysis = _analyze_contrarian_sentiment(news)
+    llm_outputs = await acall_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        # ------------------------------------------------------------------
-        # Aggregate score & derive preliminary signal
-        # ------------------------------------------------------------------
-        total_score = (
-            value_analysis["score"]
-            + balance_sheet_analysis["score"]
-            + insider_analysis["score"]
-            + contrarian_analysis["score"]
-        )
-        max_score = (
-            value_analysis["max_score"]
-            + balance_sheet_analysis["max_score"]
-            + insider_analysis["max_score"]
-            + contrarian_analysis["max_score"]
-        )
-
-        if total_score >= 0.7 * max_score:
-            signal = "bullish"
-        elif total_score <= 0.3 * max_score:
-            signal = "bearish"
-        else:
-            signal = "neutral"
-
-        # ------------------------------------------------------------------
-        # Collect data for LLM reasoning & output
-        # ------------------------------------------------------------------
-        analysis_data[ticker] = {
-            "signal": signal,
-            "score": total_score,
-            "max_score": max_score,
-            "value_analysis": value_analysis,
-            "balance_sheet_analysis": balance_sheet_analysis,
-            "insider_analysis": insider_analysis,
-            "contrarian_analysis": contrarian_analysis,
-            "market_cap": market_cap,
-        }
 
+def _llm_requests(state: AgentState, analysis_data: dict) -> dict:
+    """Build the Michael Burry LLM request for each analyzed ticker."""
+    llm_requests = {}
+    for ticker, analysis in analysis_data.items():
         progress.update_status("michael_burry_agent", ticker, "Generating LLM output")
-        burry_output = _generate_burry_output(
+        llm_requests[ticker] = michael_burry_llm_request(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
+    return llm_requests
+
 
+def _agent_output(state: AgentState, llm_outputs: dict) -> dict:
+    """Collect Michael Burry's signals and publish them to the graph state."""
+    burry_analysis = {}
+    for ticker, burry_output in llm_outputs.items():
         burry_analysis[ticker] = {
             "signal": burry_output.signal,
             "confidence": burry_output.confidence,
@@ -168,6 +134,79 @@ def michael_burry_agent(state: AgentState):  # noqa: C901  (complexity is fine h
     return {"messages": [message], "data": state["data"]}
 
 
+def analyze_michael_burry_ticker(ticker: str, start_date: str, end_date: str) -> dict:
+    """Fetch one ticker's data and score it the way Michael Burry would."""
+    # ------------------------------------------------------------------
+    # Fetch raw data
+    # ------------------------------------------------------------------
+    progress.update_status("michael_burry_agent", ticker, "Fetching financial metrics")
+    metrics = get_financial_metrics(ticker, end_date, period="ttm", limit=5)
+
+    progress.update_status("michael_burry_agent", ticker, "Fetching line items")
+    line_items = search_line_items(ticker, end_date=end_date, **MICHAEL_BURRY_LINE_ITEMS)
+
+    progress.update_status("michael_burry_agent", ticker, "Fetching insider trades")
+    insider_trades = get_insider_trades(ticker, end_date=end_date, start_date=start_date)
+
+    progress.update_status("michael_burry_agent", ticker, "Fetching company news")
+    news = get_company_news(ticker, end_date=end_date, start_date=start_date, limit=250)
+
+    progress.update_status("michael_burry_agent", ticker, "Fetching market cap")
+    market_cap = get_market_cap(ticker, end_date)
+
+    # ------------------------------------------------------------------
+    # Run sub‑analyses
+    # ------------------------------------------------------------------
+    progress.update_status("michael_burry_agent", ticker, "Analyzing value")
+    value_analysis = _analyze_value(metrics, line_items, market_cap)
+
+    progress.update_status("michael_burry_agent", ticker, "Analyzing balance sheet")
+    balance_sheet_analysis = _analyze_balance_sheet(metrics, line_items)
+
+    progress.update_status("michael_burry_agent", ticker, "Analyzing insider activity")
+    insider_analysis = _analyze_insider_activity(insider_trades)
+
+    progress.update_status("michael_burry_agent", ticker, "Analyzing contrarian sentiment")
+    contrarian_analysis = _analyze_contrarian_sentiment(news)
+
+    # ------------------------------------------------------------------
+    # Aggregate score & derive preliminary signal
+    # ------------------------------------------------------------------
+    total_score = (
+        value_analysis["score"]
+        + balance_sheet_analysis["score"]
+        + insider_analysis["score"]
+        + contrarian_analysis["score"]
+    )
+    max_score = (
+        value_analysis["max_score"]
+        + balance_sheet_analysis["max_score"]
+        + insider_analysis["max_score"]
+        + contrarian_analysis["max_score"]
+    )
+
+    if total_score >= 0.7 * max_score:
+        signal = "bullish"
+    elif total_score <= 0.3 * max_score:
+        signal = "bearish"
+    else:
+        signal = "neutral"
+
+    # ------------------------------------------------------------------
+    # Collect data for LLM reasoning & output
+    # ------------------------------------------------------------------
+    return {
+        "signal": signal,
+        "score": total_score,
+        "max_score": max_score,
+        "value_analysis": value_analysis,
+        "balance_sheet_analysis": balance_sheet_analysis,
+        "insider_analysis": insider_analysis,
+        "contrarian_analysis": contrarian_analysis,
+        "market_cap": market_cap,
+    }
+
+
 ###############################################################################
 # Sub‑analysis helpers
 ###############################################################################
@@ -323,14 +362,14 @@ def _analyze_contrarian_sentiment(news):
 # LLM generation
 ###############################################################################
 
-def _generate_burry_output(
+def michael_burry_llm_request(
     ticker: str,
     analysis_data: dict,
     *,
     model_name: str,
     model_provider: str,
-) -> MichaelBurrySignal:
-    """Call the LLM to craft the final trading signal in Burry's voice."""
+) -> dict:
+    """Build the call_llm arguments for Michael Burry's decision on a ticker."""
 
     template = ChatPromptTemplate.from_messages(
         [
@@ -372,13 +411,13 @@ def _generate_burry_output(
         ]
     )
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+    prompt = template.invoke({"analysis_data": encode_analysis(analysis_data), "ticker": ticker})
 
     # Default fallback signal in case parsing fails
     def create_default_michael_burry_signal():
         return MichaelBurrySignal(signal="neutral", confidence=0.0, reasoning="Parsing error – defaulting to neutral")
 
-    return call_llm(
+    return dict(
         prompt=prompt,
         model_name=model_name,
         model_provider=model_provider,
@@ -386,3 +425,14 @@ def _generate_burry_output(
         agent_name="michael_burry_agent",
         default_factory=create_default_michael_burry_signal,
     )
+
+
+def _generate_burry_output(
+    ticker: str,
+    analysis_data: dict,
+    *,
+    model_name: str,
+    model_provider: str,
+) -> MichaelBurrySignal:
+    """Call the LLM to craft the final trading signal in Burry's voice."""
+    return call_llm(**michael_burry_llm_request(ticker=ticker, analysis_data=analysis_data, model_name=model_name, model_provider=model_provider))
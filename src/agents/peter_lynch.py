@@ -10,13 +10,36 @@ from tools.api import (
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
+import asyncio
 import json
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from llm.prompts import encode_analysis
+from utils.llm import acall_llm_for_tickers, call_llm, call_llm_for_tickers, get_llm_batch_size
 import statistics
 
 
+# Line items this agent reads; also declared in ANALYST_CONFIG so they can be prefetched in batches
+PETER_LYNCH_LINE_ITEMS = {
+    "line_items": [
+        "revenue",
+        "earnings_per_share",
+        "net_income",
+        "operating_income",
+        "gross_margin",
+        "operating_margin",
+        "free_cash_flow",
+        "capital_expenditure",
+        "cash_and_equivalents",
+        "total_debt",
+        "shareholders_equity",
+        "outstanding_shares",
+    ],
+    "period": "annual",
+    "limit": 5,
+}
+
+
 class PeterLynchSignal(BaseModel):
     """
     Container for the Peter Lynch-style output signal.
@@ -46,104 +69,46 @@ def peter_lynch_agent(state: AgentState):
     end_date = data["end_date"]
     tickers = data["tickers"]
 
-    analysis_data = {}
-    lynch_analysis = {}
-
-    for ticker in tickers:
-        progress.update_status("peter_lynch_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
-
-        progress.update_status("peter_lynch_agent", ticker, "Gathering financial line items")
-        # Relevant line items for Peter Lynch's approach
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "earnings_per_share",
-                "net_income",
-                "operating_income",
-                "gross_margin",
-                "operating_margin",
-                "free_cash_flow",
-                "capital_expenditure",
-                "cash_and_equivalents",
-                "total_debt",
-                "shareholders_equity",
-                "outstanding_shares",
-            ],
-            end_date,
-            period="annual",
-            limit=5,
-        )
-
-        progress.update_status("peter_lynch_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
-
-        progress.update_status("peter_lynch_agent", ticker, "Fetching insider trades")
-        insider_trades = get_insider_trades(ticker, end_date, start_date=None, limit=50)
+    analysis_data = {ticker: analyze_peter_lynch_ticker(ticker, start_date, end_date) for ticker in tickers}
 
-        progress.update_status("peter_lynch_agent", ticker, "Fetching company news")
-        company_news = get_company_news(ticker, end_date, start_date=None, limit=50)
+    # One call per ticker, or one per chunk of tickers when batching (see LLM_BATCH_SIZE)
+    llm_outputs = call_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        progress.update_status("peter_lynch_agent", ticker, "Fetching recent price data for reference")
-        prices = get_prices(ticker, start_date=start_date, end_date=end_date)
 
-        # Perform sub-analyses:
-        progress.update_status("peter_lynch_agent", ticker, "Analyzing growth")
-        growth_analysis = analyze_lynch_growth(financial_line_items)
+async def peter_lynch_agent_async(state: AgentState):
+    """Async variant of peter_lynch_agent: tickers are analyzed on worker threads and their LLM calls made concurrently."""
 
-        progress.update_status("peter_lynch_agent", ticker, "Analyzing fundamentals")
-        fundamentals_analysis = analyze_lynch_fundamentals(financial_line_items)
-
-        progress.update_status("peter_lynch_agent", ticker, "Analyzing valuation (focus on PEG)")
-        valuation_analysis = analyze_lynch_valuation(financial_line_items, market_cap)
-
-        progress.update_status("peter_lynch_agent", ticker, "Analyzing sentiment")
-        sentiment_analysis = analyze_sentiment(company_news)
+    data = state["data"]
+    start_date = data["start_date"]
+    end_date = data["end_date"]
+    tickers = data["tickers"]
 
-        progress.update_status("peter_lynch_agent", ticker, "Analyzing insider activity")
-        insider_activity = analyze_insider_activity(insider_trades)
+    analyses = await asyncio.gather(*(asyncio.to_thread(analyze_peter_lynch_ticker, ticker, start_date, end_date) for ticker in tickers))
+    analysis_data = dict(zip(tickers, analyses))
 
-        # Combine partial scores with weights typical for Peter Lynch:
-        #   30% Growth, 25% Valuation, 20% Fundamentals,
-        #   15% Sentiment, 10% Insider Activity = 100%
-        total_score = (
-            growth_analysis["score"] * 0.30
-            + valuation_analysis["score"] * 0.25
-            + fundamentals_analysis["score"] * 0.20
-            + sentiment_analysis["score"] * 0.15
-            + insider_activity["score"] * 0.10
-        )
+    llm_outputs = await acall_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        max_possible_score = 10.0
-
-        # Map final score to signal
-        if total_score >= 7.5:
-            signal = "bullish"
-        elif total_score <= 4.5:
-            signal = "bearish"
-        else:
-            signal = "neutral"
-
-        analysis_data[ticker] = {
-            "signal": signal,
-            "score": total_score,
-            "max_score": max_possible_score,
-            "growth_analysis": growth_analysis,
-            "valuation_analysis": valuation_analysis,
-            "fundamentals_analysis": fundamentals_analysis,
-            "sentiment_analysis": sentiment_analysis,
-            "insider_activity": insider_activity,
-        }
 
+def _llm_requests(state: AgentState, analysis_data: dict) -> dict:
+    """Build the Peter Lynch LLM request for each analyzed ticker."""
+    llm_requests = {}
+    for ticker, analysis in analysis_data.items():
         progress.update_status("peter_lynch_agent", ticker, "Generating Peter Lynch analysis")
-        lynch_output = generate_lynch_output(
+        llm_requests[ticker] = lynch_llm_request(
             ticker=ticker,
-            analysis_data=analysis_data[ticker],
+            analysis_data=analysis,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
+    return llm_requests
+
 
+def _agent_output(state: AgentState, llm_outputs: dict) -> dict:
+    """Collect Peter Lynch's signals and publish them to the graph state."""
+    lynch_analysis = {}
+    for ticker, lynch_output in llm_outputs.items():
         lynch_analysis[ticker] = {
             "signal": lynch_output.signal,
             "confidence": lynch_output.confidence,
@@ -164,6 +129,76 @@ def peter_lynch_agent(state: AgentState):
     return {"messages": [message], "data": state["data"]}
 
 
+def analyze_peter_lynch_ticker(ticker: str, start_date: str, end_date: str) -> dict:
+    """Fetch one ticker's data and score it the way Peter Lynch would."""
+    progress.update_status("peter_lynch_agent", ticker, "Fetching financial metrics")
+    metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
+
+    progress.update_status("peter_lynch_agent", ticker, "Gathering financial line items")
+    # Relevant line items for Peter Lynch's approach
+    financial_line_items = search_line_items(ticker, end_date=end_date, **PETER_LYNCH_LINE_ITEMS)
+
+    progress.update_status("peter_lynch_agent", ticker, "Getting market cap")
+    market_cap = get_market_cap(ticker, end_date)
+
+    progress.update_status("peter_lynch_agent", ticker, "Fetching insider trades")
+    insider_trades = get_insider_trades(ticker, end_date, start_date=None, limit=50)
+
+    progress.update_status("peter_lynch_agent", ticker, "Fetching company news")
+    company_news = get_company_news(ticker, end_date, start_date=None, limit=50)
+
+    progress.update_status("peter_lynch_agent", ticker, "Fetching recent price data for reference")
+    prices = get_prices(ticker, start_date=start_date, end_date=end_date)
+
+    # Perform sub-analyses:
+    progress.update_status("peter_lynch_agent", ticker, "Analyzing growth")
+    growth_analysis = analyze_lynch_growth(financial_line_items)
+
+    progress.update_status("peter_lynch_agent", ticker, "Analyzing fundamentals")
+    fundamentals_analysis = analyze_lynch_fundamentals(financial_line_items)
+
+    progress.update_status("peter_lynch_agent", ticker, "Analyzing valuation (focus on PEG)")
+    valuation_analysis = analyze_lynch_valuation(financial_line_items, market_cap)
+
+    progress.update_status("peter_lynch_agent", ticker, "Analyzing sentiment")
+    sentiment_analysis = analyze_sentiment(company_news)
+
+    progress.update_status("peter_lynch_agent", ticker, "Analyzing insider activity")
+    insider_activity = analyze_insider_activity(insider_trades)
+
+    # Combine partial scores with weights typical for Peter Lynch:
+    #   30% Growth, 25% Valuation, 20% Fundamentals,
+    #   15% Sentiment, 10% Insider Activity = 100%
+    total_score = (
+        growth_analysis["score"] * 0.30
+        + valuation_analysis["score"] * 0.25
+        + fundamentals_analysis["score"] * 0.20
+        + sentiment_analysis["score"] * 0.15
+        + insider_activity["score"] * 0.10
+    )
+
+    max_possible_score = 10.0
+
+    # Map final score to signal
+    if total_score >= 7.5:
+        signal = "bullish"
+    elif total_score <= 4.5:
+        signal = "bearish"
+    else:
+        signal = "neutral"
+
+    return {
+        "signal": signal,
+        "score": total_score,
+        "max_score": max_possible_score,
+        "growth_analysis": growth_analysis,
+        "valuation_analysis": valuation_analysis,
+        "fundamentals_analysis": fundamentals_analysis,
+        "sentiment_analysis": sentiment_analysis,
+        "insider_activity": insider_activity,
+    }
+
+
 def analyze_lynch_growth(financial_line_items: list) -> dict:
     """
     Evaluate growth based on revenue and EPS trends:
@@ -437,15 +472,13 @@ def analyze_insider_activity(insider_trades: list) -> dict:
     return {"score": score, "details": "; ".join(details)}
 
 
-def generate_lynch_output(
+def lynch_llm_request(
     ticker: str,
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> PeterLynchSignal:
-    """
-    Generates a final JSON signal in Peter Lynch's voice & style.
-    """
+) -> dict:
+    """Build the call_llm arguments for Peter Lynch's decision on a ticker."""
     template = ChatPromptTemplate.from_messages(
         [
             (
@@ -488,7 +521,7 @@ def generate_lynch_output(
         ]
     )
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+    prompt = template.invoke({"analysis_data": encode_analysis(analysis_data), "ticker": ticker})
 
     def create_default_signal():
         return PeterLynchSignal(
@@ -497,7 +530,7 @@ def generate_lynch_output(
             reasoning="Error in analysis; defaulting to neutral"
         )
 
-    return call_llm(
+    return dict(
         prompt=prompt,
         model_name=model_name,
         model_provider=model_provider,
@@ -505,3 +538,15 @@ def generate_lynch_output(
         agent_name="peter_lynch_agent",
         default_factory=create_default_signal,
     )
+
+
+def generate_lynch_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> PeterLynchSignal:
+    """
+    Generates a final JSON signal in Peter Lynch's voice & style.
+    """
+    return call_llm(**lynch_llm_request(ticker=ticker, analysis_data=analysis_data, model_name=model_name, model_provider=model_provider))
@@ -9,13 +9,37 @@ from tools.api import (
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
+import asyncio
 import json
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from llm.prompts import encode_analysis
+from utils.llm import acall_llm_for_tickers, call_llm, call_llm_for_tickers, get_llm_batch_size
 import statistics
 
 
+# Line items this agent reads; also declared in ANALYST_CONFIG so they can be prefetched in batches
+PHIL_FISHER_LINE_ITEMS = {
+    "line_items": [
+        "revenue",
+        "net_income",
+        "earnings_per_share",
+        "free_cash_flow",
+        "research_and_development",
+        "operating_income",
+        "operating_margin",
+        "gross_margin",
+        "total_debt",
+        "shareholders_equity",
+        "cash_and_equivalents",
+        "ebit",
+        "ebitda",
+    ],
+    "period": "annual",
+    "limit": 5,
+}
+
+
 class PhilFisherSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
@@ -39,114 +63,45 @@ def phil_fisher_agent(state: AgentState):
     end_date = data["end_date"]
     tickers = data["tickers"]
 
-    analysis_data = {}
-    fisher_analysis = {}
-
-    for ticker in tickers:
-        progress.update_status("phil_fisher_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
-
-        progress.update_status("phil_fisher_agent", ticker, "Gathering financial line items")
-        # Include relevant line items for Phil Fisher's approach:
-        #   - Growth & Quality: revenue, net_income, earnings_per_share, R&D expense
-        #   - Margins & Stability: operating_income, operating_margin, gross_margin
-        #   - Management Efficiency & Leverage: total_debt, shareholders_equity, free_cash_flow
-        #   - Valuation: net_income, free_cash_flow (for P/E, P/FCF), ebit, ebitda
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "net_income",
-                "earnings_per_share",
-                "free_cash_flow",
-                "research_and_development",
-                "operating_income",
-                "operating_margin",
-                "gross_margin",
-                "total_debt",
-                "shareholders_equity",
-                "cash_and_equivalents",
-                "ebit",
-                "ebitda",
-            ],
-            end_date,
-            period="annual",
-            limit=5,
-        )
-
-        progress.update_status("phil_fisher_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
-
-        progress.update_status("phil_fisher_agent", ticker, "Fetching insider trades")
-        insider_trades = get_insider_trades(ticker, end_date, start_date=None, limit=50)
-
-        progress.update_status("phil_fisher_agent", ticker, "Fetching company news")
-        company_news = get_company_news(ticker, end_date, start_date=None, limit=50)
-
-        progress.update_status("phil_fisher_agent", ticker, "Analyzing growth & quality")
-        growth_quality = analyze_fisher_growth_quality(financial_line_items)
-
-        progress.update_status("phil_fisher_agent", ticker, "Analyzing margins & stability")
-        margins_stability = analyze_margins_stability(financial_line_items)
-
-        progress.update_status("phil_fisher_agent", ticker, "Analyzing management efficiency & leverage")
-        mgmt_efficiency = analyze_management_efficiency_leverage(financial_line_items)
+    analysis_data = {ticker: analyze_phil_fisher_ticker(ticker, end_date) for ticker in tickers}
 
-        progress.update_status("phil_fisher_agent", ticker, "Analyzing valuation (Fisher style)")
-        fisher_valuation = analyze_fisher_valuation(financial_line_items, market_cap)
+    # One call per ticker, or one per chunk of tickers when batching (see LLM_BATCH_SIZE)
+    llm_outputs = call_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        progress.update_status("phil_fisher_agent", ticker, "Analyzing insider activity")
-        insider_activity = analyze_insider_activity(insider_trades)
 
-        progress.update_status("phil_fisher_agent", ticker, "Analyzing sentiment")
-        sentiment_analysis = analyze_sentiment(company_news)
+async def phil_fisher_agent_async(state: AgentState):
+    """Async variant of phil_fisher_agent: tickers are analyzed on worker threads and their LLM calls made concurrently."""
+    data = state["data"]
+    start_date = data["start_date"]
+    end_date = data["end_date"]
+    tickers = data["tickers"]
 
-        # Combine partial scores with weights typical for Fisher:
-        #   30% Growth & Quality
-        #   25% Margins & Stability
-        #   20% Management Efficiency
-        #   15% Valuation
-        #   5% Insider Activity
-        #   5% Sentiment
-        total_score = (
-            growth_quality["score"] * 0.30
-            + margins_stability["score"] * 0.25
-            + mgmt_efficiency["score"] * 0.20
-            + fisher_valuation["score"] * 0.15
-            + insider_activity["score"] * 0.05
-            + sentiment_analysis["score"] * 0.05
-        )
+    analyses = await asyncio.gather(*(asyncio.to_thread(analyze_phil_fisher_ticker, ticker, end_date) for ticker in tickers))
+    analysis_data = dict(zip(tickers, analyses))
 
-        max_possible_score = 10
+    llm_outputs = await acall_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        # Simple bullish/neutral/bearish signal
-        if total_score >= 7.5:
-            signal = "bullish"
-        elif total_score <= 4.5:
-            signal = "bearish"
-        else:
-            signal = "neutral"
-
-        analysis_data[ticker] = {
-            "signal": signal,
-            "score": total_score,
-            "max_score": max_possible_score,
-            "growth_quality": growth_quality,
-            "margins_stability": margins_stability,
-            "management_efficiency": mgmt_efficiency,
-            "valuation_analysis": fisher_valuation,
-            "insider_activity": insider_activity,
-            "sentiment_analysis": sentiment_analysis,
-        }
 
+def _llm_requests(state: AgentState, analysis_data: dict) -> dict:
+    """Build the Phil Fisher LLM request for each analyzed ticker."""
+    llm_requests = {}
+    for ticker, analysis in analysis_data.items():
         progress.update_status("phil_fisher_agent", ticker, "Generating Phil Fisher-style analysis")
-        fisher_output = generate_fisher_output(
+        llm_requests[ticker] = fisher_llm_request(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
+    return llm_requests
+
 
+def _agent_output(state: AgentState, llm_outputs: dict) -> dict:
+    """Collect Phil Fisher's signals and publish them to the graph state."""
+    fisher_analysis = {}
+    for ticker, fisher_output in llm_outputs.items():
         fisher_analysis[ticker] = {
             "signal": fisher_output.signal,
             "confidence": fisher_output.confidence,
@@ -165,6 +120,85 @@ def phil_fisher_agent(state: AgentState):
     return {"messages": [message], "data": state["data"]}
 
 
+def analyze_phil_fisher_ticker(ticker: str, end_date: str) -> dict:
+    """Fetch one ticker's data and score it the way Phil Fisher would."""
+    progress.update_status("phil_fisher_agent", ticker, "Fetching financial metrics")
+    metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
+
+    progress.update_status("phil_fisher_agent", ticker, "Gathering financial line items")
+    # Include relevant line items for Phil Fisher's approach:
+    #   - Growth & Quality: revenue, net_income, earnings_per_share, R&D expense
+    #   - Margins & Stability: operating_income, operating_margin, gross_margin
+    #   - Management Efficiency & Leverage: total_debt, shareholders_equity, free_cash_flow
+    #   - Valuation: net_income, free_cash_flow (for P/E, P/FCF), ebit, ebitda
+    financial_line_items = search_line_items(ticker, end_date=end_date, **PHIL_FISHER_LINE_ITEMS)
+
+    progress.update_status("phil_fisher_agent", ticker, "Getting market cap")
+    market_cap = get_market_cap(ticker, end_date)
+
+    progress.update_status("phil_fisher_agent", ticker, "Fetching insider trades")
+    insider_trades = get_insider_trades(ticker, end_date, start_date=None, limit=50)
+
+    progress.update_status("phil_fisher_agent", ticker, "Fetching company news")
+    company_news = get_company_news(ticker, end_date, start_date=None, limit=50)
+
+    progress.update_status("phil_fisher_agent", ticker, "Analyzing growth & quality")
+    growth_quality = analyze_fisher_growth_quality(financial_line_items)
+
+    progress.update_status("phil_fisher_agent", ticker, "Analyzing margins & stability")
+    margins_stability = analyze_margins_stability(financial_line_items)
+
+    progress.update_status("phil_fisher_agent", ticker, "Analyzing management efficiency & leverage")
+    mgmt_efficiency = analyze_management_efficiency_leverage(financial_line_items)
+
+    progress.update_status("phil_fisher_agent", ticker, "Analyzing valuation (Fisher style)")
+    fisher_valuation = analyze_fisher_valuation(financial_line_items, market_cap)
+
+    progress.update_status("phil_fisher_agent", ticker, "Analyzing insider activity")
+    insider_activity = analyze_insider_activity(insider_trades)
+
+    progress.update_status("phil_fisher_agent", ticker, "Analyzing sentiment")
+    sentiment_analysis = analyze_sentiment(company_news)
+
+    # Combine partial scores with weights typical for Fisher:
+    #   30% Growth & Quality
+    #   25% Margins & Stability
+    #   20% Management Efficiency
+    #   15% Valuation
+    #   5% Insider Activity
+    #   5% Sentiment
+    total_score = (
+        growth_quality["score"] * 0.30
+        + margins_stability["score"] * 0.25
+        + mgmt_efficiency["score"] * 0.20
+        + fisher_valuation["score"] * 0.15
+        + insider_activity["score"] * 0.05
+        + sentiment_analysis["score"] * 0.05
+    )
+
+    max_possible_score = 10
+
+    # Simple bullish/neutral/bearish signal
+    if total_score >= 7.5:
+        signal = "bullish"
+    elif total_score <= 4.5:
+        signal = "bearish"
+    else:
+        signal = "neutral"
+
+    return {
+        "signal": signal,
+        "score": total_score,
+        "max_score": max_possible_score,
+        "growth_quality": growth_quality,
+        "margins_stability": margins_stability,
+        "management_efficiency": mgmt_efficiency,
+        "valuation_analysis": fisher_valuation,
+        "insider_activity": insider_activity,
+        "sentiment_analysis": sentiment_analysis,
+    }
+
+
 def analyze_fisher_growth_quality(financial_line_items: list) -> dict:
     """
     Evaluate growth & quality:
@@ -525,15 +559,13 @@ def analyze_sentiment(news_items: list) -> dict:
     return {"score": score, "details": "; ".join(details)}
 
 
-def generate_fisher_output(
+def fisher_llm_request(
     ticker: str,
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> PhilFisherSignal:
-    """
-    Generates a JSON signal in the style of Phil Fisher.
-    """
+) -> dict:
+    """Build the call_llm arguments for Phil Fisher's decision on a ticker."""
     template = ChatPromptTemplate.from_messages(
         [
             (
@@ -582,7 +614,7 @@ def generate_fisher_output(
         ]
     )
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+    prompt = template.invoke({"analysis_data": encode_analysis(analysis_data), "ticker": ticker})
 
     def create_default_signal():
         return PhilFisherSignal(
@@ -591,7 +623,7 @@ def generate_fisher_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
+    return dict(
         prompt=prompt,
         model_name=model_name,
         model_provider=model_provider,
@@ -599,3 +631,15 @@ def generate_fisher_output(
         agent_name="phil_fisher_agent",
         default_factory=create_default_signal,
     )
+
+
+def generate_fisher_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> PhilFisherSignal:
+    """
+    Generates a JSON signal in the style of Phil Fisher.
+    """
+    return call_llm(**fisher_llm_request(ticker=ticker, analysis_data=analysis_data, model_name=model_name, model_provider=model_provider))
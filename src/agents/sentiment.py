@@ -1,11 +1,10 @@
 from langchain_core.messages import HumanMessage
 from graph.state import AgentState, show_agent_reasoning
 from utils.progress import progress
-import pandas as pd
-import numpy as np
+from collections import Counter
 import json
 
-from tools.api import get_insider_trades, get_company_news
+from tools.api import iter_insider_trades, iter_company_news
 
 
 ##### Sentiment Agent #####
@@ -19,31 +18,22 @@ def sentiment_agent(state: AgentState):
     sentiment_analysis = {}
 
     for ticker in tickers:
-        progress.update_status("sentiment_agent", ticker, "Fetching insider trades")
+        progress.update_status("sentiment_agent", ticker, "Analyzing insider trades")
 
-        # Get the insider trades
-        insider_trades = get_insider_trades(
-            ticker=ticker,
-            end_date=end_date,
-            limit=1000,
-        )
-
-        progress.update_status("sentiment_agent", ticker, "Analyzing trading patterns")
+        # Count the signals from the insider trades as they stream in
+        insider_signals = Counter()
+        for trade in iter_insider_trades(ticker=ticker, end_date=end_date, limit=1000):
+            if trade.transaction_shares is not None:
+                insider_signals["bearish" if trade.transaction_shares < 0 else "bullish"] += 1
 
-        # Get the signals from the insider trades
-        transaction_shares = pd.Series([t.transaction_shares for t in insider_trades]).dropna()
-        insider_signals = np.where(transaction_shares < 0, "bearish", "bullish").tolist()
+        progress.update_status("sentiment_agent", ticker, "Analyzing company news")
 
-        progress.update_status("sentiment_agent", ticker, "Fetching company news")
+        # Count the sentiment of the company news
+        news_signals = Counter()
+        for news in iter_company_news(ticker, end_date, limit=100):
+            if news.sentiment is not None:
+                news_signals[{"negative": "bearish", "positive": "bullish"}.get(news.sentiment, "neutral")] += 1
 
-        # Get the company news
-        company_news = get_company_news(ticker, end_date, limit=100)
-
-        # Get the sentiment from the company news
-        sentiment = pd.Series([n.sentiment for n in company_news]).dropna()
-        news_signals = np.where(sentiment == "negative", "bearish", 
-                              np.where(sentiment == "positive", "bullish", "neutral")).tolist()
-        
         progress.update_status("sentiment_agent", ticker, "Combining signals")
         # Combine signals from both sources with weights
         insider_weight = 0.3
@@ -51,12 +41,12 @@ def sentiment_agent(state: AgentState):
         
         # Calculate weighted signal counts
         bullish_signals = (
-            insider_signals.count("bullish") * insider_weight +
-            news_signals.count("bullish") * news_weight
+            insider_signals["bullish"] * insider_weight +
+            news_signals["bullish"] * news_weight
         )
         bearish_signals = (
-            insider_signals.count("bearish") * insider_weight +
-            news_signals.count("bearish") * news_weight
+            insider_signals["bearish"] * insider_weight +
+            news_signals["bearish"] * news_weight
         )
 
         if bullish_signals > bearish_signals:
@@ -67,7 +57,7 @@ def sentiment_agent(state: AgentState):
             overall_signal = "neutral"
 
         # Calculate confidence level based on the weighted proportion
-        total_weighted_signals = len(insider_signals) * insider_weight + len(news_signals) * news_weight
+        total_weighted_signals = insider_signals.total() * insider_weight + news_signals.total() * news_weight
         confidence = 0  # Default confidence when there are no signals
         if total_weighted_signals > 0:
             confidence = round(max(bullish_signals, bearish_signals) / total_weighted_signals, 2) * 100
@@ -10,13 +10,38 @@ from tools.api import (
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
+import asyncio
 import json
 from typing_extensions import Literal
 from utils.progress import progress
-from utils.llm import call_llm
+from llm.prompts import encode_analysis
+from utils.llm import acall_llm_for_tickers, call_llm, call_llm_for_tickers, get_llm_batch_size
 import statistics
 
 
+# Line items this agent reads; also declared in ANALYST_CONFIG so they can be prefetched in batches
+STANLEY_DRUCKENMILLER_LINE_ITEMS = {
+    "line_items": [
+        "revenue",
+        "earnings_per_share",
+        "net_income",
+        "operating_income",
+        "gross_margin",
+        "operating_margin",
+        "free_cash_flow",
+        "capital_expenditure",
+        "cash_and_equivalents",
+        "total_debt",
+        "shareholders_equity",
+        "outstanding_shares",
+        "ebit",
+        "ebitda",
+    ],
+    "period": "annual",
+    "limit": 5,
+}
+
+
 class StanleyDruckenmillerSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
@@ -38,109 +63,45 @@ def stanley_druckenmiller_agent(state: AgentState):
     end_date = data["end_date"]
     tickers = data["tickers"]
 
-    analysis_data = {}
-    druck_analysis = {}
-
-    for ticker in tickers:
-        progress.update_status("stanley_druckenmiller_agent", ticker, "Fetching financial metrics")
-        metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
-
-        progress.update_status("stanley_druckenmiller_agent", ticker, "Gathering financial line items")
-        # Include relevant line items for Stan Druckenmiller's approach:
-        #   - Growth & momentum: revenue, EPS, operating_income, ...
-        #   - Valuation: net_income, free_cash_flow, ebit, ebitda
-        #   - Leverage: total_debt, shareholders_equity
-        #   - Liquidity: cash_and_equivalents
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "revenue",
-                "earnings_per_share",
-                "net_income",
-                "operating_income",
-                "gross_margin",
-                "operating_margin",
-                "free_cash_flow",
-                "capital_expenditure",
-                "cash_and_equivalents",
-                "total_debt",
-                "shareholders_equity",
-                "outstanding_shares",
-                "ebit",
-                "ebitda",
-            ],
-            end_date,
-            period="annual",
-            limit=5,
-        )
-
-        progress.update_status("stanley_druckenmiller_agent", ticker, "Getting market cap")
-        market_cap = get_market_cap(ticker, end_date)
-
-        progress.update_status("stanley_druckenmiller_agent", ticker, "Fetching insider trades")
-        insider_trades = get_insider_trades(ticker, end_date, start_date=None, limit=50)
+    analysis_data = {ticker: analyze_stanley_druckenmiller_ticker(ticker, start_date, end_date) for ticker in tickers}
 
-        progress.update_status("stanley_druckenmiller_agent", ticker, "Fetching company news")
-        company_news = get_company_news(ticker, end_date, start_date=None, limit=50)
+    # One call per ticker, or one per chunk of tickers when batching (see LLM_BATCH_SIZE)
+    llm_outputs = call_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        progress.update_status("stanley_druckenmiller_agent", ticker, "Fetching recent price data for momentum")
-        prices = get_prices(ticker, start_date=start_date, end_date=end_date)
 
-        progress.update_status("stanley_druckenmiller_agent", ticker, "Analyzing growth & momentum")
-        growth_momentum_analysis = analyze_growth_and_momentum(financial_line_items, prices)
-
-        progress.update_status("stanley_druckenmiller_agent", ticker, "Analyzing sentiment")
-        sentiment_analysis = analyze_sentiment(company_news)
-
-        progress.update_status("stanley_druckenmiller_agent", ticker, "Analyzing insider activity")
-        insider_activity = analyze_insider_activity(insider_trades)
-
-        progress.update_status("stanley_druckenmiller_agent", ticker, "Analyzing risk-reward")
-        risk_reward_analysis = analyze_risk_reward(financial_line_items, market_cap, prices)
-
-        progress.update_status("stanley_druckenmiller_agent", ticker, "Performing Druckenmiller-style valuation")
-        valuation_analysis = analyze_druckenmiller_valuation(financial_line_items, market_cap)
+async def stanley_druckenmiller_agent_async(state: AgentState):
+    """Async variant of stanley_druckenmiller_agent: tickers are analyzed on worker threads and their LLM calls made concurrently."""
+    data = state["data"]
+    start_date = data["start_date"]
+    end_date = data["end_date"]
+    tickers = data["tickers"]
 
-        # Combine partial scores with weights typical for Druckenmiller:
-        #   35% Growth/Momentum, 20% Risk/Reward, 20% Valuation,
-        #   15% Sentiment, 10% Insider Activity = 100%
-        total_score = (
-            growth_momentum_analysis["score"] * 0.35
-            + risk_reward_analysis["score"] * 0.20
-            + valuation_analysis["score"] * 0.20
-            + sentiment_analysis["score"] * 0.15
-            + insider_activity["score"] * 0.10
-        )
+    analyses = await asyncio.gather(*(asyncio.to_thread(analyze_stanley_druckenmiller_ticker, ticker, start_date, end_date) for ticker in tickers))
+    analysis_data = dict(zip(tickers, analyses))
 
-        max_possible_score = 10
+    llm_outputs = await acall_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        # Simple bullish/neutral/bearish signal
-        if total_score >= 7.5:
-            signal = "bullish"
-        elif total_score <= 4.5:
-            signal = "bearish"
-        else:
-            signal = "neutral"
-
-        analysis_data[ticker] = {
-            "signal": signal,
-            "score": total_score,
-            "max_score": max_possible_score,
-            "growth_momentum_analysis": growth_momentum_analysis,
-            "sentiment_analysis": sentiment_analysis,
-            "insider_activity": insider_activity,
-            "risk_reward_analysis": risk_reward_analysis,
-            "valuation_analysis": valuation_analysis,
-        }
 
+def _llm_requests(state: AgentState, analysis_data: dict) -> dict:
+    """Build the Stanley Druckenmiller LLM request for each analyzed ticker."""
+    llm_requests = {}
+    for ticker, analysis in analysis_data.items():
         progress.update_status("stanley_druckenmiller_agent", ticker, "Generating Stanley Druckenmiller analysis")
-        druck_output = generate_druckenmiller_output(
+        llm_requests[ticker] = druckenmiller_llm_request(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
+    return llm_requests
 
+
+def _agent_output(state: AgentState, llm_outputs: dict) -> dict:
+    """Collect Stanley Druckenmiller's signals and publish them to the graph state."""
+    druck_analysis = {}
+    for ticker, druck_output in llm_outputs.items():
         druck_analysis[ticker] = {
             "signal": druck_output.signal,
             "confidence": druck_output.confidence,
@@ -159,6 +120,79 @@ def stanley_druckenmiller_agent(state: AgentState):
     return {"messages": [message], "data": state["data"]}
 
 
+def analyze_stanley_druckenmiller_ticker(ticker: str, start_date: str, end_date: str) -> dict:
+    """Fetch one ticker's data and score it the way Stanley Druckenmiller would."""
+    progress.update_status("stanley_druckenmiller_agent", ticker, "Fetching financial metrics")
+    metrics = get_financial_metrics(ticker, end_date, period="annual", limit=5)
+
+    progress.update_status("stanley_druckenmiller_agent", ticker, "Gathering financial line items")
+    # Include relevant line items for Stan Druckenmiller's approach:
+    #   - Growth & momentum: revenue, EPS, operating_income, ...
+    #   - Valuation: net_income, free_cash_flow, ebit, ebitda
+    #   - Leverage: total_debt, shareholders_equity
+    #   - Liquidity: cash_and_equivalents
+    financial_line_items = search_line_items(ticker, end_date=end_date, **STANLEY_DRUCKENMILLER_LINE_ITEMS)
+
+    progress.update_status("stanley_druckenmiller_agent", ticker, "Getting market cap")
+    market_cap = get_market_cap(ticker, end_date)
+
+    progress.update_status("stanley_druckenmiller_agent", ticker, "Fetching insider trades")
+    insider_trades = get_insider_trades(ticker, end_date, start_date=None, limit=50)
+
+    progress.update_status("stanley_druckenmiller_agent", ticker, "Fetching company news")
+    company_news = get_company_news(ticker, end_date, start_date=None, limit=50)
+
+    progress.update_status("stanley_druckenmiller_agent", ticker, "Fetching recent price data for momentum")
+    prices = get_prices(ticker, start_date=start_date, end_date=end_date)
+
+    progress.update_status("stanley_druckenmiller_agent", ticker, "Analyzing growth & momentum")
+    growth_momentum_analysis = analyze_growth_and_momentum(financial_line_items, prices)
+
+    progress.update_status("stanley_druckenmiller_agent", ticker, "Analyzing sentiment")
+    sentiment_analysis = analyze_sentiment(company_news)
+
+    progress.update_status("stanley_druckenmiller_agent", ticker, "Analyzing insider activity")
+    insider_activity = analyze_insider_activity(insider_trades)
+
+    progress.update_status("stanley_druckenmiller_agent", ticker, "Analyzing risk-reward")
+    risk_reward_analysis = analyze_risk_reward(financial_line_items, market_cap, prices)
+
+    progress.update_status("stanley_druckenmiller_agent", ticker, "Performing Druckenmiller-style valuation")
+    valuation_analysis = analyze_druckenmiller_valuation(financial_line_items, market_cap)
+
+    # Combine partial scores with weights typical for Druckenmiller:
+    #   35% Growth/Momentum, 20% Risk/Reward, 20% Valuation,
+    #   15% Sentiment, 10% Insider Activity = 100%
+    total_score = (
+        growth_momentum_analysis["score"] * 0.35
+        + risk_reward_analysis["score"] * 0.20
+        + valuation_analysis["score"] * 0.20
+        + sentiment_analysis["score"] * 0.15
+        + insider_activity["score"] * 0.10
+    )
+
+    max_possible_score = 10
+
+    # Simple bullish/neutral/bearish signal
+    if total_score >= 7.5:
+        signal = "bullish"
+    elif total_score <= 4.5:
+        signal = "bearish"
+    else:
+        signal = "neutral"
+
+    return {
+        "signal": signal,
+        "score": total_score,
+        "max_score": max_possible_score,
+        "growth_momentum_analysis": growth_momentum_analysis,
+        "sentiment_analysis": sentiment_analysis,
+        "insider_activity": insider_activity,
+        "risk_reward_analysis": risk_reward_analysis,
+        "valuation_analysis": valuation_analysis,
+    }
+
+
 def analyze_growth_and_momentum(financial_line_items: list, prices: list) -> dict:
     """
     Evaluate:
@@ -518,15 +552,13 @@ def analyze_druckenmiller_valuation(financial_line_items: list, market_cap: floa
     return {"score": final_score, "details": "; ".join(details)}
 
 
-def generate_druckenmiller_output(
+def druckenmiller_llm_request(
     ticker: str,
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> StanleyDruckenmillerSignal:
-    """
-    Generates a JSON signal in the style of Stanley Druckenmiller.
-    """
+) -> dict:
+    """Build the call_llm arguments for Stanley Druckenmiller's decision on a ticker."""
     template = ChatPromptTemplate.from_messages(
         [
             (
@@ -576,7 +608,7 @@ def generate_druckenmiller_output(
         ]
     )
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+    prompt = template.invoke({"analysis_data": encode_analysis(analysis_data), "ticker": ticker})
 
     def create_default_signal():
         return StanleyDruckenmillerSignal(
@@ -585,7 +617,7 @@ def generate_druckenmiller_output(
             reasoning="Error in analysis, defaulting to neutral"
         )
 
-    return call_llm(
+    return dict(
         prompt=prompt,
         model_name=model_name,
         model_provider=model_provider,
@@ -593,3 +625,15 @@ def generate_druckenmiller_output(
         agent_name="stanley_druckenmiller_agent",
         default_factory=create_default_signal,
     )
+
+
+def generate_druckenmiller_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> StanleyDruckenmillerSignal:
+    """
+    Generates a JSON signal in the style of Stanley Druckenmiller.
+    """
+    return call_llm(**druckenmiller_llm_request(ticker=ticker, analysis_data=analysis_data, model_name=model_name, model_provider=model_provider))
@@ -6,6 +6,20 @@ import json
 from tools.api import get_financial_metrics, get_market_cap, search_line_items
 
 
+# Line items this agent reads; also declared in ANALYST_CONFIG so they can be prefetched in batches
+VALUATION_LINE_ITEMS = {
+    "line_items": [
+        "free_cash_flow",
+        "net_income",
+        "depreciation_and_amortization",
+        "capital_expenditure",
+        "working_capital",
+    ],
+    "period": "ttm",
+    "limit": 2,
+}
+
+
 ##### Valuation Agent #####
 def valuation_agent(state: AgentState):
     """Performs detailed valuation analysis using multiple methodologies for multiple tickers."""
@@ -35,19 +49,7 @@ def valuation_agent(state: AgentState):
 
         progress.update_status("valuation_agent", ticker, "Gathering line items")
         # Fetch the specific line_items that we need for valuation purposes
-        financial_line_items = search_line_items(
-            ticker=ticker,
-            line_items=[
-                "free_cash_flow",
-                "net_income",
-                "depreciation_and_amortization",
-                "capital_expenditure",
-                "working_capital",
-            ],
-            end_date=end_date,
-            period="ttm",
-            limit=2,
-        )
+        financial_line_items = search_line_items(ticker, end_date=end_date, **VALUATION_LINE_ITEMS)
 
         # Add safety check for financial line items
         if len(financial_line_items) < 2:
@@ -2,13 +2,32 @@ from graph.state import AgentState, show_agent_reasoning
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from pydantic import BaseModel
+import asyncio
 import json
 from typing_extensions import Literal
 from tools.api import get_financial_metrics, get_market_cap, search_line_items
-from utils.llm import call_llm
+from llm.prompts import encode_analysis
+from utils.llm import acall_llm_for_tickers, call_llm, call_llm_for_tickers, get_llm_batch_size
 from utils.progress import progress
 
 
+# Line items this agent reads; also declared in ANALYST_CONFIG so they can be prefetched in batches
+WARREN_BUFFETT_LINE_ITEMS = {
+    "line_items": [
+        "capital_expenditure",
+        "depreciation_and_amortization",
+        "net_income",
+        "outstanding_shares",
+        "total_assets",
+        "total_liabilities",
+        "dividends_and_other_cash_distributions",
+        "issuance_or_purchase_of_equity_shares",
+    ],
+    "period": "ttm",
+    "limit": 10,
+}
+
+
 class WarrenBuffettSignal(BaseModel):
     signal: Literal["bullish", "bearish", "neutral"]
     confidence: float
@@ -22,96 +41,45 @@ def warren_buffett_agent(state: AgentState):
     tickers = data["tickers"]
 
     # Collect all analysis for LLM reasoning
-    analysis_data = {}
-    buffett_analysis = {}
+    analysis_data = {ticker: analyze_warren_buffett_ticker(ticker, end_date) for ticker in tickers}
 
-    for ticker in tickers:
-        progress.update_status("warren_buffett_agent", ticker, "Fetching financial metrics")
-        # Fetch required data
-        metrics = get_financial_metrics(ticker, end_date, period="ttm", limit=5)
-
-        progress.update_status("warren_buffett_agent", ticker, "Gathering financial line items")
-        financial_line_items = search_line_items(
-            ticker,
-            [
-                "capital_expenditure",
-                "depreciation_and_amortization",
-                "net_income",
-                "outstanding_shares",
-                "total_assets",
-                "total_liabilities",
-                "dividends_and_other_cash_distributions",
-                "issuance_or_purchase_of_equity_shares",
-            ],
-            end_date,
-        )
+    # One call per ticker, or one per chunk of tickers when batching (see LLM_BATCH_SIZE)
+    llm_outputs = call_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
 
-        progress.update_status("warren_buffett_agent", ticker, "Getting market cap")
-        # Get current market cap
-        market_cap = get_market_cap(ticker, end_date)
-
-        progress.update_status("warren_buffett_agent", ticker, "Analyzing fundamentals")
-        # Analyze fundamentals
-        fundamental_analysis = analyze_fundamentals(metrics)
-
-        progress.update_status("warren_buffett_agent", ticker, "Analyzing consistency")
-        consistency_analysis = analyze_consistency(financial_line_items)
-
-        progress.update_status("warren_buffett_agent", ticker, "Analyzing moat")
-        moat_analysis = analyze_moat(metrics)
-
-        progress.update_status("warren_buffett_agent", ticker, "Analyzing management quality")
-        mgmt_analysis = analyze_management_quality(financial_line_items)
-
-        progress.update_status("warren_buffett_agent", ticker, "Calculating intrinsic value")
-        intrinsic_value_analysis = calculate_intrinsic_value(financial_line_items)
-
-        # Calculate total score
-        total_score = fundamental_analysis["score"] + consistency_analysis["score"] + moat_analysis["score"] + mgmt_analysis["score"]
-        max_possible_score = 10 + moat_analysis["max_score"] + mgmt_analysis["max_score"]
-        # fundamental_analysis + consistency combined were up to 10 points total
-        # moat can add up to 3, mgmt can add up to 2, for example
-
-        # Add margin of safety analysis if we have both intrinsic value and current price
-        margin_of_safety = None
-        intrinsic_value = intrinsic_value_analysis["intrinsic_value"]
-        if intrinsic_value and market_cap:
-            margin_of_safety = (intrinsic_value - market_cap) / market_cap
-
-        # Generate trading signal using a stricter margin-of-safety requirement
-        # if fundamentals+moat+management are strong but margin_of_safety < 0.3, it's neutral
-        # if fundamentals are very weak or margin_of_safety is severely negative -> bearish
-        # else bullish
-        if (total_score >= 0.7 * max_possible_score) and margin_of_safety and (margin_of_safety >= 0.3):
-            signal = "bullish"
-        elif total_score <= 0.3 * max_possible_score or (margin_of_safety is not None and margin_of_safety < -0.3):
-            # negative margin of safety beyond -30% could be overpriced -> bearish
-            signal = "bearish"
-        else:
-            signal = "neutral"
-
-        # Combine all analysis results
-        analysis_data[ticker] = {
-            "signal": signal,
-            "score": total_score,
-            "max_score": max_possible_score,
-            "fundamental_analysis": fundamental_analysis,
-            "consistency_analysis": consistency_analysis,
-            "moat_analysis": moat_analysis,
-            "management_analysis": mgmt_analysis,
-            "intrinsic_value_analysis": intrinsic_value_analysis,
-            "market_cap": market_cap,
-            "margin_of_safety": margin_of_safety,
-        }
 
+async def warren_buffett_agent_async(state: AgentState):
+    """Async variant of warren_buffett_agent: tickers are analyzed on worker threads and their LLM calls made concurrently."""
+    data = state["data"]
+    end_date = data["end_date"]
+    tickers = data["tickers"]
+
+    # Collect all analysis for LLM reasoning
+    analyses = await asyncio.gather(*(asyncio.to_thread(analyze_warren_buffett_ticker, ticker, end_date) for ticker in tickers))
+    analysis_data = dict(zip(tickers, analyses))
+
+    llm_outputs = await acall_llm_for_tickers(_llm_requests(state, analysis_data), analysis_data, get_llm_batch_size(state["metadata"]))
+    return _agent_output(state, llm_outputs)
+
+
+def _llm_requests(state: AgentState, analysis_data: dict) -> dict:
+    """Build the Warren Buffett LLM request for each analyzed ticker."""
+    llm_requests = {}
+    for ticker, analysis in analysis_data.items():
         progress.update_status("warren_buffett_agent", ticker, "Generating Warren Buffett analysis")
-        buffett_output = generate_buffett_output(
+        llm_requests[ticker] = buffett_llm_request(
             ticker=ticker,
-            analysis_data=analysis_data,
+            analysis_data=analysis,
             model_name=state["metadata"]["model_name"],
             model_provider=state["metadata"]["model_provider"],
         )
+    return llm_requests
+
 
+def _agent_output(state: AgentState, llm_outputs: dict) -> dict:
+    """Collect Warren Buffett's signals and publish them to the graph state."""
+    buffett_analysis = {}
+    for ticker, buffett_output in llm_outputs.items():
         # Store analysis in consistent format with other agents
         buffett_analysis[ticker] = {
             "signal": buffett_output.signal,
@@ -134,6 +102,74 @@ def warren_buffett_agent(state: AgentState):
     return {"messages": [message], "data": state["data"]}
 
 
+def analyze_warren_buffett_ticker(ticker: str, end_date: str) -> dict:
+    """Fetch one ticker's data and score it the way Warren Buffett would."""
+    progress.update_status("warren_buffett_agent", ticker, "Fetching financial metrics")
+    # Fetch required data
+    metrics = get_financial_metrics(ticker, end_date, period="ttm", limit=5)
+
+    progress.update_status("warren_buffett_agent", ticker, "Gathering financial line items")
+    financial_line_items = search_line_items(ticker, end_date=end_date, **WARREN_BUFFETT_LINE_ITEMS)
+
+    progress.update_status("warren_buffett_agent", ticker, "Getting market cap")
+    # Get current market cap
+    market_cap = get_market_cap(ticker, end_date)
+
+    progress.update_status("warren_buffett_agent", ticker, "Analyzing fundamentals")
+    # Analyze fundamentals
+    fundamental_analysis = analyze_fundamentals(metrics)
+
+    progress.update_status("warren_buffett_agent", ticker, "Analyzing consistency")
+    consistency_analysis = analyze_consistency(financial_line_items)
+
+    progress.update_status("warren_buffett_agent", ticker, "Analyzing moat")
+    moat_analysis = analyze_moat(metrics)
+
+    progress.update_status("warren_buffett_agent", ticker, "Analyzing management quality")
+    mgmt_analysis = analyze_management_quality(financial_line_items)
+
+    progress.update_status("warren_buffett_agent", ticker, "Calculating intrinsic value")
+    intrinsic_value_analysis = calculate_intrinsic_value(financial_line_items)
+
+    # Calculate total score
+    total_score = fundamental_analysis["score"] + consistency_analysis["score"] + moat_analysis["score"] + mgmt_analysis["score"]
+    max_possible_score = 10 + moat_analysis["max_score"] + mgmt_analysis["max_score"]
+    # fundamental_analysis + consistency combined were up to 10 points total
+    # moat can add up to 3, mgmt can add up to 2, for example
+
+    # Add margin of safety analysis if we have both intrinsic value and current price
+    margin_of_safety = None
+    intrinsic_value = intrinsic_value_analysis["intrinsic_value"]
+    if intrinsic_value and market_cap:
+        margin_of_safety = (intrinsic_value - market_cap) / market_cap
+
+    # Generate trading signal using a stricter margin-of-safety requirement
+    # if fundamentals+moat+management are strong but margin_of_safety < 0.3, it's neutral
+    # if fundamentals are very weak or margin_of_safety is severely negative -> bearish
+    # else bullish
+    if (total_score >= 0.7 * max_possible_score) and margin_of_safety and (margin_of_safety >= 0.3):
+        signal = "bullish"
+    elif total_score <= 0.3 * max_possible_score or (margin_of_safety is not None and margin_of_safety < -0.3):
+        # negative margin of safety beyond -30% could be overpriced -> bearish
+        signal = "bearish"
+    else:
+        signal = "neutral"
+
+    # Combine all analysis results
+    return {
+        "signal": signal,
+        "score": total_score,
+        "max_score": max_possible_score,
+        "fundamental_analysis": fundamental_analysis,
+        "consistency_analysis": consistency_analysis,
+        "moat_analysis": moat_analysis,
+        "management_analysis": mgmt_analysis,
+        "intrinsic_value_analysis": intrinsic_value_analysis,
+        "market_cap": market_cap,
+        "margin_of_safety": margin_of_safety,
+    }
+
+
 def analyze_fundamentals(metrics: list) -> dict[str, any]:
     """Analyze company fundamentals based on Buffett's criteria."""
     if not metrics:
@@ -382,13 +418,13 @@ def calculate_intrinsic_value(financial_line_items: list) -> dict[str, any]:
     }
 
 
-def generate_buffett_output(
+def buffett_llm_request(
     ticker: str,
     analysis_data: dict[str, any],
     model_name: str,
     model_provider: str,
-) -> WarrenBuffettSignal:
-    """Get investment decision from LLM with Buffett's principles"""
+) -> dict:
+    """Build the call_llm arguments for Warren Buffett's decision on a ticker."""
     template = ChatPromptTemplate.from_messages(
         [
             (
@@ -433,13 +469,13 @@ def generate_buffett_output(
         ]
     )
 
-    prompt = template.invoke({"analysis_data": json.dumps(analysis_data, indent=2), "ticker": ticker})
+    prompt = template.invoke({"analysis_data": encode_analysis(analysis_data), "ticker": ticker})
 
     # Default fallback signal in case parsing fails
     def create_default_warren_buffett_signal():
         return WarrenBuffettSignal(signal="neutral", confidence=0.0, reasoning="Error in analysis, defaulting to neutral")
 
-    return call_llm(
+    return dict(
         prompt=prompt,
         model_name=model_name,
         model_provider=model_provider,
@@ -447,3 +483,13 @@ def generate_buffett_output(
         agent_name="warren_buffett_agent",
         default_factory=create_default_warren_buffett_signal,
     )
+
+
+def generate_buffett_output(
+    ticker: str,
+    analysis_data: dict[str, any],
+    model_name: str,
+    model_provider: str,
+) -> WarrenBuffettSignal:
+    """Get investment decision from LLM with Buffett's principles"""
+    return call_llm(**buffett_llm_request(ticker=ticker, analysis_data=analysis_data, model_name=model_name, model_provider=model_provider))
@@ -1,5 +1,10 @@
 import sys
 
+from dotenv import load_dotenv
+
+# Load .env before importing main and the data layer, whose settings are read at import time
+load_dotenv()
+
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 import questionary
@@ -13,14 +18,10 @@ import itertools
 from llm.models import LLM_ORDER, get_model_info
 from utils.analysts import ANALYST_ORDER
 from main import run_hedge_fund
-from tools.api import (
-    get_company_news,
-    get_price_data,
-    get_prices,
-    get_financial_metrics,
-    get_insider_trades,
-)
-from utils.display import print_backtest_results, format_backtest_row
+from tools.api import get_price_data
+from utils.data_planner import prefetch_analyst_data
+from utils.display import print_backtest_results, format_backtest_row, print_prompt_token_stats
+from llm.prompts import merge_prompt_token_stats
 from typing_extensions import Callable
 
 init(autoreset=True)
@@ -270,26 +271,13 @@ class Backtester:
         return total_value
 
     def prefetch_data(self):
-        """Pre-fetch all data needed for the backtest period."""
+        """Pre-fetch all data the selected analysts need for the backtest period."""
         print("\nPre-fetching data for the entire backtest period...")
 
-        # Convert end_date string to datetime, fetch up to 1 year before
-        end_date_dt = datetime.strptime(self.end_date, "%Y-%m-%d")
-        start_date_dt = end_date_dt - relativedelta(years=1)
-        start_date_str = start_date_dt.strftime("%Y-%m-%d")
-
-        for ticker in self.tickers:
-            # Fetch price data for the entire period, plus 1 year
-            get_prices(ticker, start_date_str, self.end_date)
-
-            # Fetch financial metrics
-            get_financial_metrics(ticker, self.end_date, limit=10)
-
-            # Fetch insider trades
-            get_insider_trades(ticker, self.end_date, start_date=self.start_date, limit=1000)
-
-            # Fetch company news
-            get_company_news(ticker, self.end_date, start_date=self.start_date, limit=1000)
+        # Each trading day runs the agents from 30 days before it (see run_backtest), so the first day's
+        # window starts the plan and insider/news lookbacks are anchored there too
+        lookback_start = (datetime.strptime(self.start_date, "%Y-%m-%d") - timedelta(days=30)).strftime("%Y-%m-%d")
+        prefetch_analyst_data(self.selected_analysts, self.tickers, lookback_start, self.end_date)
 
         print("Data pre-fetch complete.")
 
@@ -310,6 +298,8 @@ class Backtester:
 
         dates = pd.date_range(self.start_date, self.end_date, freq="B")
         table_rows = []
+        # Prompt tokens sent by each agent over the whole backtest
+        self.prompt_token_stats = {}
         performance_metrics = {
             'sharpe_ratio': None,
             'sortino_ratio': None,
@@ -374,9 +364,12 @@ class Backtester:
                 model_name=self.model_name,
                 model_provider=self.model_provider,
                 selected_analysts=self.selected_analysts,
+                # Already fetched for the whole backtest in prefetch_data
+                prefetch=False,
             )
             decisions = output["decisions"]
             analyst_signals = output["analyst_signals"]
+            merge_prompt_token_stats(self.prompt_token_stats, output.get("prompt_token_stats", {}))
 
             # Execute trades for each ticker
             executed_trades = {}
@@ -502,6 +495,7 @@ class Backtester:
 
         # Store the final performance metrics for reference in analyze_performance
         self.performance_metrics = performance_metrics
+        print_prompt_token_stats(self.prompt_token_stats)
         return performance_metrics
 
     def _update_performance_metrics(self, performance_metrics):
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the persistence and LLM layers. Run them from src/, e.g.:
+
+    cd src && poetry run python -m benchmarks.bulk_writes
+"""
@@ -0,0 +1,84 @@
+"""
+Throughput of the sync repositories on a thread pool against the async repositories on one
+event loop, at several levels of concurrency. Each operation reads a year of daily prices for a
+ticker and, unless --read-only, records an analysis result in its own commit.
+
+    cd src && poetry run python -m benchmarks.async_repositories --ops 2000 [--url postgresql://...]
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.bulk_writes import price_items
+from benchmarks.common import fresh_engine, timed
+from database.models import AnalysisResult, SignalType
+from database.repositories import AnalysisResultRepository, AsyncAnalysisResultRepository, AsyncPriceObservationRepository, PriceObservationRepository
+from database.session import to_async_url
+
+TICKERS = [f"T{i:02d}" for i in range(20)]
+
+
+def _result(i: int) -> dict:
+    return {"analysis_request_id": 1, "analyst_name": "benchmark", "ticker": TICKERS[i % len(TICKERS)], "signal": SignalType.NEUTRAL, "confidence": 50.0}
+
+
+def run_sync(Session, ops: int, concurrency: int, writes: bool):
+    def worker(indexes: range):
+        with Session() as db:
+            prices, results = PriceObservationRepository(db), AnalysisResultRepository(AnalysisResult, db)
+            for i in indexes:
+                prices.get_dicts(TICKERS[i % len(TICKERS)], "2000-01-01", "2000-12-31")
+                if writes:
+                    results.create(_result(i))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, [range(start, ops, concurrency) for start in range(concurrency)]))
+
+
+async def run_async(AsyncSession, ops: int, concurrency: int, writes: bool):
+    async def worker(indexes: range):
+        async with AsyncSession() as db:
+            prices, results = AsyncPriceObservationRepository(db), AsyncAnalysisResultRepository(db)
+            for i in indexes:
+                await prices.get_dicts(TICKERS[i % len(TICKERS)], "2000-01-01", "2000-12-31")
+                if writes:
+                    await results.create(_result(i))
+
+    await asyncio.gather(*(worker(range(start, ops, concurrency)) for start in range(concurrency)))
+
+
+def main(ops: int, url: str | None, levels: list[int], writes: bool):
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    engine = fresh_engine(url)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        repo = PriceObservationRepository(db)
+        for ticker in TICKERS:
+            repo.insert_new(ticker, price_items(730))
+    async_engine = create_async_engine(to_async_url(engine.url.render_as_string(hide_password=False)))
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    print(f"{'concurrency':>11} {'sync ops/s':>11} {'async ops/s':>12}")
+    for concurrency in levels:
+        sync_seconds = timed(lambda: run_sync(Session, ops, concurrency, writes))
+        async_seconds = timed(lambda: asyncio.run(run_async(AsyncSession, ops, concurrency, writes)))
+        print(f"{concurrency:>11} {ops / sync_seconds:>11,.0f} {ops / async_seconds:>12,.0f}")
+
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=2000, help="Operations per run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32], help="Concurrent workers or tasks")
+    parser.add_argument("--read-only", action="store_true", help="Only read prices, without writing results")
+    parser.add_argument("--url", help="Database URL to benchmark against (default: a fresh SQLite file). Its tables are dropped!")
+    args = parser.parse_args()
+    print(f"{datetime.now():%Y-%m-%d %H:%M} sync vs async repositories, {'reads' if args.read_only else 'reads and writes'}, {args.url or 'SQLite file'}")
+    main(args.ops, args.url, args.concurrency, not args.read_only)
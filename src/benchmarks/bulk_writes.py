@@ -0,0 +1,80 @@
+"""
+Rows/sec for repository writes: one create() per row (add, commit, refresh) against
+bulk_create, and per-row merges against bulk_upsert for market data observations.
+
+    cd src && poetry run python -m benchmarks.bulk_writes --rows 5000 [--url postgresql://...]
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import fresh_engine, print_table, timed
+from database.models import AnalysisResult, PriceObservation, SignalType
+from database.repositories import AnalysisResultRepository, PriceObservationRepository, unit_of_work
+
+
+def result_rows(count: int) -> list[dict]:
+    return [
+        {"analysis_request_id": 1, "analyst_name": f"analyst_{i % 13}", "ticker": f"T{i % 50}", "signal": SignalType.BULLISH, "confidence": 50.0, "reasoning": "benchmark"}
+        for i in range(count)
+    ]
+
+
+def price_items(count: int, close: float = 10.0) -> list[dict]:
+    start = date(2000, 1, 1)
+    return [
+        {"open": close, "close": close, "high": close, "low": close, "volume": 1000, "time": f"{(start + timedelta(days=i)).isoformat()}T00:00:00Z"}
+        for i in range(count)
+    ]
+
+
+def run(rows: int, url: str | None) -> list[tuple[str, int, float]]:
+    engine = fresh_engine(url)
+    Session = sessionmaker(bind=engine)
+    results = []
+    # A commit per row costs a sync to disk each, so the per-row baselines write fewer rows
+    per_row = min(rows, 1000)
+
+    with Session() as db:
+        repo = AnalysisResultRepository(AnalysisResult, db)
+        results.append(("analysis results: create() per row", per_row, timed(lambda: [repo.create(row) for row in result_rows(per_row)])))
+        results.append(("analysis results: bulk_create", rows, timed(lambda: repo.bulk_create(result_rows(rows)))))
+
+    with Session() as db:
+        repo = PriceObservationRepository(db)
+        items = price_items(rows)
+
+        def merge_per_row():
+            for item in items[:per_row]:
+                db.merge(PriceObservation(**repo.to_row("PER_ROW", item)))
+                db.commit()
+
+        results.append(("prices: merge + commit per row", per_row, timed(merge_per_row)))
+        results.append(("prices: insert_new (new rows)", rows, timed(lambda: repo.insert_new("BULK", items))))
+        # Every row conflicts: stored rows are left as they are
+        results.append(("prices: insert_new (all stored)", rows, timed(lambda: repo.insert_new("BULK", items))))
+        # Every row conflicts and is overwritten
+        updated = [repo.to_row("BULK", item) for item in price_items(rows, close=11.0)]
+        results.append(("prices: bulk_upsert (all updated)", rows, timed(lambda: repo.bulk_upsert(updated))))
+
+        def upsert_in_unit_of_work():
+            # A backtest's worth of writes, 50 tickers, committed once
+            with unit_of_work(db):
+                for ticker in range(50):
+                    repo.insert_new(f"UOW{ticker}", items[: rows // 50])
+
+        results.append(("prices: 50 tickers in one unit of work", rows // 50 * 50, timed(upsert_in_unit_of_work)))
+
+    engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="Rows written per case")
+    parser.add_argument("--url", help="Database URL to benchmark against (default: a fresh SQLite file). Its tables are dropped!")
+    args = parser.parse_args()
+    print(f"{datetime.now():%Y-%m-%d %H:%M} bulk writes, {args.url or 'SQLite file'}")
+    print_table(run(args.rows, args.url))
@@ -0,0 +1,36 @@
+import os
+import tempfile
+import time
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+
+def timed(fn: Callable[[], object]) -> float:
+    """Run fn once and return the elapsed wall-clock seconds."""
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def fresh_engine(url: str | None) -> "Engine":
+    """An engine on the given database, or on a new SQLite file, with every table created empty."""
+    # Imported here so benchmarks that don't touch the database don't need its driver
+    from sqlalchemy import create_engine
+
+    from database.models import Base
+
+    if url is None:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench-'), 'bench.db')}"
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def print_table(rows: list[tuple[str, int, float]]):
+    """Print (case, rows, seconds) results with rows/sec."""
+    print(f"{'case':<40} {'rows':>8} {'seconds':>9} {'rows/sec':>10}")
+    for case, count, seconds in rows:
+        print(f"{case:<40} {count:>8} {seconds:>9.3f} {count / seconds:>10,.0f}")
@@ -0,0 +1,57 @@
+"""
+Per-call client overhead of call_llm before and after the client registry: building a client
+and its structured-output wrapper on every call (get_model) against reusing the registered one
+(get_cached_model). No requests are sent; only client construction is timed.
+
+    cd src && poetry run python -m benchmarks.model_registry --tickers 10 [--model gpt-4o --provider OpenAI]
+"""
+
+import argparse
+import os
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from benchmarks.common import timed
+from llm.models import ModelProvider, clear_model_registry, get_cached_model, get_model
+
+# One LLM call per analyst and ticker, as in a full run
+ANALYSTS = 13
+
+# Clients are only constructed, so any non-empty key will do
+_PLACEHOLDER_KEYS = ("OPENAI_API_KEY", "ANTHROPIC_API_KEY", "GROQ_API_KEY", "DEEPSEEK_API_KEY", "GOOGLE_API_KEY")
+
+
+class Signal(BaseModel):
+    signal: str
+    confidence: float
+    reasoning: str
+
+
+def build_per_call(model_name: str, provider: ModelProvider):
+    return get_model(model_name, provider).with_structured_output(Signal, method="json_mode")
+
+
+def main(tickers: int, model_name: str, provider: ModelProvider):
+    for key in _PLACEHOLDER_KEYS:
+        os.environ.setdefault(key, "benchmark")
+    calls = ANALYSTS * tickers
+
+    per_call = timed(lambda: [build_per_call(model_name, provider) for _ in range(calls)])
+    clear_model_registry()
+    registry = timed(lambda: [get_cached_model(model_name, provider, Signal) for _ in range(calls)])
+
+    print(f"{calls} calls ({ANALYSTS} analysts x {tickers} tickers), {provider.value} {model_name}")
+    print(f"{'client per call':<20} {per_call:>8.3f}s {per_call / calls * 1e3:>9.3f} ms/call")
+    print(f"{'registry':<20} {registry:>8.3f}s {registry / calls * 1e3:>9.3f} ms/call")
+    print(f"overhead removed: {(per_call - registry) / calls * 1e3:.3f} ms/call")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", type=int, default=10, help="Tickers per run")
+    parser.add_argument("--model", default="gpt-4o", help="Model name")
+    parser.add_argument("--provider", default=ModelProvider.OPENAI.value, choices=[provider.value for provider in ModelProvider], help="Model provider")
+    args = parser.parse_args()
+    print(f"{datetime.now():%Y-%m-%d %H:%M} LLM client registry")
+    main(args.tickers, args.model, ModelProvider(args.provider))
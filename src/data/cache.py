@@ -1,65 +1,187 @@
-class Cache:
-    """In-memory cache for API responses."""
+import threading
+
+import numpy as np
 
-    def __init__(self):
-        self._prices_cache: dict[str, list[dict[str, any]]] = {}
-        self._financial_metrics_cache: dict[str, list[dict[str, any]]] = {}
-        self._line_items_cache: dict[str, list[dict[str, any]]] = {}
-        self._insider_trades_cache: dict[str, list[dict[str, any]]] = {}
-        self._company_news_cache: dict[str, list[dict[str, any]]] = {}
+from data.intervals import IntervalSet
+from data.lru_cache import LRUCache, default_cache_max_bytes
+from data.models import CompanyNews, FinancialMetrics, InsiderTrade
+from data.price_store import PriceStore, columns_to_rows
+from data.sorted_records import SortedRecords
 
-    def _merge_data(self, existing: list[dict] | None, new_data: list[dict], key_field: str) -> list[dict]:
-        """Merge existing and new data, avoiding duplicates based on a key field."""
-        if not existing:
-            return new_data
+# How each record type is validated, ordered and de-duplicated in the sorted cache
+_RECORD_TYPES = {
+    "financial_metrics": (FinancialMetrics, lambda m: m.report_period, lambda m: (m.report_period, m.period)),
+    # Several trades and articles can share a date, so they are told apart by their full identity
+    "insider_trades": (
+        InsiderTrade,
+        lambda t: t.transaction_date or t.filing_date,
+        lambda t: (t.filing_date, t.transaction_date, t.name, t.security_title, t.transaction_shares, t.transaction_price_per_share),
+    ),
+    "company_news": (CompanyNews, lambda n: n.date, lambda n: (n.date, n.url, n.title)),
+}
 
-        # Create a set of existing keys for O(1) lookup
-        existing_keys = {item[key_field] for item in existing}
 
-        # Only add items that don't exist yet
-        merged = existing.copy()
-        merged.extend([item for item in new_data if item[key_field] not in existing_keys])
-        return merged
+class Cache:
+    """
+    In-memory cache for API responses, with prices kept in a persistent columnar store.
+    Each data type is held in a byte-budgeted LRU cache; evicting a ticker also forgets its coverage.
+    The sorted records, coverage and line-item bookkeeping are shared by the agents' threads, so they are
+    read and changed under one lock.
+    """
+
+    def __init__(self, price_store: PriceStore | None = None, max_bytes: int | None = None):
+        max_bytes = max_bytes or default_cache_max_bytes()
+        self._price_store = price_store or PriceStore(max_bytes=max_bytes)
+        self._line_items_cache = LRUCache(max_bytes, on_evict=lambda ticker, _: self._forget_line_items(ticker))
+        # Validated models kept sorted by date, keyed by data type then ticker
+        self._records: dict[str, LRUCache] = {data_type: LRUCache(max_bytes, on_evict=self._forget_coverage(data_type)) for data_type in _RECORD_TYPES}
+        # Line-item fields already fetched, keyed by (ticker, period, report_period)
+        self._line_item_fields: dict[tuple[str, str, str], set[str]] = {}
+        # Date intervals already fetched from the API, keyed by (data_type, ticker)
+        self._coverage: dict[tuple[str, str], IntervalSet] = {}
+        # Reentrant: eviction callbacks run inside the LRU set() calls made while it is held
+        self._lock = threading.RLock()
+
+    def _forget_coverage(self, data_type: str):
+        """Build an eviction callback that drops the evicted ticker's coverage, so its data is fetched again."""
+        return lambda ticker, _: self._coverage.pop((data_type, ticker), None)
+
+    def _forget_line_items(self, ticker: str):
+        for key in [key for key in self._line_item_fields if key[0] == ticker]:
+            del self._line_item_fields[key]
+        for key in [key for key in self._coverage if key[1] == ticker and key[0].startswith("line_items_")]:
+            del self._coverage[key]
+
+    def _sorted(self, data_type: str, ticker: str) -> SortedRecords | None:
+        """Get the sorted records cached for a ticker and data type."""
+        return self._records[data_type].get(ticker)
+
+    def _add_records(self, data_type: str, ticker: str, data: list):
+        """Validate new rows once and insert them into the sorted records for a ticker."""
+        model, sort_key, unique_key = _RECORD_TYPES[data_type]
+        validated = [model.model_validate(item) for item in data]
+        with self._lock:
+            records = self._records[data_type].peek(ticker) or SortedRecords(sort_key, unique_key)
+            records.add(validated)
+            # Re-insert so the entry is re-measured against the budget
+            self._records[data_type].set(ticker, records)
+
+    def _range(self, data_type: str, ticker: str, start_date: str | None, end_date: str | None) -> list:
+        """Get a ticker's cached records in the inclusive date range, newest first."""
+        records = self._sorted(data_type, ticker)
+        if not records:
+            return []
+        with self._lock:
+            return records.range(start_date, end_date, newest_first=True)
+
+    def _dump_records(self, data_type: str, ticker: str) -> list[dict[str, any]] | None:
+        records = self._sorted(data_type, ticker)
+        if not records:
+            return None
+        with self._lock:
+            records = list(records)
+        return [record.model_dump() for record in records]
+
+    def get_coverage(self, data_type: str, ticker: str) -> IntervalSet:
+        """Get the date intervals already fetched for a ticker and data type."""
+        key = (data_type, ticker)
+        with self._lock:
+            if key not in self._coverage:
+                # Price coverage is persisted next to the price columns
+                self._coverage[key] = IntervalSet(self._price_store.load_coverage(ticker) if data_type == "prices" else None)
+            return self._coverage[key]
+
+    def add_coverage(self, data_type: str, ticker: str, start_date: str, end_date: str):
+        """Record that a date interval has been fully fetched for a ticker and data type."""
+        with self._lock:
+            coverage = self.get_coverage(data_type, ticker)
+            coverage.add(start_date, end_date)
+            # Saved under the lock so an older interval list can never replace a newer one
+            if data_type == "prices":
+                self._price_store.save_coverage(ticker, coverage.to_list())
 
     def get_prices(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached price data if available."""
-        return self._prices_cache.get(ticker)
+        columns = self._price_store.load(ticker)
+        if columns is None:
+            return None
+        return columns_to_rows(columns)
+
+    def get_price_columns(self, ticker: str, start_date: str, end_date: str) -> dict[str, np.ndarray] | None:
+        """Get cached prices in the inclusive date range as contiguous column slices."""
+        return self._price_store.read(ticker, start_date, end_date)
 
     def set_prices(self, ticker: str, data: list[dict[str, any]]):
-        """Append new price data to cache."""
-        self._prices_cache[ticker] = self._merge_data(self._prices_cache.get(ticker), data, key_field="time")
+        """Append new price data to the price store."""
+        self._price_store.append(ticker, data)
 
     def get_financial_metrics(self, ticker: str) -> list[dict[str, any]]:
         """Get cached financial metrics if available."""
-        return self._financial_metrics_cache.get(ticker)
+        return self._dump_records("financial_metrics", ticker)
+
+    def find_financial_metrics(self, ticker: str, end_date: str, period: str, limit: int) -> list[FinancialMetrics]:
+        """Get the newest cached financial metrics for a period reported on or before end_date."""
+        return [metric for metric in self._range("financial_metrics", ticker, None, end_date) if metric.period == period][:limit]
 
-    def set_financial_metrics(self, ticker: str, data: list[dict[str, any]]):
+    def set_financial_metrics(self, ticker: str, data: list[dict[str, any] | FinancialMetrics]):
         """Append new financial metrics to cache."""
-        self._financial_metrics_cache[ticker] = self._merge_data(self._financial_metrics_cache.get(ticker), data, key_field="report_period")
+        self._add_records("financial_metrics", ticker, data)
 
     def get_line_items(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached line items if available."""
         return self._line_items_cache.get(ticker)
 
     def set_line_items(self, ticker: str, data: list[dict[str, any]]):
-        """Append new line items to cache."""
-        self._line_items_cache[ticker] = self._merge_data(self._line_items_cache.get(ticker), data, key_field="report_period")
+        """Merge new line items into cache, keeping the union of fields seen per (period, report_period)."""
+        with self._lock:
+            rows = {(item["period"], item["report_period"]): item for item in self._line_items_cache.peek(ticker) or []}
+            for item in data:
+                key = (item["period"], item["report_period"])
+                rows[key] = {**rows[key], **item} if key in rows else dict(item)
+            self._line_items_cache.set(ticker, list(rows.values()))
+
+    def get_line_item_fields(self, ticker: str, period: str, report_period: str) -> set[str]:
+        """Get the line-item fields already fetched for a report period."""
+        with self._lock:
+            return set(self._line_item_fields.get((ticker, period, report_period), ()))
+
+    def add_line_item_fields(self, ticker: str, period: str, report_periods: list[str], fields: set[str]):
+        """Record that the given fields have been fetched for these report periods."""
+        with self._lock:
+            for report_period in report_periods:
+                self._line_item_fields.setdefault((ticker, period, report_period), set()).update(fields)
 
     def get_insider_trades(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached insider trades if available."""
-        return self._insider_trades_cache.get(ticker)
+        return self._dump_records("insider_trades", ticker)
 
-    def set_insider_trades(self, ticker: str, data: list[dict[str, any]]):
+    def find_insider_trades(self, ticker: str, start_date: str | None, end_date: str) -> list[InsiderTrade]:
+        """Get cached insider trades in the date range, newest first."""
+        return self._range("insider_trades", ticker, start_date, end_date)
+
+    def set_insider_trades(self, ticker: str, data: list[dict[str, any] | InsiderTrade]):
         """Append new insider trades to cache."""
-        self._insider_trades_cache[ticker] = self._merge_data(self._insider_trades_cache.get(ticker), data, key_field="filing_date")  # Could also use transaction_date if preferred
+        self._add_records("insider_trades", ticker, data)
 
     def get_company_news(self, ticker: str) -> list[dict[str, any]] | None:
         """Get cached company news if available."""
-        return self._company_news_cache.get(ticker)
+        return self._dump_records("company_news", ticker)
+
+    def find_company_news(self, ticker: str, start_date: str | None, end_date: str) -> list[CompanyNews]:
+        """Get cached company news in the date range, newest first."""
+        return self._range("company_news", ticker, start_date, end_date)
 
-    def set_company_news(self, ticker: str, data: list[dict[str, any]]):
+    def set_company_news(self, ticker: str, data: list[dict[str, any] | CompanyNews]):
         """Append new company news to cache."""
-        self._company_news_cache[ticker] = self._merge_data(self._company_news_cache.get(ticker), data, key_field="date")
+        self._add_records("company_news", ticker, data)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Get hit/miss/eviction counts and memory use per data type."""
+        return {
+            "prices": self._price_store.stats(),
+            "line_items": self._line_items_cache.stats(),
+            **{data_type: records.stats() for data_type, records in self._records.items()},
+        }
 
 
 # Global cache instance
@@ -69,3 +191,10 @@ _cache = Cache()
 def get_cache() -> Cache:
     """Get the global cache instance."""
     return _cache
+
+
+def set_cache(cache: Cache) -> Cache:
+    """Replace the global cache instance (e.g. with a database-backed tiered cache). Returns the previous one."""
+    global _cache
+    previous, _cache = _cache, cache
+    return previous
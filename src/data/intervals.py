@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+
+def _to_date(value: str) -> date:
+    return date.fromisoformat(value[:10])
+
+
+class IntervalSet:
+    """Sorted set of disjoint, inclusive date intervals (YYYY-MM-DD strings)."""
+
+    def __init__(self, intervals: list[tuple[str, str]] | None = None):
+        self._intervals: list[tuple[date, date]] = []
+        for start, end in intervals or []:
+            self.add(start, end)
+
+    def __bool__(self) -> bool:
+        return bool(self._intervals)
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def add(self, start_date: str, end_date: str):
+        """Add an interval, merging it with any overlapping or adjacent intervals."""
+        start, end = _to_date(start_date), _to_date(end_date)
+        if start > end:
+            return
+
+        merged = []
+        for current_start, current_end in self._intervals:
+            # Disjoint and not touching: keep as is
+            if current_end + timedelta(days=1) < start or end + timedelta(days=1) < current_start:
+                merged.append((current_start, current_end))
+            else:
+                start, end = min(start, current_start), max(end, current_end)
+        merged.append((start, end))
+        merged.sort()
+        self._intervals = merged
+
+    def contains(self, start_date: str, end_date: str) -> bool:
+        """Whether the whole inclusive range is covered."""
+        return not self.gaps(start_date, end_date)
+
+    def gaps(self, start_date: str, end_date: str) -> list[tuple[str, str]]:
+        """Return the uncovered sub-ranges of the inclusive range, in order."""
+        start, end = _to_date(start_date), _to_date(end_date)
+        gaps = []
+        cursor = start
+        for current_start, current_end in self._intervals:
+            if current_end < cursor:
+                continue
+            if current_start > end:
+                break
+            if current_start > cursor:
+                gaps.append((cursor, current_start - timedelta(days=1)))
+            cursor = max(cursor, current_end + timedelta(days=1))
+            if cursor > end:
+                break
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return [(gap_start.isoformat(), gap_end.isoformat()) for gap_start, gap_end in gaps]
+
+    def find(self, value: str) -> tuple[str, str] | None:
+        """Return the interval containing a date, if any."""
+        target = _to_date(value)
+        for start, end in self._intervals:
+            if start <= target <= end:
+                return start.isoformat(), end.isoformat()
+            if start > target:
+                break
+        return None
+
+    def to_list(self) -> list[tuple[str, str]]:
+        """Return the intervals as (start, end) string tuples."""
+        return [(start.isoformat(), end.isoformat()) for start, end in self._intervals]
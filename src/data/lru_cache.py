@@ -0,0 +1,114 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+from pydantic import BaseModel
+
+from data.sorted_records import SortedRecords
+
+# Containers larger than this are sized from a sample of their items
+_SAMPLE_SIZE = 16
+
+
+def default_cache_max_bytes() -> int:
+    """Resolve the per-data-type memory budget from the environment."""
+    return int(float(os.environ.get("CACHE_MAX_MB") or 256) * 1024 * 1024)
+
+
+def estimate_size(obj: any) -> int:
+    """Estimate the memory footprint of an object in bytes, sampling large containers."""
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, BaseModel):
+        return sys.getsizeof(obj) + estimate_size(obj.__dict__) + estimate_size(obj.__pydantic_extra__ or {})
+    if isinstance(obj, dict):
+        if not obj:
+            return sys.getsizeof(obj)
+        items = list(obj.items())
+        sample = items[:_SAMPLE_SIZE]
+        per_item = sum(estimate_size(key) + estimate_size(value) for key, value in sample) / len(sample)
+        return sys.getsizeof(obj) + int(per_item * len(items))
+    if isinstance(obj, (list, tuple, set, frozenset, SortedRecords)):
+        items = list(obj)
+        if not items:
+            return sys.getsizeof(obj)
+        sample = items[:: max(1, len(items) // _SAMPLE_SIZE)][:_SAMPLE_SIZE]
+        per_item = sum(estimate_size(item) for item in sample) / len(sample)
+        return sys.getsizeof(obj) + int(per_item * len(items))
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    """Byte-budgeted mapping that evicts least recently used entries, with hit/miss/eviction statistics."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        sizeof: Callable[[any], int] = estimate_size,
+        on_evict: Callable[[any, any], None] | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._on_evict = on_evict
+        self._entries: OrderedDict[any, tuple[any, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __contains__(self, key: any) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: any, default: any = None) -> any:
+        """Get a value and mark it as most recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            self._stats["hits"] += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: any, value: any):
+        """Insert or replace a value (re-measuring its size), then evict down to the byte budget."""
+        evicted = []
+        with self._lock:
+            size = self._sizeof(value)
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            # The entry just written is kept even if it alone exceeds the budget
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                evicted_key, (evicted_value, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats["evictions"] += 1
+                evicted.append((evicted_key, evicted_value))
+        if self._on_evict:
+            for evicted_key, evicted_value in evicted:
+                self._on_evict(evicted_key, evicted_value)
+
+    def peek(self, key: any, default: any = None) -> any:
+        """Get a value without touching recency or statistics."""
+        entry = self._entries.get(key)
+        return default if entry is None else entry[0]
+
+    def pop(self, key: any, default: any = None) -> any:
+        """Remove a value without counting it as an eviction."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return default
+            self._bytes -= entry[1]
+            return entry[0]
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss/eviction counts and current size."""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes}
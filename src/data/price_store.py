@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from data.lru_cache import LRUCache, default_cache_max_bytes
+
+# Column layout of the on-disk store. "date" is derived from "time" and is the
+# column range queries are resolved against.
+PRICE_COLUMNS = ("date", "time", "open", "close", "high", "low", "volume")
+
+
+def default_price_store_dir() -> str:
+    """Resolve the price store directory from the environment."""
+    return os.environ.get("PRICE_STORE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "ai-hedge-fund", "prices")
+
+
+def _unique_last(times: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Sorted unique timestamps and, for each, the index of its last occurrence."""
+    unique_times, reversed_index = np.unique(times[::-1], return_index=True)
+    return unique_times, len(times) - 1 - reversed_index
+
+
+def _tmp_path(path: str) -> str:
+    """A temporary file next to path that no other process or thread writes to."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def rows_to_columns(rows: list[dict[str, any]]) -> dict[str, np.ndarray]:
+    """Convert price rows (dicts) into sorted, de-duplicated column arrays."""
+    if not rows:
+        return empty_columns()
+
+    times = np.array([row["time"] for row in rows], dtype=str)
+    # A timestamp given twice keeps its last row, e.g. a refreshed bar for the current day
+    times, last_index = _unique_last(times)
+    columns = {
+        "date": times.astype("U10").astype("datetime64[D]"),
+        "time": times,
+    }
+    for name in ("open", "close", "high", "low"):
+        columns[name] = np.array([rows[i][name] for i in last_index], dtype=np.float64)
+    columns["volume"] = np.array([rows[i]["volume"] for i in last_index], dtype=np.int64)
+    return columns
+
+
+def columns_to_rows(columns: dict[str, np.ndarray]) -> list[dict[str, any]]:
+    """Convert column arrays back into price rows (dicts)."""
+    return [
+        {"open": float(o), "close": float(c), "high": float(h), "low": float(l), "volume": int(v), "time": str(t)}
+        for o, c, h, l, v, t in zip(columns["open"], columns["close"], columns["high"], columns["low"], columns["volume"], columns["time"])
+    ]
+
+
+def empty_columns() -> dict[str, np.ndarray]:
+    """Return an empty set of price columns."""
+    return {
+        "date": np.array([], dtype="datetime64[D]"),
+        "time": np.array([], dtype="U1"),
+        "open": np.array([], dtype=np.float64),
+        "close": np.array([], dtype=np.float64),
+        "high": np.array([], dtype=np.float64),
+        "low": np.array([], dtype=np.float64),
+        "volume": np.array([], dtype=np.int64),
+    }
+
+
+def slice_columns(columns: dict[str, np.ndarray], start_date: str, end_date: str) -> dict[str, np.ndarray]:
+    """Slice date-sorted columns to the inclusive [start_date, end_date] range."""
+    dates = columns["date"]
+    lo = np.searchsorted(dates, np.datetime64(start_date, "D"), side="left")
+    hi = np.searchsorted(dates, np.datetime64(end_date, "D"), side="right")
+    return {name: array[lo:hi] for name, array in columns.items()}
+
+
+def merge_columns(existing: dict[str, np.ndarray], new: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Merge two column sets, taking the new rows when timestamps collide: the current day's bar
+    is fetched again until the day is over, and the refreshed values must replace the partial ones.
+    """
+    if not len(existing["time"]):
+        return new
+    if not len(new["time"]):
+        return existing
+
+    times = np.concatenate([np.asarray(existing["time"]), np.asarray(new["time"])])
+    times, last_index = _unique_last(times)
+    merged = {"time": times}
+    for name in PRICE_COLUMNS:
+        if name != "time":
+            merged[name] = np.concatenate([np.asarray(existing[name]), np.asarray(new[name])])[last_index]
+    return merged
+
+
+class PriceStore:
+    """Persistent columnar price store, one directory of memory-mapped .npy columns per ticker."""
+
+    def __init__(self, root: str | None = None, max_bytes: int | None = None):
+        self.root = root or default_price_store_dir()
+        self._lock = threading.Lock()
+        # Loaded columns per ticker; evicted ones are simply re-mapped from disk on next use
+        self._loaded = LRUCache(max_bytes or default_cache_max_bytes(), sizeof=lambda columns: sum(array.nbytes for array in columns.values()))
+
+    def _ticker_dir(self, ticker: str) -> str:
+        return os.path.join(self.root, ticker.upper())
+
+    def load(self, ticker: str) -> dict[str, np.ndarray] | None:
+        """Load (memory-map) every column for a ticker, or None if nothing is stored."""
+        if (columns := self._loaded.get(ticker)) is not None:
+            return columns
+
+        ticker_dir = self._ticker_dir(ticker)
+        try:
+            columns = {name: np.load(os.path.join(ticker_dir, f"{name}.npy"), mmap_mode="r") for name in PRICE_COLUMNS}
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+        # A concurrent writer may have replaced some columns but not others yet
+        if len({len(array) for array in columns.values()}) != 1:
+            return None
+
+        self._loaded.set(ticker, columns)
+        return columns
+
+    def read(self, ticker: str, start_date: str, end_date: str) -> dict[str, np.ndarray] | None:
+        """Return contiguous column slices for the inclusive date range."""
+        columns = self.load(ticker)
+        if columns is None:
+            return None
+        return slice_columns(columns, start_date, end_date)
+
+    def append(self, ticker: str, rows: list[dict[str, any]]):
+        """Merge new price rows into the stored columns and persist them."""
+        new_columns = rows_to_columns(rows)
+        if not len(new_columns["time"]):
+            return
+
+        with self._lock:
+            existing = self.load(ticker)
+            merged = merge_columns(existing, new_columns) if existing is not None else new_columns
+            self._write(ticker, merged)
+
+    def _write(self, ticker: str, columns: dict[str, np.ndarray]):
+        ticker_dir = self._ticker_dir(ticker)
+        os.makedirs(ticker_dir, exist_ok=True)
+        # Materialize before dropping our own memory maps of the files being replaced
+        columns = {name: np.array(array) for name, array in columns.items()}
+        self._loaded.pop(ticker, None)
+        for name in PRICE_COLUMNS:
+            path = os.path.join(ticker_dir, f"{name}.npy")
+            tmp_path = _tmp_path(path)
+            with open(tmp_path, "wb") as f:
+                np.save(f, columns[name])
+            os.replace(tmp_path, path)
+        self._loaded.set(ticker, columns)
+
+    def stats(self) -> dict[str, int]:
+        """Get hit/miss/eviction counts for the loaded columns."""
+        return self._loaded.stats()
+
+    def load_coverage(self, ticker: str) -> list[tuple[str, str]]:
+        """Load the date intervals already fetched for a ticker."""
+        try:
+            with open(os.path.join(self._ticker_dir(ticker), "coverage.json")) as f:
+                return [tuple(interval) for interval in json.load(f)]
+        except (FileNotFoundError, ValueError, OSError):
+            return []
+
+    def save_coverage(self, ticker: str, intervals: list[tuple[str, str]]):
+        """Persist the date intervals already fetched for a ticker."""
+        ticker_dir = self._ticker_dir(ticker)
+        path = os.path.join(ticker_dir, "coverage.json")
+        tmp_path = _tmp_path(path)
+        with self._lock:
+            os.makedirs(ticker_dir, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(intervals, f)
+            os.replace(tmp_path, path)
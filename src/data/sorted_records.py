@@ -0,0 +1,47 @@
+from bisect import bisect_left, bisect_right
+from typing import Callable
+
+
+class SortedRecords:
+    """Records kept sorted by a date string key, with a bisect index for O(log n + k) range queries."""
+
+    def __init__(self, sort_key: Callable[[any], str], unique_key: Callable[[any], any]):
+        self._sort_key = sort_key
+        self._unique_key = unique_key
+        self._keys: list[str] = []
+        self._records: list = []
+        self._seen: set = set()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def add(self, records: list):
+        """Insert records, skipping any whose unique key is already present."""
+        new_records = []
+        for record in records:
+            unique_key = self._unique_key(record)
+            if unique_key not in self._seen:
+                self._seen.add(unique_key)
+                new_records.append(record)
+        if not new_records:
+            return
+
+        new_records.sort(key=self._sort_key)
+        if not self._keys or self._sort_key(new_records[0]) >= self._keys[-1]:
+            # Newer data is the common case and only needs appending
+            self._records.extend(new_records)
+            self._keys.extend(self._sort_key(record) for record in new_records)
+        else:
+            # Both lists are sorted runs, which the stable sort merges in linear time
+            self._records = sorted(self._records + new_records, key=self._sort_key)
+            self._keys = [self._sort_key(record) for record in self._records]
+
+    def range(self, start: str | None = None, end: str | None = None, newest_first: bool = False) -> list:
+        """Return the records whose key lies in the inclusive [start, end] range."""
+        lo = bisect_left(self._keys, start) if start is not None else 0
+        hi = bisect_right(self._keys, end) if end is not None else len(self._keys)
+        records = self._records[lo:hi]
+        return records[::-1] if newest_first else records
@@ -0,0 +1,225 @@
+"""
+Two-tier cache: a bounded in-process L1 in front of the database-backed L2.
+
+Reads are served from L1 and fall through to the database the first time a ticker's data
+is needed; writes go to the database and to any L1 entry already loaded. L1 entries are
+revalidated against the newest last_updated in the database, so writes made by other
+processes invalidate them.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from data.cache import Cache, set_cache
+from data.intervals import IntervalSet
+from data.lru_cache import LRUCache, default_cache_max_bytes
+from data.price_store import columns_to_rows, merge_columns, rows_to_columns, slice_columns
+from .db_cache_adapter import DatabaseBackedCache
+
+DATA_TYPES = ("prices", "financial_metrics", "line_items", "insider_trades", "company_news")
+
+
+def default_revalidate_seconds() -> float:
+    """Resolve how long an L1 entry is trusted before checking the database for newer writes."""
+    return float(os.environ.get("CACHE_L1_REVALIDATE_SECONDS") or 30)
+
+
+class TieredCache(Cache):
+    """
+    Read-through/write-through cache with an in-memory L1 over a DatabaseBackedCache L2.
+    L1 holds a ticker's full data per type once loaded, bounded by the same per-type byte budget
+    as the in-memory cache; evicted tickers are simply reloaded from L2.
+    """
+
+    def __init__(self, l2: DatabaseBackedCache, max_bytes: Optional[int] = None, revalidate_seconds: Optional[float] = None):
+        max_bytes = max_bytes or default_cache_max_bytes()
+        super().__init__(max_bytes=max_bytes)
+        self.l2 = l2
+        self.revalidate_seconds = default_revalidate_seconds() if revalidate_seconds is None else revalidate_seconds
+        # Price columns per ticker, in memory rather than in the on-disk price store
+        self._price_columns = LRUCache(
+            max_bytes,
+            sizeof=lambda columns: sum(array.nbytes for array in columns.values()),
+            on_evict=self._forget_coverage("prices"),
+        )
+        # L1 entries loaded from L2, keyed by (data_type, ticker): (L2 last_updated, monotonic time last checked)
+        self._loaded: Dict[Tuple[str, str], Tuple[Optional[datetime], float]] = {}
+        # Serializes loads from and writes to L2, so a ticker is loaded once; taken before self._lock, never after
+        self._l2_lock = threading.RLock()
+        self._tier_stats = {data_type: {"l1_hits": 0, "l2_hits": 0, "misses": 0, "invalidations": 0} for data_type in DATA_TYPES}
+
+    def _forget_coverage(self, data_type: str):
+        """L2 still holds evicted data, so eviction only marks the L1 entry as not loaded."""
+        return lambda ticker, _: self._loaded.pop((data_type, ticker), None)
+
+    def _forget_line_items(self, ticker: str):
+        self._loaded.pop(("line_items", ticker), None)
+
+    def _drop_l1(self, data_type: str, ticker: str):
+        if data_type == "prices":
+            self._price_columns.pop(ticker)
+        elif data_type == "line_items":
+            self._line_items_cache.pop(ticker)
+        else:
+            self._records[data_type].pop(ticker)
+
+    def _load_l1(self, data_type: str, ticker: str, rows: List[Dict[str, Any]]):
+        if data_type == "prices":
+            self._price_columns.set(ticker, rows_to_columns(rows))
+        else:
+            getattr(super(), f"set_{data_type}")(ticker, rows)
+
+    def _count_lookup(self, data_type: str, last_updated: Optional[datetime]):
+        # An entry loaded with no L2 data is a known miss
+        self._tier_stats[data_type]["l1_hits" if last_updated is not None else "misses"] += 1
+
+    def _fresh_entry(self, key: Tuple[str, str]) -> bool:
+        """Count an L1 lookup if the entry was checked against L2 recently enough to trust; call under the lock."""
+        entry = self._loaded.get(key)
+        if entry is None or time.monotonic() - entry[1] >= self.revalidate_seconds:
+            return False
+        self._count_lookup(key[0], entry[0])
+        return True
+
+    def _ensure_l1(self, data_type: str, ticker: str):
+        """Make sure L1 holds the current L2 data for a ticker, loading or invalidating as needed."""
+        key = (data_type, ticker)
+        with self._lock:
+            if self._fresh_entry(key):
+                return
+
+        # L2 is queried holding only the L2 lock, so L1 reads of other tickers are not blocked on the database
+        with self._l2_lock:
+            with self._lock:
+                # Another thread may have loaded or revalidated the entry while this one waited
+                if self._fresh_entry(key):
+                    return
+                entry = self._loaded.get(key)
+            last_updated = self.l2.last_updated(data_type, ticker)
+            now = time.monotonic()
+            if entry is not None and entry[0] == last_updated:
+                with self._lock:
+                    self._loaded[key] = (last_updated, now)
+                    self._count_lookup(data_type, last_updated)
+                return
+
+            rows = getattr(self.l2, f"get_{data_type}")(ticker) if last_updated is not None else None
+            with self._lock:
+                stats = self._tier_stats[data_type]
+                if entry is not None:
+                    # Another writer changed the data since it was loaded
+                    stats["invalidations"] += 1
+                    self._drop_l1(data_type, ticker)
+                if rows:
+                    self._load_l1(data_type, ticker, rows)
+                    stats["l2_hits"] += 1
+                else:
+                    stats["misses"] += 1
+                self._loaded[key] = (last_updated, now)
+
+    def _write_through(self, data_type: str, ticker: str, data: List[Any]):
+        """Write to L2, then to L1 only if the ticker is loaded there; otherwise the next read loads it all."""
+        key = (data_type, ticker)
+        with self._l2_lock:
+            getattr(self.l2, f"set_{data_type}")(ticker, data)
+            with self._lock:
+                if key not in self._loaded:
+                    return
+            last_updated = self.l2.last_updated(data_type, ticker)
+            with self._lock:
+                # Checked again: the entry may have been evicted while L2 was queried, and merging into nothing would leave a partial entry
+                if key not in self._loaded:
+                    return
+                if data_type == "prices":
+                    existing = self._price_columns.peek(ticker)
+                    new_columns = rows_to_columns(data)
+                    self._price_columns.set(ticker, merge_columns(existing, new_columns) if existing is not None else new_columns)
+                else:
+                    getattr(super(), f"set_{data_type}")(ticker, data)
+                self._loaded[key] = (last_updated, time.monotonic())
+
+    def get_coverage(self, data_type: str, ticker: str) -> IntervalSet:
+        """Get the date intervals already fetched for a ticker and data type."""
+        # Kept in memory: the on-disk price store is not used as a tier here
+        with self._lock:
+            return self._coverage.setdefault((data_type, ticker), IntervalSet())
+
+    def add_coverage(self, data_type: str, ticker: str, start_date: str, end_date: str):
+        """Record that a date interval has been fully fetched for a ticker and data type."""
+        with self._lock:
+            self.get_coverage(data_type, ticker).add(start_date, end_date)
+
+    def _sorted(self, data_type: str, ticker: str):
+        self._ensure_l1(data_type, ticker)
+        return super()._sorted(data_type, ticker)
+
+    def get_prices(self, ticker: str) -> Optional[List[Dict[str, Any]]]:
+        """Get cached price data if available."""
+        self._ensure_l1("prices", ticker)
+        columns = self._price_columns.get(ticker)
+        return columns_to_rows(columns) if columns is not None else None
+
+    def get_price_columns(self, ticker: str, start_date: str, end_date: str) -> Optional[Dict[str, np.ndarray]]:
+        """Get cached prices in the inclusive date range as contiguous column slices."""
+        self._ensure_l1("prices", ticker)
+        columns = self._price_columns.get(ticker)
+        return slice_columns(columns, start_date, end_date) if columns is not None else None
+
+    def set_prices(self, ticker: str, data: List[Dict[str, Any]]):
+        """Append new price data to both tiers."""
+        self._write_through("prices", ticker, data)
+
+    def set_financial_metrics(self, ticker: str, data: List[Any]):
+        """Append new financial metrics to both tiers."""
+        self._write_through("financial_metrics", ticker, data)
+
+    def get_line_items(self, ticker: str) -> Optional[List[Dict[str, Any]]]:
+        """Get cached line items if available."""
+        self._ensure_l1("line_items", ticker)
+        return super().get_line_items(ticker)
+
+    def set_line_items(self, ticker: str, data: List[Dict[str, Any]]):
+        """Merge new line items into both tiers."""
+        self._write_through("line_items", ticker, data)
+
+    def set_insider_trades(self, ticker: str, data: List[Any]):
+        """Append new insider trades to both tiers."""
+        self._write_through("insider_trades", ticker, data)
+
+    def set_company_news(self, ticker: str, data: List[Any]):
+        """Append new company news to both tiers."""
+        self._write_through("company_news", ticker, data)
+
+    def tier_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get L1/L2 hit counts and hit rates per data type."""
+        with self._lock:
+            snapshot = {data_type: dict(stats) for data_type, stats in self._tier_stats.items()}
+        result = {}
+        for data_type, stats in snapshot.items():
+            lookups = stats["l1_hits"] + stats["l2_hits"] + stats["misses"]
+            result[data_type] = {
+                **stats,
+                "l1_hit_rate": stats["l1_hits"] / lookups if lookups else 0.0,
+                "l2_hit_rate": stats["l2_hits"] / lookups if lookups else 0.0,
+            }
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get per-tier hit rates alongside L1 memory use per data type."""
+        memory = super().stats()
+        memory["prices"] = self._price_columns.stats()
+        return {"tiers": self.tier_stats(), "l1": memory}
+
+
+def use_tiered_cache(db: Session, max_bytes: Optional[int] = None, revalidate_seconds: Optional[float] = None) -> TieredCache:
+    """
+    Install a two-tier cache over the given database session as the global cache returned by get_cache().
+    """
+    cache = TieredCache(DatabaseBackedCache(db), max_bytes, revalidate_seconds)
+    set_cache(cache)
+    return cache
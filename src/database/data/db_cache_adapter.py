@@ -2,178 +2,179 @@
 Database-backed cache adapter that integrates with the original cache interface.
 This allows the existing code to work with the new database cache.
 """
+import functools
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 
+import numpy as np
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from .cache import Cache
-from database.repositories import FinancialDataCacheRepository, DataCacheCreate
+from data.cache import Cache
+from data.intervals import IntervalSet
+from data.models import CompanyNews, FinancialMetrics, InsiderTrade
+from data.price_store import rows_to_columns
+from database.repositories import (
+    PriceObservationRepository, FinancialMetricObservationRepository, LineItemObservationRepository,
+    InsiderTradeObservationRepository, CompanyNewsObservationRepository, unit_of_work
+)
+
+
+def _serialized(method):
+    """Run a cache method under the instance lock, since one SQLAlchemy session is not safe to share across threads."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class DatabaseBackedCache(Cache):
     """
     Database-backed implementation of the Cache interface.
-    This adapter keeps the same API but stores data in the database.
+    Each data type is stored one row per observation, so range reads are indexed
+    SQL queries and appends only insert the rows not stored yet.
+    The agents' threads share this instance and its session, so every database call
+    runs under the cache lock inherited from Cache.
     """
 
     def __init__(self, db: Session):
+        # Sets up the lock, coverage and line-item fields; its LRUs and price store stay empty, as rows live in the database
         super().__init__()
         self.db = db
-        self.cache_repo = FinancialDataCacheRepository(None, db)
+        self.prices_repo = PriceObservationRepository(db)
+        self.metrics_repo = FinancialMetricObservationRepository(db)
+        self.line_items_repo = LineItemObservationRepository(db)
+        self.insider_trades_repo = InsiderTradeObservationRepository(db)
+        self.company_news_repo = CompanyNewsObservationRepository(db)
+        self.repos = {
+            "prices": self.prices_repo,
+            "financial_metrics": self.metrics_repo,
+            "line_items": self.line_items_repo,
+            "insider_trades": self.insider_trades_repo,
+            "company_news": self.company_news_repo,
+        }
+
+    @contextmanager
+    def batch_writes(self):
+        """
+        Batch every cache write made inside the block into a single commit, e.g. for a whole backtest:
+
+            with cache.batch_writes():
+                ...
+
+        Other threads' cache calls wait until the batch is committed.
+        """
+        with self._lock, unit_of_work(self.db):
+            yield
+
+    @_serialized
+    def last_updated(self, data_type: str, ticker: str) -> Optional[datetime]:
+        """Get when a ticker's data of this type was last written to the database."""
+        return self.repos[data_type].latest_update(ticker)
+
+    def get_coverage(self, data_type: str, ticker: str) -> IntervalSet:
+        """Get the date intervals already fetched for a ticker and data type."""
+        # Kept in memory: coverage files in the price store directory describe a different store
+        with self._lock:
+            return self._coverage.setdefault((data_type, ticker), IntervalSet())
+
+    def add_coverage(self, data_type: str, ticker: str, start_date: str, end_date: str):
+        """Record that a date interval has been fully fetched for a ticker and data type."""
+        with self._lock:
+            self.get_coverage(data_type, ticker).add(start_date, end_date)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Get the number of tickers with fetched coverage per data type."""
+        with self._lock:
+            covered = Counter(data_type for data_type, _ in self._coverage)
+        return {data_type: {"tickers_covered": count} for data_type, count in covered.items()}
+
+    def _as_dicts(self, data: List[Any]) -> List[Dict[str, Any]]:
+        """Dump any Pydantic models so they can be stored as rows"""
+        return [item.model_dump() if isinstance(item, BaseModel) else item for item in data]
+
+    @_serialized
+    def get_prices(self, ticker: str) -> Optional[List[Dict[str, Any]]]:
+        """Get cached price data if available."""
+        return self.prices_repo.get_dicts(ticker) or None
 
-    def _convert_to_datetime(self, date_str: Optional[str]) -> Optional[datetime]:
-        """Convert string date to datetime object"""
-        if not date_str:
+    @_serialized
+    def get_price_columns(self, ticker: str, start_date: str, end_date: str) -> Optional[Dict[str, np.ndarray]]:
+        """Get cached prices in the inclusive date range as column arrays."""
+        rows = self.prices_repo.get_dicts(ticker, start_date, end_date)
+        if not rows:
             return None
-        try:
-            return datetime.fromisoformat(date_str)
-        except ValueError:
-            # Try different format if ISO format fails
-            try:
-                return datetime.strptime(date_str, "%Y-%m-%d")
-            except ValueError:
-                return None
-
-    def get_prices(self, ticker: str) -> List[Dict[str, Any]]:
-        """Get cached price data if available."""
-        cache_entry = self.cache_repo.get_by_ticker_and_type(ticker, "prices")
-        if cache_entry:
-            return cache_entry.data
-        return None
+        return rows_to_columns(rows)
 
+    @_serialized
     def set_prices(self, ticker: str, data: List[Dict[str, Any]]):
-        """Append new price data to cache."""
-        # Get date range from data
-        dates = [item.get("time") for item in data if "time" in item]
-        start_date = min(dates) if dates else None
-        end_date = max(dates) if dates else None
-        
-        # Convert to datetime objects
-        start_dt = self._convert_to_datetime(start_date)
-        end_dt = self._convert_to_datetime(end_date)
-        
-        # Update or create cache entry
-        self.cache_repo.update_or_create(
-            ticker=ticker,
-            data_type="prices",
-            time_period="daily",
-            data=data,
-            start_date=start_dt,
-            end_date=end_dt
-        )
-
-    def get_financial_metrics(self, ticker: str) -> List[Dict[str, Any]]:
+        """Append new price data to cache, replacing stored bars that were fetched again (e.g. the current day's)."""
+        self.prices_repo.upsert(ticker, data)
+
+    @_serialized
+    def get_financial_metrics(self, ticker: str) -> Optional[List[Dict[str, Any]]]:
         """Get cached financial metrics if available."""
-        cache_entry = self.cache_repo.get_by_ticker_and_type(ticker, "financial_metrics")
-        if cache_entry:
-            return cache_entry.data
-        return None
+        return self.metrics_repo.get_dicts(ticker) or None
+
+    @_serialized
+    def find_financial_metrics(self, ticker: str, end_date: str, period: str, limit: int) -> List[FinancialMetrics]:
+        """Get the newest cached financial metrics for a period reported on or before end_date."""
+        rows = self.metrics_repo.get_dicts(ticker, end_date=end_date, descending=True, limit=limit, period=period)
+        return [FinancialMetrics.model_validate(row) for row in rows]
 
+    @_serialized
     def set_financial_metrics(self, ticker: str, data: List[Dict[str, Any]]):
         """Append new financial metrics to cache."""
-        # Get date range from data
-        report_periods = [item.get("report_period") for item in data if "report_period" in item]
-        start_date = min(report_periods) if report_periods else None
-        end_date = max(report_periods) if report_periods else None
-        
-        # Convert to datetime objects
-        start_dt = self._convert_to_datetime(start_date)
-        end_dt = self._convert_to_datetime(end_date)
-        
-        # Update or create cache entry
-        self.cache_repo.update_or_create(
-            ticker=ticker,
-            data_type="financial_metrics",
-            data=data,
-            start_date=start_dt,
-            end_date=end_dt
-        )
-
-    def get_line_items(self, ticker: str) -> List[Dict[str, Any]]:
+        self.metrics_repo.insert_new(ticker, self._as_dicts(data))
+
+    @_serialized
+    def get_line_items(self, ticker: str) -> Optional[List[Dict[str, Any]]]:
         """Get cached line items if available."""
-        cache_entry = self.cache_repo.get_by_ticker_and_type(ticker, "line_items")
-        if cache_entry:
-            return cache_entry.data
-        return None
+        return self.line_items_repo.get_dicts(ticker) or None
 
+    @_serialized
     def set_line_items(self, ticker: str, data: List[Dict[str, Any]]):
-        """Append new line items to cache."""
-        # Get date range from data
-        report_periods = [item.get("report_period") for item in data if "report_period" in item]
-        start_date = min(report_periods) if report_periods else None
-        end_date = max(report_periods) if report_periods else None
-        
-        # Convert to datetime objects
-        start_dt = self._convert_to_datetime(start_date)
-        end_dt = self._convert_to_datetime(end_date)
-        
-        # Update or create cache entry
-        self.cache_repo.update_or_create(
-            ticker=ticker,
-            data_type="line_items",
-            data=data,
-            start_date=start_dt,
-            end_date=end_dt
-        )
-
-    def get_insider_trades(self, ticker: str) -> List[Dict[str, Any]]:
+        """Merge new line items into cache, keeping the union of fields seen per report period."""
+        self.line_items_repo.merge(ticker, self._as_dicts(data))
+
+    @_serialized
+    def get_insider_trades(self, ticker: str) -> Optional[List[Dict[str, Any]]]:
         """Get cached insider trades if available."""
-        cache_entry = self.cache_repo.get_by_ticker_and_type(ticker, "insider_trades")
-        if cache_entry:
-            return cache_entry.data
-        return None
+        return self.insider_trades_repo.get_dicts(ticker) or None
+
+    @_serialized
+    def find_insider_trades(self, ticker: str, start_date: Optional[str], end_date: str) -> List[InsiderTrade]:
+        """Get cached insider trades in the date range, newest first."""
+        rows = self.insider_trades_repo.get_dicts(ticker, start_date, end_date, descending=True)
+        return [InsiderTrade.model_validate(row) for row in rows]
 
+    @_serialized
     def set_insider_trades(self, ticker: str, data: List[Dict[str, Any]]):
         """Append new insider trades to cache."""
-        # Get date range from data
-        dates = [item.get("filing_date") for item in data if "filing_date" in item]
-        start_date = min(dates) if dates else None
-        end_date = max(dates) if dates else None
-        
-        # Convert to datetime objects
-        start_dt = self._convert_to_datetime(start_date)
-        end_dt = self._convert_to_datetime(end_date)
-        
-        # Update or create cache entry
-        self.cache_repo.update_or_create(
-            ticker=ticker,
-            data_type="insider_trades",
-            data=data,
-            start_date=start_dt,
-            end_date=end_dt
-        )
-
-    def get_company_news(self, ticker: str) -> List[Dict[str, Any]]:
+        self.insider_trades_repo.insert_new(ticker, self._as_dicts(data))
+
+    @_serialized
+    def get_company_news(self, ticker: str) -> Optional[List[Dict[str, Any]]]:
         """Get cached company news if available."""
-        cache_entry = self.cache_repo.get_by_ticker_and_type(ticker, "company_news")
-        if cache_entry:
-            return cache_entry.data
-        return None
+        return self.company_news_repo.get_dicts(ticker) or None
+
+    @_serialized
+    def find_company_news(self, ticker: str, start_date: Optional[str], end_date: str) -> List[CompanyNews]:
+        """Get cached company news in the date range, newest first."""
+        rows = self.company_news_repo.get_dicts(ticker, start_date, end_date, descending=True)
+        return [CompanyNews.model_validate(row) for row in rows]
 
+    @_serialized
     def set_company_news(self, ticker: str, data: List[Dict[str, Any]]):
         """Append new company news to cache."""
-        # Get date range from data
-        dates = [item.get("date") for item in data if "date" in item]
-        start_date = min(dates) if dates else None
-        end_date = max(dates) if dates else None
-        
-        # Convert to datetime objects
-        start_dt = self._convert_to_datetime(start_date)
-        end_dt = self._convert_to_datetime(end_date)
-        
-        # Update or create cache entry
-        self.cache_repo.update_or_create(
-            ticker=ticker,
-            data_type="company_news",
-            data=data,
-            start_date=start_dt,
-            end_date=end_dt
-        )
+        self.company_news_repo.insert_new(ticker, self._as_dicts(data))
 
 
 def get_db_cache(db: Session) -> DatabaseBackedCache:
     """
     Get a database-backed cache instance.
     """
-    return DatabaseBackedCache(db)
\ No newline at end of file
+    return DatabaseBackedCache(db)
@@ -1,4 +1,5 @@
 import os
+import sys
 from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
@@ -21,14 +22,21 @@ config.set_section_option(section, "DB_PASSWORD", os.getenv("DB_PASSWORD", "post
 config.set_section_option(section, "DB_HOST", os.getenv("DB_HOST", "localhost"))
 config.set_section_option(section, "DB_PORT", os.getenv("DB_PORT", "5432"))
 config.set_section_option(section, "DB_NAME", os.getenv("DB_NAME", "investment_saas"))
+# DATABASE_URL takes precedence, as it does for the application's engine
+if os.getenv("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["DATABASE_URL"].replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Import the models the way the application does, as database.* from src/, so they are
+# registered on a single metadata however the migrations get imported
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
 # Import all models here to ensure they're discovered for autogenerate
-from src.database.models import Base
+from database.models import Base
 
 # target_metadata is used for autogenerate support
 target_metadata = Base.metadata
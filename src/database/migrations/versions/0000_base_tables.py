@@ -0,0 +1,162 @@
+"""Create the base application tables
+
+Baseline for the tables init_db() creates with create_all, so that `alembic upgrade head` on an
+empty database gives the full schema. Tables that exist already are left as they are, so
+databases set up with create_all can be upgraded without "table already exists" errors.
+
+Revision ID: 0000
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0000'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Enums are stored by member name, as SQLAlchemy does for Enum(SignalType) and Enum(ActionType)
+signal_type = sa.Enum('BULLISH', 'BEARISH', 'NEUTRAL', name='signaltype')
+action_type = sa.Enum('BUY', 'SELL', 'HOLD', 'SHORT', 'COVER', name='actiontype')
+
+
+def _create_table(existing: set, name: str, *columns):
+    """Create a table unless it exists already."""
+    if name not in existing:
+        op.create_table(name, *columns)
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    _create_table(
+        existing,
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('email', sa.String(255), nullable=False, unique=True),
+        sa.Column('password_hash', sa.String(255), nullable=False),
+        sa.Column('first_name', sa.String(100)),
+        sa.Column('last_name', sa.String(100)),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+        sa.Column('is_active', sa.Boolean()),
+    )
+    _create_table(
+        existing,
+        'watchlists',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('is_public', sa.Boolean()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+    _create_table(
+        existing,
+        'user_watchlist_association',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('watchlist_id', sa.Integer(), sa.ForeignKey('watchlists.id'), primary_key=True),
+    )
+    _create_table(
+        existing,
+        'watchlist_stocks',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('watchlist_id', sa.Integer(), sa.ForeignKey('watchlists.id'), nullable=False),
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('added_at', sa.DateTime()),
+        sa.Column('notes', sa.Text()),
+    )
+    _create_table(
+        existing,
+        'portfolios',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('description', sa.Text()),
+        sa.Column('cash_balance', sa.Float()),
+        sa.Column('margin_requirement', sa.Float()),
+        sa.Column('margin_used', sa.Float()),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+    _create_table(
+        existing,
+        'positions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('portfolio_id', sa.Integer(), sa.ForeignKey('portfolios.id'), nullable=False),
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('long_shares', sa.Integer()),
+        sa.Column('short_shares', sa.Integer()),
+        sa.Column('long_cost_basis', sa.Float()),
+        sa.Column('short_cost_basis', sa.Float()),
+        sa.Column('short_margin_used', sa.Float()),
+        sa.Column('last_price', sa.Float()),
+        sa.Column('last_updated', sa.DateTime()),
+    )
+    _create_table(
+        existing,
+        'analysis_requests',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('start_date', sa.DateTime(), nullable=False),
+        sa.Column('end_date', sa.DateTime(), nullable=False),
+        sa.Column('model_name', sa.String(100)),
+        sa.Column('model_provider', sa.String(100)),
+        sa.Column('analysts', sa.JSON()),
+        sa.Column('status', sa.String(20)),
+        sa.Column('created_at', sa.DateTime()),
+        sa.Column('completed_at', sa.DateTime()),
+    )
+    _create_table(
+        existing,
+        'analysis_results',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('analysis_request_id', sa.Integer(), sa.ForeignKey('analysis_requests.id'), nullable=False),
+        sa.Column('analyst_name', sa.String(100), nullable=False),
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('signal', signal_type),
+        sa.Column('confidence', sa.Float()),
+        sa.Column('reasoning', sa.Text()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+    _create_table(
+        existing,
+        'trades',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('portfolio_id', sa.Integer(), sa.ForeignKey('portfolios.id'), nullable=False),
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('action', action_type, nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('timestamp', sa.DateTime()),
+        sa.Column('notes', sa.Text()),
+    )
+    _create_table(
+        existing,
+        'financial_data_cache',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('data_type', sa.String(50), nullable=False),
+        sa.Column('time_period', sa.String(50)),
+        sa.Column('start_date', sa.DateTime()),
+        sa.Column('end_date', sa.DateTime()),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('last_updated', sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    for name in (
+        'financial_data_cache', 'trades', 'analysis_results', 'analysis_requests', 'positions',
+        'portfolios', 'watchlist_stocks', 'user_watchlist_association', 'watchlists', 'users',
+    ):
+        op.drop_table(name)
+    # Postgres keeps enum types after their tables are dropped
+    bind = op.get_bind()
+    action_type.drop(bind, checkfirst=True)
+    signal_type.drop(bind, checkfirst=True)
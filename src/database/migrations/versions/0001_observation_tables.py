@@ -0,0 +1,155 @@
+"""Add row-per-observation market data tables
+
+Tables that init_db() already created are left as they are, so databases set up with
+create_all can be upgraded (or stamped) without "table already exists" errors. Market data
+cached as one JSON document per ticker in financial_data_cache is moved into the new tables.
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+# Data types the old cache stored in financial_data_cache
+CACHED_DATA_TYPES = ("prices", "financial_metrics", "line_items", "insider_trades", "company_news")
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = '0000'
+branch_labels = None
+depends_on = None
+
+
+def _create_table(existing: set, name: str, *columns) -> bool:
+    """Create a table unless it exists already. Returns whether it was created."""
+    if name in existing:
+        return False
+    op.create_table(name, *columns)
+    return True
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    _create_table(
+        existing,
+        'price_observations',
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('date', sa.String(10), nullable=False),
+        sa.Column('time', sa.String(40), nullable=False),
+        sa.Column('open', sa.Float(), nullable=False),
+        sa.Column('close', sa.Float(), nullable=False),
+        sa.Column('high', sa.Float(), nullable=False),
+        sa.Column('low', sa.Float(), nullable=False),
+        sa.Column('volume', sa.BigInteger(), nullable=False),
+        sa.Column('last_updated', sa.DateTime()),
+        sa.PrimaryKeyConstraint('ticker', 'date'),
+    )
+    _create_table(
+        existing,
+        'financial_metric_observations',
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('report_period', sa.String(10), nullable=False),
+        sa.Column('period', sa.String(20), nullable=False),
+        sa.Column('currency', sa.String(10)),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('last_updated', sa.DateTime()),
+        sa.PrimaryKeyConstraint('ticker', 'report_period', 'period'),
+    )
+    _create_table(
+        existing,
+        'line_item_observations',
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('report_period', sa.String(10), nullable=False),
+        sa.Column('period', sa.String(20), nullable=False),
+        sa.Column('currency', sa.String(10)),
+        sa.Column('data', sa.JSON(), nullable=False),
+        sa.Column('last_updated', sa.DateTime()),
+        sa.PrimaryKeyConstraint('ticker', 'report_period', 'period'),
+    )
+    insider_trades_created = _create_table(
+        existing,
+        'insider_trade_observations',
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('filing_date', sa.String(40), nullable=False),
+        sa.Column('trade_key', sa.String(40), nullable=False),
+        sa.Column('issuer', sa.String(255)),
+        sa.Column('name', sa.String(255)),
+        sa.Column('title', sa.String(255)),
+        sa.Column('is_board_director', sa.Boolean()),
+        sa.Column('transaction_date', sa.String(40)),
+        sa.Column('transaction_shares', sa.Float()),
+        sa.Column('transaction_price_per_share', sa.Float()),
+        sa.Column('transaction_value', sa.Float()),
+        sa.Column('shares_owned_before_transaction', sa.Float()),
+        sa.Column('shares_owned_after_transaction', sa.Float()),
+        sa.Column('security_title', sa.String(255)),
+        sa.Column('date', sa.String(40), nullable=False),
+        sa.Column('last_updated', sa.DateTime()),
+        sa.PrimaryKeyConstraint('ticker', 'filing_date', 'trade_key'),
+    )
+    if insider_trades_created:
+        op.create_index('insider_trade_date_idx', 'insider_trade_observations', ['ticker', 'date'])
+    _create_table(
+        existing,
+        'company_news_observations',
+        sa.Column('ticker', sa.String(20), nullable=False),
+        sa.Column('date', sa.String(40), nullable=False),
+        sa.Column('news_key', sa.String(40), nullable=False),
+        sa.Column('title', sa.Text(), nullable=False),
+        sa.Column('author', sa.String(255)),
+        sa.Column('source', sa.String(255)),
+        sa.Column('url', sa.Text()),
+        sa.Column('sentiment', sa.String(20)),
+        sa.Column('last_updated', sa.DateTime()),
+        sa.PrimaryKeyConstraint('ticker', 'date', 'news_key'),
+    )
+    if 'financial_data_cache' in existing:
+        _move_cached_market_data()
+
+
+def _move_cached_market_data() -> None:
+    """
+    Insert the records of each cached JSON document into the observation tables, then delete
+    the documents: nothing reads market data from financial_data_cache any more.
+    """
+    # Imported here so the revision module loads without the application package; env.py puts src/ on the path
+    from database.repositories import unit_of_work
+    from database.repositories.observations import (
+        PriceObservationRepository, FinancialMetricObservationRepository, LineItemObservationRepository,
+        InsiderTradeObservationRepository, CompanyNewsObservationRepository
+    )
+
+    bind = op.get_bind()
+    cache = sa.table('financial_data_cache', sa.column('ticker', sa.String), sa.column('data_type', sa.String), sa.column('data', sa.JSON))
+    db = Session(bind=bind)
+    repositories = {
+        "prices": PriceObservationRepository(db),
+        "financial_metrics": FinancialMetricObservationRepository(db),
+        "line_items": LineItemObservationRepository(db),
+        "insider_trades": InsiderTradeObservationRepository(db),
+        "company_news": CompanyNewsObservationRepository(db),
+    }
+    with unit_of_work(db):
+        for ticker, data_type, data in bind.execute(sa.select(cache.c.ticker, cache.c.data_type, cache.c.data).where(cache.c.data_type.in_(CACHED_DATA_TYPES))):
+            if not isinstance(data, list) or not data:
+                continue
+            if data_type == "line_items":
+                repositories[data_type].merge(ticker, data)
+            else:
+                repositories[data_type].insert_new(ticker, data)
+    db.close()
+    op.execute(cache.delete().where(cache.c.data_type.in_(CACHED_DATA_TYPES)))
+
+
+def downgrade() -> None:
+    # Market data moved out of financial_data_cache is not put back; it is re-fetched on demand
+    op.drop_table('company_news_observations')
+    op.drop_index('insider_trade_date_idx', table_name='insider_trade_observations')
+    op.drop_table('insider_trade_observations')
+    op.drop_table('line_item_observations')
+    op.drop_table('financial_metric_observations')
+    op.drop_table('price_observations')
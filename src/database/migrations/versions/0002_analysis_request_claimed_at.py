@@ -0,0 +1,31 @@
+"""Record when an analysis request was claimed
+
+Workers set claimed_at when they claim a request, and claim requests again whose lease has run
+out while still processing. Databases where create_all already added the column are left as they are.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('analysis_requests')}
+    if 'claimed_at' not in columns:
+        op.add_column('analysis_requests', sa.Column('claimed_at', sa.DateTime()))
+
+
+def downgrade() -> None:
+    # Batch mode, as SQLite can only drop a column by copying the table
+    with op.batch_alter_table('analysis_requests') as batch_op:
+        batch_op.drop_column('claimed_at')
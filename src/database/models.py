@@ -1,7 +1,7 @@
 from datetime import datetime
 from sqlalchemy import (
-    Column, Integer, String, Float, Boolean, DateTime, 
-    ForeignKey, Text, JSON, Table, Enum
+    Column, Integer, BigInteger, String, Float, Boolean, DateTime, 
+    ForeignKey, Text, JSON, Table, Enum, Index
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -73,6 +73,26 @@ class Portfolio(Base):
         position_value = sum(position.current_value for position in self.positions)
         return self.cash_balance + position_value
 
+    def to_hedge_fund_portfolio(self, tickers=None):
+        """
+        Build the portfolio dict that run_hedge_fund takes, with an empty position for
+        any requested ticker not held. Realized gains are not stored, so they start at zero.
+        """
+        positions = {position.ticker: position for position in self.positions}
+        tickers = list(tickers) if tickers is not None else list(positions)
+        return {
+            "cash": self.cash_balance or 0.0,
+            "margin_requirement": self.margin_requirement or 0.0,
+            "margin_used": self.margin_used or 0.0,
+            "positions": {
+                ticker: positions[ticker].to_hedge_fund_position() if ticker in positions else Position.empty_hedge_fund_position()
+                for ticker in tickers
+            },
+            "realized_gains": {
+                ticker: {"long": 0.0, "short": 0.0} for ticker in tickers
+            }
+        }
+
 class Position(Base):
     __tablename__ = 'positions'
     
@@ -90,6 +110,21 @@ class Position(Base):
     # Relationships
     portfolio = relationship("Portfolio", back_populates="positions")
     
+    @staticmethod
+    def empty_hedge_fund_position():
+        """A position entry for a ticker with no holdings, as run_hedge_fund expects it"""
+        return {"long": 0, "short": 0, "long_cost_basis": 0.0, "short_cost_basis": 0.0, "short_margin_used": 0.0}
+
+    def to_hedge_fund_position(self):
+        """This position as an entry of the portfolio dict run_hedge_fund takes"""
+        return {
+            "long": self.long_shares or 0,
+            "short": self.short_shares or 0,
+            "long_cost_basis": self.long_cost_basis or 0.0,
+            "short_cost_basis": self.short_cost_basis or 0.0,
+            "short_margin_used": self.short_margin_used or 0.0,
+        }
+
     @property
     def current_value(self):
         """Calculate the current value of the position"""
@@ -145,6 +180,7 @@ class AnalysisRequest(Base):
     analysts = Column(JSON)  # Stores a list of selected analysts
     status = Column(String(20), default="pending")  # pending, processing, completed, failed
     created_at = Column(DateTime, default=datetime.utcnow)
+    claimed_at = Column(DateTime)  # When a worker last claimed the request, for reclaiming abandoned ones
     completed_at = Column(DateTime)
     
     # Relationships
@@ -200,4 +236,78 @@ class FinancialDataCache(Base):
         # Index for faster cache lookup
         # Needs SQLAlchemy 1.4+
         # Index('cache_lookup_idx', ticker, data_type, time_period),
-    )
\ No newline at end of file
+    )
+
+# Row-per-observation market data tables. Dates are kept as the ISO strings the API returns,
+# so SQL range filters compare exactly like the in-memory cache does.
+
+class PriceObservation(Base):
+    __tablename__ = 'price_observations'
+
+    ticker = Column(String(20), primary_key=True)
+    date = Column(String(10), primary_key=True)  # YYYY-MM-DD of the bar
+    time = Column(String(40), nullable=False)  # Timestamp as returned by the API
+    open = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    volume = Column(BigInteger, nullable=False)
+    last_updated = Column(DateTime, default=datetime.utcnow)
+
+class FinancialMetricObservation(Base):
+    __tablename__ = 'financial_metric_observations'
+
+    ticker = Column(String(20), primary_key=True)
+    report_period = Column(String(10), primary_key=True)
+    period = Column(String(20), primary_key=True)  # ttm, annual, quarterly
+    currency = Column(String(10))
+    data = Column(JSON, nullable=False)  # Metric values for this report period
+    last_updated = Column(DateTime, default=datetime.utcnow)
+
+class LineItemObservation(Base):
+    __tablename__ = 'line_item_observations'
+
+    ticker = Column(String(20), primary_key=True)
+    report_period = Column(String(10), primary_key=True)
+    period = Column(String(20), primary_key=True)
+    currency = Column(String(10))
+    data = Column(JSON, nullable=False)  # Union of the line items fetched for this report period
+    last_updated = Column(DateTime, default=datetime.utcnow)
+
+class InsiderTradeObservation(Base):
+    __tablename__ = 'insider_trade_observations'
+
+    ticker = Column(String(20), primary_key=True)
+    filing_date = Column(String(40), primary_key=True)
+    trade_key = Column(String(40), primary_key=True)  # Hash of the trade's identity, several trades share a filing
+    issuer = Column(String(255))
+    name = Column(String(255))
+    title = Column(String(255))
+    is_board_director = Column(Boolean)
+    transaction_date = Column(String(40))
+    transaction_shares = Column(Float)
+    transaction_price_per_share = Column(Float)
+    transaction_value = Column(Float)
+    shares_owned_before_transaction = Column(Float)
+    shares_owned_after_transaction = Column(Float)
+    security_title = Column(String(255))
+    date = Column(String(40), nullable=False)  # transaction_date, falling back to filing_date
+    last_updated = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Range reads filter on the trade date
+        Index('insider_trade_date_idx', ticker, date),
+    )
+
+class CompanyNewsObservation(Base):
+    __tablename__ = 'company_news_observations'
+
+    ticker = Column(String(20), primary_key=True)
+    date = Column(String(40), primary_key=True)
+    news_key = Column(String(40), primary_key=True)  # Hash of url and title, several articles share a date
+    title = Column(Text, nullable=False)
+    author = Column(String(255))
+    source = Column(String(255))
+    url = Column(Text)
+    sentiment = Column(String(20))
+    last_updated = Column(DateTime, default=datetime.utcnow)
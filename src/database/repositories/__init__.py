@@ -1,3 +1,4 @@
+from .base import BaseRepository, unit_of_work
 from .user import UserRepository, UserCreate, UserUpdate
 from .portfolio import (
     PortfolioRepository, PortfolioCreate, PortfolioUpdate,
@@ -9,4 +10,15 @@ from .analysis import (
 )
 from .cache import (
     FinancialDataCacheRepository, DataCacheCreate, DataCacheUpdate
-)
\ No newline at end of file
+)
+from .observations import (
+    PriceObservationRepository, FinancialMetricObservationRepository, LineItemObservationRepository,
+    InsiderTradeObservationRepository, CompanyNewsObservationRepository
+)
+from .async_repository import (
+    AsyncRepository, async_unit_of_work,
+    AsyncUserRepository, AsyncPortfolioRepository, AsyncPositionRepository,
+    AsyncAnalysisRequestRepository, AsyncAnalysisResultRepository, AsyncFinancialDataCacheRepository,
+    AsyncPriceObservationRepository, AsyncFinancialMetricObservationRepository, AsyncLineItemObservationRepository,
+    AsyncInsiderTradeObservationRepository, AsyncCompanyNewsObservationRepository
+)
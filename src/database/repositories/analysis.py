@@ -1,5 +1,6 @@
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, select, update
 from sqlalchemy.orm import Session
 from ..models import AnalysisRequest, AnalysisResult, SignalType
 from .base import BaseRepository
@@ -74,6 +75,52 @@ class AnalysisRequestRepository(BaseRepository[AnalysisRequest, AnalysisRequestC
             .all()
         )
     
+    def claim_pending(self, limit: int = 1, lease_seconds: Optional[float] = None) -> List[AnalysisRequest]:
+        """
+        Atomically claim up to limit pending requests, oldest first, by marking them as processing.
+        Several workers can call this concurrently without claiming the same request.
+        Postgres uses SELECT ... FOR UPDATE SKIP LOCKED; other databases (SQLite) claim with a single
+        UPDATE ... RETURNING over the oldest pending ids, which holds the write lock for one statement only.
+        With lease_seconds, requests claimed longer ago than that and still processing are claimed
+        again, so a request whose worker died is not left processing forever. The lease must outlast
+        the longest analysis, or a request still being worked on is handed out twice.
+        """
+        now = datetime.utcnow()
+        claimable = AnalysisRequest.status == "pending"
+        if lease_seconds is not None:
+            claimable = or_(
+                claimable,
+                and_(AnalysisRequest.status == "processing", AnalysisRequest.claimed_at < now - timedelta(seconds=lease_seconds)),
+            )
+        candidates = (
+            select(AnalysisRequest)
+            .where(claimable)
+            .order_by(AnalysisRequest.created_at, AnalysisRequest.id)
+            .limit(limit)
+        )
+
+        if self.db.get_bind().dialect.name == "postgresql":
+            # Rows locked by another worker's claim are skipped rather than waited on
+            claimed = list(self.db.scalars(candidates.with_for_update(skip_locked=True)))
+            for request in claimed:
+                request.status = "processing"
+                request.claimed_at = now
+            self.db.commit()
+            return claimed
+
+        claimed = list(
+            self.db.scalars(
+                update(AnalysisRequest)
+                .where(AnalysisRequest.id.in_(candidates.with_only_columns(AnalysisRequest.id)), claimable)
+                .values(status="processing", claimed_at=now)
+                .returning(AnalysisRequest)
+            )
+        )
+        # RETURNING gives rows in no particular order
+        claimed.sort(key=lambda request: (request.created_at, request.id))
+        self.db.commit()
+        return claimed
+
     def update_status(self, request_id: int, status: str, completed_at: Optional[datetime] = None) -> AnalysisRequest:
         """
         Update the status of an analysis request
@@ -86,8 +133,7 @@ class AnalysisRequestRepository(BaseRepository[AnalysisRequest, AnalysisRequestC
             elif status == "completed":
                 request.completed_at = datetime.utcnow()
             
-            self.db.commit()
-            self.db.refresh(request)
+            self._commit(request)
         return request
 
 class AnalysisResultRepository(BaseRepository[AnalysisResult, AnalysisResultCreate, AnalysisResultUpdate]):
@@ -0,0 +1,258 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Generic, Iterable, List, Optional, Sequence, TypeVar, Union
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from ..models import (
+    User, Portfolio, Position, AnalysisRequest, AnalysisResult, FinancialDataCache,
+    PriceObservation, FinancialMetricObservation, LineItemObservation, InsiderTradeObservation, CompanyNewsObservation
+)
+from .base import BaseRepository, BULK_BATCH_SIZE, ModelType
+from .user import UserRepository
+from .portfolio import PortfolioRepository, PositionRepository
+from .analysis import AnalysisRequestRepository, AnalysisResultRepository
+from .cache import FinancialDataCacheRepository
+from .observations import (
+    ObservationRepository, PriceObservationRepository, FinancialMetricObservationRepository, LineItemObservationRepository,
+    InsiderTradeObservationRepository, CompanyNewsObservationRepository
+)
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+RepositoryType = TypeVar("RepositoryType", bound=BaseRepository)
+ObservationRepositoryType = TypeVar("ObservationRepositoryType", bound=ObservationRepository)
+
+
+@asynccontextmanager
+async def async_unit_of_work(db: "AsyncSession") -> AsyncIterator["AsyncSession"]:
+    """
+    Group async repository writes into one transaction, committed once when the outermost
+    unit of work exits. Shares its depth with the sync unit_of_work through session.info.
+    """
+    db.info["unit_of_work_depth"] = db.info.get("unit_of_work_depth", 0) + 1
+    try:
+        yield db
+        if db.info["unit_of_work_depth"] == 1:
+            await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        db.info["unit_of_work_depth"] -= 1
+
+
+class AsyncRepository(Generic[RepositoryType, ModelType]):
+    """
+    Async version of a repository.
+    Each method runs the wrapped repository's method on the AsyncSession's connection
+    through run_sync, so waiting on the database yields to the event loop instead of holding
+    a thread. Returned objects are fully loaded; relationships must be eager loaded by the
+    query, since lazy loads can't run outside run_sync.
+    """
+
+    def __init__(self, repository_factory: Callable[[Session], RepositoryType], db: "AsyncSession"):
+        self.repository_factory = repository_factory
+        self.db = db
+
+    def unit_of_work(self):
+        """
+        Batch writes on this repository's session into a single commit
+        """
+        return async_unit_of_work(self.db)
+
+    async def run(self, fn: Callable[[RepositoryType], Any]) -> Any:
+        """
+        Run a function against the wrapped repository on the session's connection
+        """
+        return await self.db.run_sync(lambda session: fn(self.repository_factory(session)))
+
+    async def get(self, id: int) -> Optional[ModelType]:
+        return await self.run(lambda repository: repository.get(id))
+
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
+        return await self.run(lambda repository: repository.get_all(skip, limit))
+
+    async def create(self, obj_in: Union[BaseModel, Dict[str, Any]]) -> ModelType:
+        return await self.run(lambda repository: repository.create(obj_in))
+
+    async def update(self, db_obj: ModelType, obj_in: Union[BaseModel, Dict[str, Any]]) -> ModelType:
+        return await self.run(lambda repository: repository.update(db_obj, obj_in))
+
+    async def delete(self, id: int) -> ModelType:
+        return await self.run(lambda repository: repository.delete(id))
+
+    async def bulk_create(self, objs_in: Iterable[Union[BaseModel, Dict[str, Any]]], batch_size: int = BULK_BATCH_SIZE) -> int:
+        return await self.run(lambda repository: repository.bulk_create(objs_in, batch_size))
+
+    async def bulk_upsert(
+        self,
+        objs_in: Iterable[Union[BaseModel, Dict[str, Any]]],
+        index_elements: Optional[Sequence[str]] = None,
+        update_fields: Optional[Sequence[str]] = None,
+        batch_size: int = BULK_BATCH_SIZE
+    ) -> int:
+        return await self.run(lambda repository: repository.bulk_upsert(objs_in, index_elements, update_fields, batch_size))
+
+
+class AsyncUserRepository(AsyncRepository[UserRepository, User]):
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(lambda session: UserRepository(User, session), db)
+
+    async def get_by_email(self, email: str) -> Optional[User]:
+        return await self.run(lambda repository: repository.get_by_email(email))
+
+    async def get_active_users(self, skip: int = 0, limit: int = 100) -> List[User]:
+        return await self.run(lambda repository: repository.get_active_users(skip, limit))
+
+
+class AsyncPortfolioRepository(AsyncRepository[PortfolioRepository, Portfolio]):
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(lambda session: PortfolioRepository(Portfolio, session), db)
+
+    async def get_by_user_id(self, user_id: int) -> List[Portfolio]:
+        return await self.run(lambda repository: repository.get_by_user_id(user_id))
+
+    async def get_portfolio_with_positions(self, portfolio_id: int) -> Optional[Portfolio]:
+        return await self.run(lambda repository: repository.get_portfolio_with_positions(portfolio_id))
+
+    async def get_hedge_fund_portfolio(self, portfolio_id: int, tickers: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        return await self.run(lambda repository: repository.get_hedge_fund_portfolio(portfolio_id, tickers))
+
+    async def get_snapshot(self, portfolio_id: int, trade_limit: int = 20) -> Optional[Dict[str, Any]]:
+        return await self.run(lambda repository: repository.get_snapshot(portfolio_id, trade_limit))
+
+
+class AsyncPositionRepository(AsyncRepository[PositionRepository, Position]):
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(lambda session: PositionRepository(Position, session), db)
+
+    async def get_all_by_portfolio(self, portfolio_id: int) -> List[Position]:
+        return await self.run(lambda repository: repository.get_all_by_portfolio(portfolio_id))
+
+    async def get_by_portfolio_and_ticker(self, portfolio_id: int, ticker: str) -> Optional[Position]:
+        return await self.run(lambda repository: repository.get_by_portfolio_and_ticker(portfolio_id, ticker))
+
+    async def update_position_price(self, position_id: int, price: float) -> Position:
+        return await self.run(lambda repository: repository.update_position_price(position_id, price))
+
+    async def revalue_positions(self, portfolio_id: int, prices: Dict[str, float]) -> List[Position]:
+        return await self.run(lambda repository: repository.revalue_positions(portfolio_id, prices))
+
+
+class AsyncAnalysisRequestRepository(AsyncRepository[AnalysisRequestRepository, AnalysisRequest]):
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(lambda session: AnalysisRequestRepository(AnalysisRequest, session), db)
+
+    async def get_by_user_id(self, user_id: int, skip: int = 0, limit: int = 100) -> List[AnalysisRequest]:
+        return await self.run(lambda repository: repository.get_by_user_id(user_id, skip, limit))
+
+    async def get_by_ticker(self, ticker: str, skip: int = 0, limit: int = 100) -> List[AnalysisRequest]:
+        return await self.run(lambda repository: repository.get_by_ticker(ticker, skip, limit))
+
+    async def get_pending_requests(self, limit: int = 10) -> List[AnalysisRequest]:
+        return await self.run(lambda repository: repository.get_pending_requests(limit))
+
+    async def claim_pending(self, limit: int = 1, lease_seconds: Optional[float] = None) -> List[AnalysisRequest]:
+        return await self.run(lambda repository: repository.claim_pending(limit, lease_seconds))
+
+    async def update_status(self, request_id: int, status: str, completed_at: Optional[datetime] = None) -> AnalysisRequest:
+        return await self.run(lambda repository: repository.update_status(request_id, status, completed_at))
+
+
+class AsyncAnalysisResultRepository(AsyncRepository[AnalysisResultRepository, AnalysisResult]):
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(lambda session: AnalysisResultRepository(AnalysisResult, session), db)
+
+    async def get_by_request_id(self, request_id: int) -> List[AnalysisResult]:
+        return await self.run(lambda repository: repository.get_by_request_id(request_id))
+
+    async def get_by_ticker_and_analyst(self, ticker: str, analyst_name: str, limit: int = 1) -> List[AnalysisResult]:
+        return await self.run(lambda repository: repository.get_by_ticker_and_analyst(ticker, analyst_name, limit))
+
+
+class AsyncFinancialDataCacheRepository(AsyncRepository[FinancialDataCacheRepository, FinancialDataCache]):
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(lambda session: FinancialDataCacheRepository(FinancialDataCache, session), db)
+
+    async def get_by_ticker_and_type(self, ticker: str, data_type: str, time_period: Optional[str] = None) -> Optional[FinancialDataCache]:
+        return await self.run(lambda repository: repository.get_by_ticker_and_type(ticker, data_type, time_period))
+
+    async def get_by_date_range(
+        self, ticker: str, data_type: str, start_date: datetime, end_date: datetime, time_period: Optional[str] = None
+    ) -> Optional[FinancialDataCache]:
+        return await self.run(lambda repository: repository.get_by_date_range(ticker, data_type, start_date, end_date, time_period))
+
+    async def update_or_create(
+        self,
+        ticker: str,
+        data_type: str,
+        data: Dict[str, Any],
+        time_period: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> FinancialDataCache:
+        return await self.run(lambda repository: repository.update_or_create(ticker, data_type, data, time_period, start_date, end_date))
+
+    async def bulk_update_or_create(self, entries: List[Dict[str, Any]]) -> int:
+        return await self.run(lambda repository: repository.bulk_update_or_create(entries))
+
+    async def clear_old_cache(self, days: int = 30) -> int:
+        return await self.run(lambda repository: repository.clear_old_cache(days))
+
+
+class AsyncObservationRepository(AsyncRepository[ObservationRepositoryType, ModelType]):
+    """
+    Async version of a market data observation repository
+    """
+
+    async def get_range(
+        self,
+        ticker: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        **filters: Any
+    ) -> List[ModelType]:
+        return await self.run(lambda repository: repository.get_range(ticker, start_date, end_date, descending, limit, **filters))
+
+    async def get_dicts(self, ticker: str, start_date: Optional[str] = None, end_date: Optional[str] = None, **kwargs: Any) -> List[Dict[str, Any]]:
+        return await self.run(lambda repository: repository.get_dicts(ticker, start_date, end_date, **kwargs))
+
+    async def latest_update(self, ticker: str) -> Optional[datetime]:
+        return await self.run(lambda repository: repository.latest_update(ticker))
+
+    async def insert_new(self, ticker: str, items: List[Dict[str, Any]]) -> int:
+        return await self.run(lambda repository: repository.insert_new(ticker, items))
+
+    async def upsert(self, ticker: str, items: List[Dict[str, Any]]) -> int:
+        return await self.run(lambda repository: repository.upsert(ticker, items))
+
+
+class AsyncPriceObservationRepository(AsyncObservationRepository[PriceObservationRepository, PriceObservation]):
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(PriceObservationRepository, db)
+
+
+class AsyncFinancialMetricObservationRepository(AsyncObservationRepository[FinancialMetricObservationRepository, FinancialMetricObservation]):
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(FinancialMetricObservationRepository, db)
+
+
+class AsyncLineItemObservationRepository(AsyncObservationRepository[LineItemObservationRepository, LineItemObservation]):
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(LineItemObservationRepository, db)
+
+    async def merge(self, ticker: str, items: List[Dict[str, Any]]) -> None:
+        return await self.run(lambda repository: repository.merge(ticker, items))
+
+
+class AsyncInsiderTradeObservationRepository(AsyncObservationRepository[InsiderTradeObservationRepository, InsiderTradeObservation]):
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(InsiderTradeObservationRepository, db)
+
+
+class AsyncCompanyNewsObservationRepository(AsyncObservationRepository[CompanyNewsObservationRepository, CompanyNewsObservation]):
+    def __init__(self, db: "AsyncSession"):
+        super().__init__(CompanyNewsObservationRepository, db)
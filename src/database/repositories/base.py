@@ -1,4 +1,7 @@
-from typing import Generic, TypeVar, Type, List, Optional, Dict, Any, Union
+from contextlib import contextmanager
+from typing import Generic, TypeVar, Type, List, Optional, Dict, Any, Union, Iterator, Iterable, Sequence
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from ..models import Base
@@ -9,6 +12,32 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Rows sent per bulk statement; keeps Postgres well under its 65535 bind parameter limit
+BULK_BATCH_SIZE = 1000
+
+# Dialects with a native INSERT ... ON CONFLICT
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """
+    Group repository writes on a session into one transaction.
+    Writes made inside are committed once when the outermost unit of work exits,
+    or rolled back together if it raises. Nested units of work join the outer one.
+    """
+    db.info["unit_of_work_depth"] = db.info.get("unit_of_work_depth", 0) + 1
+    try:
+        yield db
+        if db.info["unit_of_work_depth"] == 1:
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.info["unit_of_work_depth"] -= 1
+
+
 class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
     Base repository with reusable CRUD operations
@@ -20,6 +49,34 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
         self.db = db
+
+    @property
+    def in_unit_of_work(self) -> bool:
+        """
+        Whether writes are currently being batched by a unit of work
+        """
+        return self.db.info.get("unit_of_work_depth", 0) > 0
+
+    def unit_of_work(self):
+        """
+        Batch writes on this repository's session into a single commit
+        """
+        return unit_of_work(self.db)
+
+    def _commit(self, db_obj: Optional[ModelType] = None) -> None:
+        """
+        Commit and refresh, unless a unit of work will commit the whole batch later
+        """
+        if self.in_unit_of_work:
+            return
+        self.db.commit()
+        if db_obj is not None:
+            self.db.refresh(db_obj)
+
+    def _to_dict(self, obj_in: Union[BaseModel, Dict[str, Any]]) -> Dict[str, Any]:
+        if isinstance(obj_in, dict):
+            return obj_in
+        return obj_in.dict(exclude_unset=True)
     
     def get(self, id: int) -> Optional[ModelType]:
         """
@@ -37,15 +94,10 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         Create a new record
         """
-        if isinstance(obj_in, dict):
-            obj_data = obj_in
-        else:
-            obj_data = obj_in.dict(exclude_unset=True)
-            
+        obj_data = self._to_dict(obj_in)
         db_obj = self.model(**obj_data)
         self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._commit(db_obj)
         return db_obj
     
     def update(
@@ -54,18 +106,13 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         Update a record
         """
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-            
+        update_data = self._to_dict(obj_in)
         for field in update_data:
             if hasattr(db_obj, field):
                 setattr(db_obj, field, update_data[field])
                 
         self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._commit(db_obj)
         return db_obj
     
     def delete(self, id: int) -> ModelType:
@@ -74,5 +121,86 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         obj = self.db.query(self.model).get(id)
         self.db.delete(obj)
-        self.db.commit()
-        return obj
\ No newline at end of file
+        self._commit()
+        return obj
+
+    def bulk_create(
+        self,
+        objs_in: Iterable[Union[CreateSchemaType, Dict[str, Any]]],
+        batch_size: int = BULK_BATCH_SIZE
+    ) -> int:
+        """
+        Insert many records with one multi-row INSERT per batch and a single commit.
+        Unlike create, the inserted objects are not loaded back.
+        Returns the number of rows inserted.
+        """
+        rows = [self._to_dict(obj_in) for obj_in in objs_in]
+        for i in range(0, len(rows), batch_size):
+            self.db.execute(insert(self.model), rows[i:i + batch_size])
+        if rows:
+            self._commit()
+        return len(rows)
+
+    def bulk_upsert(
+        self,
+        objs_in: Iterable[Union[CreateSchemaType, Dict[str, Any]]],
+        index_elements: Optional[Sequence[str]] = None,
+        update_fields: Optional[Sequence[str]] = None,
+        batch_size: int = BULK_BATCH_SIZE
+    ) -> int:
+        """
+        Insert many records, updating the ones that conflict on index_elements
+        (the primary key by default). Only update_fields are overwritten on conflict,
+        defaulting to every other column given; pass an empty list to keep stored rows as they are.
+        Uses INSERT ... ON CONFLICT on Postgres and SQLite, and a keyed lookup elsewhere.
+        Returns the number of distinct rows sent after de-duplicating on index_elements;
+        rows skipped on conflict are counted too, since drivers do not report executemany counts reliably.
+        """
+        index_elements = list(index_elements or [column.name for column in self.model.__table__.primary_key.columns])
+        # The same key twice in one statement is an error on Postgres, so the last row wins
+        rows = {}
+        for obj_in in objs_in:
+            row = self._to_dict(obj_in)
+            rows[tuple(row[field] for field in index_elements)] = row
+        if not rows:
+            return 0
+        rows = list(rows.values())
+        if update_fields is None:
+            update_fields = [field for field in rows[0] if field not in index_elements]
+
+        dialect_insert = _UPSERT_INSERTS.get(self.db.get_bind().dialect.name)
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i + batch_size]
+            if dialect_insert is None:
+                self._upsert_by_lookup(batch, index_elements, update_fields)
+                continue
+            statement = dialect_insert(self.model)
+            if update_fields:
+                statement = statement.on_conflict_do_update(
+                    index_elements=index_elements,
+                    set_={field: statement.excluded[field] for field in update_fields}
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=index_elements)
+            self.db.execute(statement, batch)
+        self._commit()
+        return len(rows)
+
+    def _upsert_by_lookup(self, rows: List[Dict[str, Any]], index_elements: List[str], update_fields: Sequence[str]) -> None:
+        """
+        Upsert for dialects without ON CONFLICT: one query for the stored keys,
+        then a bulk INSERT of the new rows and a bulk UPDATE of the others
+        """
+        columns = [getattr(self.model, field) for field in index_elements]
+        keys = [tuple(row[field] for field in index_elements) for row in rows]
+        existing = {tuple(row) for row in self.db.execute(select(*columns).where(tuple_(*columns).in_(keys)))}
+        new_rows = [row for key, row in zip(keys, rows) if key not in existing]
+        if new_rows:
+            self.db.execute(insert(self.model), new_rows)
+        updates = [
+            {**{field: row[field] for field in index_elements}, **{field: row[field] for field in update_fields}}
+            for key, row in zip(keys, rows) if key in existing
+        ]
+        if updates and update_fields:
+            # ORM bulk UPDATE matches rows by primary key, so index_elements must be the primary key here
+            self.db.execute(update(self.model), updates)
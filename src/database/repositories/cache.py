@@ -109,6 +109,46 @@ class FinancialDataCacheRepository(BaseRepository[FinancialDataCache, DataCacheC
                 data=data
             )
             return self.create(new_cache)
+
+    def bulk_update_or_create(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        Update or create many cache entries with one lookup query and a single commit.
+        Each entry takes the same fields as update_or_create.
+        Returns the number of entries written.
+        """
+        if not entries:
+            return 0
+
+        # Latest stored entry per (ticker, data_type, time_period), found in one query
+        existing = {}
+        stored = (
+            self.db.query(FinancialDataCache)
+            .filter(
+                FinancialDataCache.ticker.in_({entry["ticker"] for entry in entries}),
+                FinancialDataCache.data_type.in_({entry["data_type"] for entry in entries})
+            )
+            .order_by(FinancialDataCache.last_updated)
+            .all()
+        )
+        for cache_entry in stored:
+            existing[(cache_entry.ticker, cache_entry.data_type, cache_entry.time_period)] = cache_entry
+            # Like get_by_ticker_and_type, no time period matches the latest entry of any period
+            existing[(cache_entry.ticker, cache_entry.data_type, None)] = cache_entry
+
+        new_entries = []
+        with self.unit_of_work():
+            for entry in entries:
+                cache_entry = existing.get((entry["ticker"], entry["data_type"], entry.get("time_period")))
+                if cache_entry is None:
+                    new_entries.append(DataCacheCreate(**entry).dict())
+                    continue
+                cache_entry.data = entry["data"]
+                cache_entry.last_updated = datetime.utcnow()
+                if entry.get("end_date"):
+                    cache_entry.end_date = entry["end_date"]
+            self.db.flush()
+            self.bulk_create(new_entries)
+        return len(entries)
     
     def clear_old_cache(self, days: int = 30) -> int:
         """
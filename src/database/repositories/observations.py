@@ -0,0 +1,231 @@
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+from ..models import (
+    PriceObservation, FinancialMetricObservation, LineItemObservation,
+    InsiderTradeObservation, CompanyNewsObservation
+)
+from .base import BaseRepository
+
+# Primary keys looked up per query when merging into rows that are already stored
+KEY_LOOKUP_CHUNK_SIZE = 500
+
+
+def identity_key(*values: Any) -> str:
+    """
+    Stable hash of the fields that tell apart observations sharing a ticker and date
+    """
+    return hashlib.sha1(json.dumps(values, default=str).encode()).hexdigest()
+
+
+class ObservationRepository(BaseRepository, ABC):
+    """
+    Base repository for row-per-observation market data.
+    Rows are keyed by ticker plus a date column; range reads are indexed SQL queries
+    and appends are bulk upserts that leave rows already stored untouched.
+    """
+
+    date_column = "date"
+
+    def __init__(self, model, db: Session):
+        super().__init__(model, db)
+        self.key_columns = list(model.__table__.primary_key.columns)
+
+    @abstractmethod
+    def to_row(self, ticker: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert an API record into a table row
+        """
+
+    @abstractmethod
+    def to_dict(self, obj) -> Dict[str, Any]:
+        """
+        Convert a table row back into an API record
+        """
+
+    def row_key(self, row: Dict[str, Any]) -> Tuple:
+        return tuple(row[column.name] for column in self.key_columns)
+
+    def get_range(
+        self,
+        ticker: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+        **filters: Any
+    ) -> List[Any]:
+        """
+        Get a ticker's observations in the inclusive date range, ordered by date
+        """
+        date_column = getattr(self.model, self.date_column)
+        query = self.db.query(self.model).filter(self.model.ticker == ticker)
+        if start_date:
+            query = query.filter(date_column >= start_date)
+        if end_date:
+            query = query.filter(date_column <= end_date)
+        for field, value in filters.items():
+            query = query.filter(getattr(self.model, field) == value)
+        query = query.order_by(date_column.desc() if descending else date_column)
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
+    def get_dicts(self, ticker: str, start_date: Optional[str] = None, end_date: Optional[str] = None, **kwargs: Any) -> List[Dict[str, Any]]:
+        """
+        Get a ticker's observations in the date range as API records
+        """
+        return [self.to_dict(obj) for obj in self.get_range(ticker, start_date, end_date, **kwargs)]
+
+    def latest_update(self, ticker: str) -> Optional[datetime]:
+        """
+        Get when a ticker's observations were last written, or None if there are none
+        """
+        return self.db.scalar(select(func.max(self.model.last_updated)).where(self.model.ticker == ticker))
+
+    def insert_new(self, ticker: str, items: List[Dict[str, Any]]) -> int:
+        """
+        Bulk insert observations, skipping any already stored.
+        Returns the number of distinct observations given, including those that were already stored.
+        """
+        return self.bulk_upsert([self.to_row(ticker, item) for item in items], update_fields=[])
+
+    def upsert(self, ticker: str, items: List[Dict[str, Any]]) -> int:
+        """
+        Bulk insert observations, overwriting any already stored with the same key.
+        Returns the number of distinct observations given.
+        """
+        return self.bulk_upsert([self.to_row(ticker, item) for item in items])
+
+
+class PriceObservationRepository(ObservationRepository):
+    """
+    Repository for daily price bars, keyed by ticker and date
+    """
+
+    def __init__(self, db: Session):
+        super().__init__(PriceObservation, db)
+
+    def to_row(self, ticker: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "ticker": ticker,
+            "date": item["time"][:10],
+            "time": item["time"],
+            "open": item["open"],
+            "close": item["close"],
+            "high": item["high"],
+            "low": item["low"],
+            "volume": item["volume"],
+            "last_updated": datetime.utcnow(),
+        }
+
+    def to_dict(self, obj: PriceObservation) -> Dict[str, Any]:
+        return {"open": obj.open, "close": obj.close, "high": obj.high, "low": obj.low, "volume": obj.volume, "time": obj.time}
+
+
+class FinancialMetricObservationRepository(ObservationRepository):
+    """
+    Repository for financial metrics, keyed by ticker, report period and period
+    """
+
+    date_column = "report_period"
+
+    def __init__(self, db: Session):
+        super().__init__(FinancialMetricObservation, db)
+
+    def to_row(self, ticker: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "ticker": ticker,
+            "report_period": item["report_period"],
+            "period": item["period"],
+            "currency": item.get("currency"),
+            "data": item,
+            "last_updated": datetime.utcnow(),
+        }
+
+    def to_dict(self, obj: FinancialMetricObservation) -> Dict[str, Any]:
+        return obj.data
+
+
+class LineItemObservationRepository(FinancialMetricObservationRepository):
+    """
+    Repository for line items, keyed by ticker, report period and period.
+    Each row holds the union of every line item fetched for its report period.
+    """
+
+    def __init__(self, db: Session):
+        ObservationRepository.__init__(self, LineItemObservation, db)
+
+    def merge(self, ticker: str, items: List[Dict[str, Any]]) -> None:
+        """
+        Insert new report periods and merge new fields into the ones already stored
+        """
+        rows = {}
+        for item in items:
+            row = self.to_row(ticker, item)
+            key = self.row_key(row)
+            if key in rows:
+                row["data"] = {**rows[key]["data"], **row["data"]}
+            rows[key] = row
+
+        keys = list(rows)
+        for i in range(0, len(keys), KEY_LOOKUP_CHUNK_SIZE):
+            # Select plain columns so no stale objects linger in the session after the upsert
+            statement = select(*self.key_columns, self.model.data).where(tuple_(*self.key_columns).in_(keys[i:i + KEY_LOOKUP_CHUNK_SIZE]))
+            for *key, data in self.db.execute(statement):
+                rows[tuple(key)]["data"] = {**data, **rows[tuple(key)]["data"]}
+        self.bulk_upsert(rows.values())
+
+
+class InsiderTradeObservationRepository(ObservationRepository):
+    """
+    Repository for insider trades, keyed by ticker, filing date and trade identity
+    """
+
+    FIELDS = (
+        "issuer", "name", "title", "is_board_director", "transaction_date", "transaction_shares",
+        "transaction_price_per_share", "transaction_value", "shares_owned_before_transaction",
+        "shares_owned_after_transaction", "security_title", "filing_date",
+    )
+
+    def __init__(self, db: Session):
+        super().__init__(InsiderTradeObservation, db)
+
+    def to_row(self, ticker: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        row = {field: item.get(field) for field in self.FIELDS}
+        row.update(
+            ticker=ticker,
+            trade_key=identity_key(
+                item["filing_date"], item.get("transaction_date"), item.get("name"), item.get("security_title"),
+                item.get("transaction_shares"), item.get("transaction_price_per_share"),
+            ),
+            date=item.get("transaction_date") or item["filing_date"],
+            last_updated=datetime.utcnow(),
+        )
+        return row
+
+    def to_dict(self, obj: InsiderTradeObservation) -> Dict[str, Any]:
+        return {"ticker": obj.ticker, **{field: getattr(obj, field) for field in self.FIELDS}}
+
+
+class CompanyNewsObservationRepository(ObservationRepository):
+    """
+    Repository for company news, keyed by ticker, date and article identity
+    """
+
+    FIELDS = ("title", "author", "source", "date", "url", "sentiment")
+
+    def __init__(self, db: Session):
+        super().__init__(CompanyNewsObservation, db)
+
+    def to_row(self, ticker: str, item: Dict[str, Any]) -> Dict[str, Any]:
+        row = {field: item.get(field) for field in self.FIELDS}
+        row.update(ticker=ticker, news_key=identity_key(item.get("url"), item.get("title")), last_updated=datetime.utcnow())
+        return row
+
+    def to_dict(self, obj: CompanyNewsObservation) -> Dict[str, Any]:
+        return {"ticker": obj.ticker, **{field: getattr(obj, field) for field in self.FIELDS}}
@@ -1,6 +1,7 @@
 from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
-from ..models import Portfolio, Position
+from datetime import datetime
+from sqlalchemy.orm import Session, selectinload
+from ..models import Portfolio, Position, Trade
 from .base import BaseRepository
 from pydantic import BaseModel
 
@@ -53,10 +54,44 @@ class PortfolioRepository(BaseRepository[Portfolio, PortfolioCreate, PortfolioUp
         """
         return (
             self.db.query(Portfolio)
+            .options(selectinload(Portfolio.positions))
             .filter(Portfolio.id == portfolio_id)
             .first()
         )
 
+    def get_snapshot(self, portfolio_id: int, trade_limit: int = 20) -> Optional[Dict[str, Any]]:
+        """
+        Get a portfolio with its positions and latest trades in three queries,
+        whatever the number of positions.
+        Returns None if the portfolio does not exist.
+        """
+        portfolio = self.get_portfolio_with_positions(portfolio_id)
+        if portfolio is None:
+            return None
+
+        latest_trades = (
+            self.db.query(Trade)
+            .filter(Trade.portfolio_id == portfolio_id)
+            .order_by(Trade.timestamp.desc())
+            .limit(trade_limit)
+            .all()
+        )
+        return {
+            "portfolio": portfolio,
+            "positions": list(portfolio.positions),
+            "latest_trades": latest_trades,
+            "total_value": portfolio.calculate_total_value(),
+        }
+
+    def get_hedge_fund_portfolio(self, portfolio_id: int, tickers: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get a portfolio in the dict shape run_hedge_fund takes as portfolio
+        """
+        portfolio = self.get_portfolio_with_positions(portfolio_id)
+        if portfolio is None:
+            return None
+        return portfolio.to_hedge_fund_portfolio(tickers)
+
 class PositionRepository(BaseRepository[Position, PositionCreate, PositionUpdate]):
     """
     Repository for Position operations
@@ -85,6 +120,27 @@ class PositionRepository(BaseRepository[Position, PositionCreate, PositionUpdate
         position = self.get(position_id)
         if position:
             position.last_price = price
-            self.db.commit()
-            self.db.refresh(position)
-        return position
\ No newline at end of file
+            position.last_updated = datetime.utcnow()
+            self._commit(position)
+        return position
+
+    def revalue_positions(self, portfolio_id: int, prices: Dict[str, float]) -> List[Position]:
+        """
+        Update the last price of every position in a portfolio from a ticker -> price map.
+        Loads the positions in one query and writes them back in one batched UPDATE.
+        Positions without a price in the map are left as they are.
+        """
+        if not prices:
+            return []
+        positions = (
+            self.db.query(Position)
+            .filter(Position.portfolio_id == portfolio_id, Position.ticker.in_(list(prices)))
+            .all()
+        )
+        now = datetime.utcnow()
+        for position in positions:
+            position.last_price = prices[position.ticker]
+            position.last_updated = now
+        if positions:
+            self._commit()
+        return positions
\ No newline at end of file
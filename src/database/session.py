@@ -1,9 +1,14 @@
+from typing import TYPE_CHECKING, AsyncIterator, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
 import os
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
 # Load environment variables
 load_dotenv()
 
@@ -45,4 +50,73 @@ def init_db():
     Call this function when starting your application.
     """
     from .models import Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+
+
+# Async drivers used when ASYNC_DATABASE_URL is not set
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Swap a database URL's driver for its async counterpart
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for database URL: {url}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+# Defaults to DATABASE_URL with its driver swapped for the async one
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Created on first use, so sync-only callers don't need an async driver or greenlet installed
+_async_engine: Optional["AsyncEngine"] = None
+_async_session_factory: Optional["async_sessionmaker"] = None
+
+
+def get_async_engine() -> "AsyncEngine":
+    """
+    Get the shared async engine, creating it on first use
+    """
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL or to_async_url(DATABASE_URL), pool_pre_ping=True, pool_recycle=3600)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> "AsyncSession":
+    """
+    Create a new async session.
+    Objects stay loaded after commit, since lazy loads can't run outside the event loop's await points.
+    """
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _async_session_factory = async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_session_factory()
+
+
+# Dependency to get an async DB session
+async def get_async_db() -> AsyncIterator["AsyncSession"]:
+    """
+    Get an async database session.
+    Use this as a FastAPI dependency so concurrent requests don't each hold a thread for their queries.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def init_async_db():
+    """
+    Initialize the database by creating all tables, using the async engine
+    """
+    from .models import Base
+    async with get_async_engine().begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
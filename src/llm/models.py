@@ -1,4 +1,5 @@
 import os
+import threading
 from langchain_anthropic import ChatAnthropic
 from langchain_deepseek import ChatDeepSeek
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -6,7 +7,7 @@ from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 from enum import Enum
 from pydantic import BaseModel
-from typing import Tuple
+from typing import Any, Tuple
 
 
 class ModelProvider(str, Enum):
@@ -151,4 +152,41 @@ def get_model(model_name: str, model_provider: ModelProvider) -> ChatOpenAI | Ch
         if not api_key:
             print(f"API Key Error: Please make sure GOOGLE_API_KEY is set in your .env file.")
             raise ValueError("Google API key not found.  Please make sure GOOGLE_API_KEY is set in your .env file.")
-        return ChatGoogleGenerativeAI(model=model_name, api_key=api_key)
\ No newline at end of file
+        return ChatGoogleGenerativeAI(model=model_name, api_key=api_key)
+
+
+# Clients built by get_cached_model, keyed by (provider, model, output schema)
+_model_registry: dict[tuple, Any] = {}
+_model_registry_lock = threading.Lock()
+
+
+def get_cached_model(model_name: str, model_provider: ModelProvider, pydantic_model: type[BaseModel] | None = None) -> Any:
+    """
+    Get a client for a model, built once per process and shared across threads.
+    With a pydantic_model, JSON-mode models are wrapped for structured output of that schema.
+    """
+    provider = getattr(model_provider, "value", model_provider)
+    key = (provider, model_name, pydantic_model)
+    model = _model_registry.get(key)
+    if model is not None:
+        return model
+
+    with _model_registry_lock:
+        model = _model_registry.get(key)
+        if model is None:
+            # The base client is shared by every schema requested for the same model
+            base_key = (provider, model_name, None)
+            model = _model_registry.get(base_key)
+            if model is None:
+                model = _model_registry[base_key] = get_model(model_name, model_provider)
+            model_info = get_model_info(model_name)
+            if pydantic_model is not None and not (model_info and not model_info.has_json_mode()):
+                model = model.with_structured_output(pydantic_model, method="json_mode")
+            _model_registry[key] = model
+        return model
+
+
+def clear_model_registry():
+    """Drop cached clients, e.g. after API keys change."""
+    with _model_registry_lock:
+        _model_registry.clear()
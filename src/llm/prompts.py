@@ -0,0 +1,124 @@
+"""
+Compact prompt encoding and prompt token accounting.
+
+Persona agents send each ticker's analysis as JSON. encode_analysis writes it without
+indentation, with floats rounded to a few significant digits and long "details" text pruned,
+so prompt size stays proportional to the facts rather than their formatting.
+"""
+
+import json
+import math
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+try:
+    import tiktoken
+except ImportError:  # Installed with langchain-openai; otherwise token counts are estimated
+    tiktoken = None
+
+# Significant digits kept for floats in prompts
+FLOAT_SIGNIFICANT_DIGITS = 4
+# Longest "details" text kept per analysis section; longer text is cut at a "; " boundary
+DETAILS_MAX_CHARS = int(os.environ.get("LLM_PROMPT_DETAILS_MAX_CHARS") or 300)
+# Characters per token used when tiktoken is unavailable
+_CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_failed = False
+# Per-agent totals of every run in progress: a context variable, so threads and tasks started by a run
+# (which copy its context) add to that run's totals and concurrent runs in one process stay apart
+_token_trackers: ContextVar[tuple[dict[str, dict[str, int]], ...]] = ContextVar("prompt_token_trackers", default=())
+_token_stats_lock = threading.Lock()
+
+
+def _prune_details(details: str) -> str:
+    if len(details) <= DETAILS_MAX_CHARS:
+        return details
+    cut = details.rfind("; ", 0, DETAILS_MAX_CHARS)
+    return (details[:cut] if cut > 0 else details[:DETAILS_MAX_CHARS]) + "; ..."
+
+
+def compact_value(value: Any, key: str | None = None) -> Any:
+    """Round floats and prune details text throughout a JSON-like value."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        rounded = float(f"{value:.{FLOAT_SIGNIFICANT_DIGITS}g}")
+        return int(rounded) if rounded.is_integer() and abs(rounded) < 1e15 else rounded
+    if isinstance(value, dict):
+        return {k: compact_value(v, k) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [compact_value(item, key) for item in value]
+    if isinstance(value, str) and key == "details":
+        return _prune_details(value)
+    return value
+
+
+def encode_analysis(analysis: Any) -> str:
+    """Encode analysis data for a prompt as compact JSON."""
+    return json.dumps(compact_value(analysis), separators=(",", ":"), default=str)
+
+
+def prompt_text(prompt: Any) -> str:
+    """Flatten a prompt (string, prompt value or message list) into its text."""
+    if hasattr(prompt, "to_messages"):
+        prompt = prompt.to_messages()
+    if isinstance(prompt, (list, tuple)):
+        return "\n".join(str(getattr(message, "content", message)) for message in prompt)
+    return str(prompt)
+
+
+def count_prompt_tokens(prompt: Any) -> int:
+    """Count a prompt's tokens with tiktoken's cl100k encoding, or estimate them without it."""
+    global _encoding, _encoding_failed
+    text = prompt_text(prompt)
+    if tiktoken is not None and not _encoding_failed:
+        try:
+            if _encoding is None:
+                # Downloaded on first use, which can fail offline
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            return len(_encoding.encode(text))
+        except Exception:
+            # Token counts are only statistics: never fail the LLM call over them
+            _encoding_failed = _encoding is None
+    return math.ceil(len(text) / _CHARS_PER_TOKEN)
+
+
+def _add_stats(totals: dict[str, dict[str, int]], agent_name: str, calls: int, tokens: int, max_tokens: int):
+    stats = totals.setdefault(agent_name, {"calls": 0, "prompt_tokens": 0, "max_prompt_tokens": 0})
+    stats["calls"] += calls
+    stats["prompt_tokens"] += tokens
+    stats["max_prompt_tokens"] = max(stats["max_prompt_tokens"], max_tokens)
+
+
+def record_prompt_tokens(agent_name: str | None, tokens: int):
+    """Add one LLM call's prompt tokens to the per-agent totals of the runs in progress."""
+    with _token_stats_lock:
+        for totals in _token_trackers.get():
+            _add_stats(totals, agent_name or "unknown", 1, tokens, tokens)
+
+
+@contextmanager
+def track_prompt_tokens() -> Iterator[dict[str, dict[str, int]]]:
+    """
+    Collect the LLM calls and prompt tokens sent per agent inside the block, including each agent's largest prompt.
+    Blocks can nest; each one only sees the calls made while it is open.
+    """
+    totals: dict[str, dict[str, int]] = {}
+    token = _token_trackers.set(_token_trackers.get() + (totals,))
+    try:
+        yield totals
+    finally:
+        _token_trackers.reset(token)
+
+
+def merge_prompt_token_stats(totals: dict[str, dict[str, int]], stats: dict[str, dict[str, int]]):
+    """Add one run's per-agent prompt token stats into running totals, e.g. across a backtest's trading days."""
+    with _token_stats_lock:
+        for agent_name, agent_stats in stats.items():
+            _add_stats(totals, agent_name, agent_stats["calls"], agent_stats["prompt_tokens"], agent_stats["max_prompt_tokens"])
@@ -0,0 +1,191 @@
+"""
+Persistent cache of structured LLM responses.
+
+Responses are keyed by model, provider, output schema and the fully rendered prompt, so a
+re-run over the same data (e.g. a repeated backtest) is answered without calling the provider.
+Set LLM_CACHE_MODE=readonly to serve cached responses without storing new ones, for
+reproducible backtests, or LLM_CACHE_MODE=off to disable the cache.
+
+The cache never fails an LLM call: if the database can't be opened, read or written (locked,
+corrupt, read-only disk), the lookup counts as a miss and the response is simply not stored.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any
+
+from pydantic import BaseModel
+
+CACHE_MODES = ("readwrite", "readonly", "off")
+
+# Least recently used responses evicted per statement once the cache is over its size cap
+_EVICTION_BATCH = 100
+
+_llm_cache_config = {
+    "path": os.environ.get("LLM_CACHE_PATH") or os.path.join(os.path.expanduser("~"), ".cache", "ai-hedge-fund", "llm_responses.db"),
+    "max_bytes": int(float(os.environ.get("LLM_CACHE_MAX_MB") or 512) * 1024 * 1024),
+    "mode": (os.environ.get("LLM_CACHE_MODE") or "readwrite").strip().lower(),
+}
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def render_prompt(prompt: Any) -> Any:
+    """Render a prompt (string, prompt value or message list) into JSON-serializable form."""
+    if hasattr(prompt, "to_messages"):
+        prompt = prompt.to_messages()
+    if isinstance(prompt, (list, tuple)):
+        return [[getattr(message, "type", None), getattr(message, "content", message)] for message in prompt]
+    return str(prompt)
+
+
+def response_key(prompt: Any, model_name: str, model_provider: str, pydantic_model: type[BaseModel]) -> str:
+    """Content address of an LLM call: model, provider, output schema and rendered prompt."""
+    payload = [model_name, model_provider, pydantic_model.model_json_schema(), render_prompt(prompt)]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """SQLite store of structured LLM outputs, zlib-compressed, with least-recently-used eviction past max_bytes."""
+
+    def __init__(self, path: str, max_bytes: int, read_only: bool = False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "errors": 0}
+        if read_only:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT, provider TEXT, schema TEXT, data BLOB, size INTEGER, last_used REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used_idx ON responses (last_used)")
+            self._conn.commit()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached output for a key, marking it as recently used. Errors count as a miss."""
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT data FROM responses WHERE key = ?", (key,)).fetchone()
+                data = json.loads(zlib.decompress(row[0])) if row is not None else None
+            except (sqlite3.Error, zlib.error, ValueError) as e:
+                self._on_error("read", e)
+                data = None
+            if data is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            if not self.read_only:
+                try:
+                    self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    # The hit is still good; only its recency is lost
+                    self._on_error("update", e)
+                    self._recover()
+        return data
+
+    def set(self, key: str, model_name: str, model_provider: str, schema_name: str, data: dict):
+        """Store an output, then evict least recently used outputs down to the size cap."""
+        if self.read_only:
+            return
+        blob = zlib.compress(json.dumps(data).encode())
+        with self._lock:
+            try:
+                self._store(key, model_name, model_provider, schema_name, blob)
+            except sqlite3.Error as e:
+                self._on_error("write", e)
+                self._recover()
+
+    def _store(self, key: str, model_name: str, model_provider: str, schema_name: str, blob: bytes):
+        previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, model_name, model_provider, schema_name, blob, len(blob), time.time()),
+        )
+        self._bytes += len(blob) - (previous[0] if previous else 0)
+        while self._bytes > self.max_bytes:
+            oldest = self._conn.execute("SELECT key, size FROM responses WHERE key != ? ORDER BY last_used LIMIT ?", (key, _EVICTION_BATCH)).fetchall()
+            if not oldest:
+                break
+            for evicted_key, size in oldest:
+                if self._bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (evicted_key,))
+                self._bytes -= size
+                self._stats["evictions"] += 1
+        self._conn.commit()
+        self._stats["writes"] += 1
+
+    def _recover(self):
+        """Drop a failed write and re-read the cache size, which it may have left out of step."""
+        try:
+            self._conn.rollback()
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        except sqlite3.Error:
+            pass
+
+    def _on_error(self, operation: str, error: Exception):
+        self._stats["errors"] += 1
+        # Reported once, not on every call that falls back
+        if self._stats["errors"] == 1:
+            print(f"Warning: LLM response cache {operation} failed, continuing without it: {error}")
+
+    def stats(self) -> dict[str, int]:
+        """Get hit/miss/write/eviction/error counts and current size."""
+        with self._lock:
+            return {**self._stats, "bytes": self._bytes, "max_bytes": self.max_bytes}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _check_mode(mode: str):
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown LLM cache mode: {mode}. Expected one of {CACHE_MODES}")
+
+
+def configure_llm_cache(path: str | None = None, max_bytes: int | None = None, mode: str | None = None):
+    """Override LLM response cache settings. The cache is reopened on next use."""
+    global _llm_cache
+    if mode is not None:
+        _check_mode(mode)
+    updates = {"path": path, "max_bytes": max_bytes, "mode": mode}
+    with _llm_cache_lock:
+        _llm_cache_config.update({key: value for key, value in updates.items() if value is not None})
+        if _llm_cache is not None:
+            _llm_cache.close()
+            _llm_cache = None
+
+
+def get_llm_cache() -> LLMResponseCache | None:
+    """Get the shared LLM response cache, or None if it is disabled or a read-only cache does not exist."""
+    global _llm_cache
+    mode = _llm_cache_config["mode"]
+    if mode == "off":
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            # LLM_CACHE_MODE from the environment is checked here, on first use
+            _check_mode(mode)
+            read_only = mode == "readonly"
+            if read_only and not os.path.exists(_llm_cache_config["path"]):
+                return None
+            try:
+                _llm_cache = LLMResponseCache(_llm_cache_config["path"], _llm_cache_config["max_bytes"], read_only=read_only)
+            except (sqlite3.Error, OSError) as e:
+                # Not retried on every call; configure_llm_cache turns it back on
+                print(f"Warning: could not open the LLM response cache at {_llm_cache_config['path']}, disabling it: {e}")
+                _llm_cache_config["mode"] = "off"
+                return None
+        return _llm_cache
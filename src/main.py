@@ -1,6 +1,11 @@
+import asyncio
 import sys
 
 from dotenv import load_dotenv
+
+# Load environment variables from .env file first: the data, cache and LLM modules read their settings on import
+load_dotenv()
+
 from langchain_core.messages import HumanMessage
 from langgraph.graph import END, StateGraph
 from colorama import Fore, Back, Style, init
@@ -15,10 +20,12 @@ from agents.sentiment import sentiment_agent
 from agents.warren_buffett import warren_buffett_agent
 from graph.state import AgentState
 from agents.valuation import valuation_agent
-from utils.display import print_trading_output
+from utils.display import print_trading_output, print_prompt_token_stats
 from utils.analysts import ANALYST_ORDER, get_analyst_nodes
+from utils.data_planner import prefetch_analyst_data
 from utils.progress import progress
 from llm.models import LLM_ORDER, get_model_info
+from llm.prompts import track_prompt_tokens
 
 import argparse
 from datetime import datetime
@@ -27,9 +34,6 @@ from tabulate import tabulate
 from utils.visualize import save_graph_as_png
 import json
 
-# Load environment variables from .env file
-load_dotenv()
-
 init(autoreset=True)
 
 
@@ -59,43 +63,59 @@ def run_hedge_fund(
     selected_analysts: list[str] = [],
     model_name: str = "gpt-4o",
     model_provider: str = "OpenAI",
+    use_async: bool = False,
+    llm_batch_size: int | None = None,
+    prefetch: bool = True,
 ):
     # Start progress tracking
     progress.start()
 
     try:
         # Create a new workflow if analysts are customized
-        if selected_analysts:
-            workflow = create_workflow(selected_analysts)
+        if selected_analysts or use_async:
+            workflow = create_workflow(selected_analysts or None, use_async=use_async)
             agent = workflow.compile()
         else:
             agent = app
 
-        final_state = agent.invoke(
-            {
-                "messages": [
-                    HumanMessage(
-                        content="Make trading decisions based on the provided data.",
-                    )
-                ],
-                "data": {
-                    "tickers": tickers,
-                    "portfolio": portfolio,
-                    "start_date": start_date,
-                    "end_date": end_date,
-                    "analyst_signals": {},
-                },
-                "metadata": {
-                    "show_reasoning": show_reasoning,
-                    "model_name": model_name,
-                    "model_provider": model_provider,
-                },
+        # Pre-flight: fetch everything the selected analysts read, concurrently and in
+        # multi-ticker requests where possible. Agents fall back to fetching on their own if this fails.
+        # Callers that prefetched a wider range themselves (the backtester) skip it.
+        if prefetch:
+            try:
+                prefetch_analyst_data(selected_analysts, tickers, start_date, end_date)
+            except Exception as e:
+                print(f"Warning: data prefetch failed: {e}")
+
+        inputs = {
+            "messages": [
+                HumanMessage(
+                    content="Make trading decisions based on the provided data.",
+                )
+            ],
+            "data": {
+                "tickers": tickers,
+                "portfolio": portfolio,
+                "start_date": start_date,
+                "end_date": end_date,
+                "analyst_signals": {},
+            },
+            "metadata": {
+                "show_reasoning": show_reasoning,
+                "model_name": model_name,
+                "model_provider": model_provider,
+                "llm_batch_size": llm_batch_size,
             },
-        )
+        }
+        # The async graph runs each analyst's per-ticker LLM calls concurrently
+        with track_prompt_tokens() as prompt_token_stats:
+            final_state = asyncio.run(agent.ainvoke(inputs)) if use_async else agent.invoke(inputs)
 
         return {
             "decisions": parse_hedge_fund_response(final_state["messages"][-1].content),
             "analyst_signals": final_state["data"]["analyst_signals"],
+            # This run's LLM calls only
+            "prompt_token_stats": prompt_token_stats,
         }
     finally:
         # Stop progress tracking
@@ -107,13 +127,13 @@ def start(state: AgentState):
     return state
 
 
-def create_workflow(selected_analysts=None):
-    """Create the workflow with selected analysts."""
+def create_workflow(selected_analysts=None, use_async=False):
+    """Create the workflow with selected analysts. An async workflow must be run with ainvoke."""
     workflow = StateGraph(AgentState)
     workflow.add_node("start_node", start)
 
     # Get analyst nodes from the configuration
-    analyst_nodes = get_analyst_nodes()
+    analyst_nodes = get_analyst_nodes(use_async)
 
     # Default to all analysts if none selected
     if selected_analysts is None:
@@ -165,6 +185,8 @@ if __name__ == "__main__":
     parser.add_argument(
         "--show-agent-graph", action="store_true", help="Show the agent graph"
     )
+    parser.add_argument("--async-llm", action="store_true", help="Make each analyst's per-ticker LLM calls concurrently")
+    parser.add_argument("--llm-batch-size", type=int, help="Tickers per persona analyst LLM call. Defaults to LLM_BATCH_SIZE, or 1")
 
     args = parser.parse_args()
 
@@ -221,7 +243,7 @@ if __name__ == "__main__":
             print(f"\nSelected model: {Fore.GREEN + Style.BRIGHT}{model_choice}{Style.RESET_ALL}\n")
 
     # Create the workflow with selected analysts
-    workflow = create_workflow(selected_analysts)
+    workflow = create_workflow(selected_analysts, use_async=args.async_llm)
     app = workflow.compile()
 
     if args.show_agent_graph:
@@ -286,5 +308,8 @@ if __name__ == "__main__":
         selected_analysts=selected_analysts,
         model_name=model_choice,
         model_provider=model_provider,
+        use_async=args.async_llm,
+        llm_batch_size=args.llm_batch_size,
     )
     print_trading_output(result)
+    print_prompt_token_stats(result["prompt_token_stats"])
@@ -1,8 +1,21 @@
+import asyncio
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Iterator
+
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
 from data.cache import get_cache
+from data.intervals import IntervalSet
+from data.price_store import columns_to_rows
 from data.models import (
     CompanyNews,
     CompanyNewsResponse,
@@ -15,40 +28,280 @@ from data.models import (
     InsiderTrade,
     InsiderTradeResponse,
 )
+from tools.rate_limit import RETRYABLE_STATUS_CODES, RateLimiter, backoff_delay, parse_rates, parse_retry_after
+from tools.replay import ResponseArchive, StandInAPI
+
+# HTTP client settings, overridable from the environment or configure_http_client()
+_http_config = {
+    "base_url": os.environ.get("FINANCIAL_DATASETS_BASE_URL", "https://api.financialdatasets.ai"),
+    "pool_size": int(os.environ.get("FINANCIAL_DATASETS_POOL_SIZE", "32")),
+    "connect_timeout": float(os.environ.get("FINANCIAL_DATASETS_CONNECT_TIMEOUT", "5")),
+    "read_timeout": float(os.environ.get("FINANCIAL_DATASETS_READ_TIMEOUT", "60")),
+    "max_concurrency": int(os.environ.get("FINANCIAL_DATASETS_MAX_CONCURRENCY", "8")),
+    # Requests per second, by default and per endpoint path (e.g. "prices=20,news=5"); 0 means unlimited
+    "rate_limit": float(os.environ.get("FINANCIAL_DATASETS_RATE_LIMIT") or 0),
+    "endpoint_rate_limits": parse_rates(os.environ.get("FINANCIAL_DATASETS_RATE_LIMITS")),
+    "max_retries": int(os.environ.get("FINANCIAL_DATASETS_MAX_RETRIES", "5")),
+    "line_item_batch_size": int(os.environ.get("FINANCIAL_DATASETS_LINE_ITEM_BATCH_SIZE", "10")),
+    # Long insider trade and news ranges are fetched as concurrent windows of this many days
+    "pagination_window_days": int(os.environ.get("FINANCIAL_DATASETS_PAGINATION_WINDOW_DAYS", "90")),
+    # Record responses to, or replay them from, a local archive (see tools/replay.py)
+    "record_path": os.environ.get("FINANCIAL_DATASETS_RECORD") or None,
+    "replay_path": os.environ.get("FINANCIAL_DATASETS_REPLAY") or None,
+}
+_session: requests.Session | None = None
+_rate_limiter: RateLimiter | None = None
+_archive: ResponseArchive | None = None
+_stand_in: StandInAPI | None = None
+# Coverage start used when the API has returned everything up to a date
+_EARLIEST_DATE = "1900-01-01"
+# Retry backoff: first delay bound and the maximum delay, in seconds
+_BACKOFF_BASE = 0.5
+_BACKOFF_CAP = 30.0
+_session_lock = threading.Lock()
+
+
+def configure_http_client(
+    base_url: str | None = None,
+    pool_size: int | None = None,
+    connect_timeout: float | None = None,
+    read_timeout: float | None = None,
+    max_concurrency: int | None = None,
+    record_path: str | None = None,
+    replay_path: str | None = None,
+    rate_limit: float | None = None,
+    endpoint_rate_limits: dict[str, float] | None = None,
+    max_retries: int | None = None,
+):
+    """Override HTTP client settings. The pooled session, worker pools, rate limiter and any archive are rebuilt on next use."""
+    global _session, _rate_limiter, _archive, _stand_in, _executor, _window_executor
+    updates = {
+        "base_url": base_url,
+        "pool_size": pool_size,
+        "connect_timeout": connect_timeout,
+        "read_timeout": read_timeout,
+        "max_concurrency": max_concurrency,
+        "record_path": record_path,
+        "replay_path": replay_path,
+        "rate_limit": rate_limit,
+        "endpoint_rate_limits": endpoint_rate_limits,
+        "max_retries": max_retries,
+    }
+    with _session_lock:
+        _http_config.update({key: value for key, value in updates.items() if value is not None})
+        if _session is not None:
+            _session.close()
+            _session = None
+        _rate_limiter = None
+        # Running tasks finish on the old pools; new work goes to pools of the new size
+        for executor in (_executor, _window_executor):
+            if executor is not None:
+                executor.shutdown(wait=False)
+        _executor, _window_executor = None, None
+        if _archive is not None:
+            _archive.close()
+            _archive, _stand_in = None, None
+
+
+def get_session() -> requests.Session:
+    """Get the shared session whose keep-alive connections are pooled across all endpoints."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_http_config["pool_size"])
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+class _SingleFlight:
+    """Coalesce concurrent calls with the same key into one in-flight call whose result they all share."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: dict[tuple, Future] = {}
+        self._stats = {"calls": 0, "executed": 0, "coalesced": 0}
+
+    def do(self, key: tuple, func):
+        """Run func() unless an identical call is already in flight, in which case wait for its result."""
+        with self._lock:
+            self._stats["calls"] += 1
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._in_flight[key] = Future()
+                self._stats["executed"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            # Later callers start a fresh call; only concurrent ones share this result
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._in_flight)}
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = dict.fromkeys(self._stats, 0)
+
+
+_single_flight = _SingleFlight()
+
+
+def get_request_stats() -> dict[str, int]:
+    """Return API request counters: calls made, requests actually sent, and calls coalesced into an in-flight one."""
+    return _single_flight.stats()
+
+
+def reset_request_stats():
+    """Reset the API request counters."""
+    _single_flight.reset_stats()
+
+
+def _request_key(method: str, path: str, params: dict | None, body: dict | None) -> tuple:
+    return method, path, json.dumps(params, sort_keys=True, default=str), json.dumps(body, sort_keys=True, default=str)
+
+
+def _request(method: str, path: str, ticker: str, params: dict | None = None, json: dict | None = None) -> dict:
+    """
+    Send a request to the financial datasets API through the pooled session.
+    Concurrent identical requests (e.g. from analysts running in parallel) share a single HTTP call.
+    """
+    return _single_flight.do(_request_key(method, path, params, json), lambda: _send_request(method, path, ticker, params, json))
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get the process-wide rate limiter shared by every thread and async task."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _session_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter(_http_config["rate_limit"], _http_config["endpoint_rate_limits"])
+    return _rate_limiter
+
+
+def _get_archive() -> ResponseArchive:
+    """Open the record or replay archive on first use."""
+    global _archive, _stand_in
+    if _archive is None:
+        with _session_lock:
+            if _archive is None:
+                if replay_path := _http_config["replay_path"]:
+                    if not os.path.exists(replay_path):
+                        raise FileNotFoundError(f"Replay archive not found: {replay_path}")
+                    _stand_in = StandInAPI(ResponseArchive(replay_path))
+                    _archive = _stand_in.archive
+                else:
+                    _archive = ResponseArchive(_http_config["record_path"])
+    return _archive
+
+
+def _send_request(method: str, path: str, ticker: str, params: dict | None, json: dict | None) -> dict:
+    if _http_config["replay_path"]:
+        _get_archive()
+        status_code, data = _stand_in.handle(method, path, params, json)
+        if status_code != 200:
+            raise Exception(f"Error fetching data: {ticker} - {status_code} - {data}")
+        return data
+
+    headers = {}
+    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
+        headers["X-API-KEY"] = api_key
+
+    bucket = get_rate_limiter().bucket(path.strip("/"))
+    max_retries = _http_config["max_retries"]
+    for attempt in range(max_retries + 1):
+        bucket.acquire()
+        try:
+            response = get_session().request(
+                method,
+                f"{_http_config['base_url']}{path}",
+                params=params,
+                json=json,
+                headers=headers,
+                timeout=(_http_config["connect_timeout"], _http_config["read_timeout"]),
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+            time.sleep(backoff_delay(attempt, _BACKOFF_BASE, _BACKOFF_CAP))
+            continue
+
+        if response.status_code == 200:
+            bucket.reward()
+            break
+        if response.status_code not in RETRYABLE_STATUS_CODES or attempt == max_retries:
+            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if response.status_code == 429:
+            bucket.penalize(retry_after)
+        time.sleep(backoff_delay(attempt, _BACKOFF_BASE, _BACKOFF_CAP, retry_after))
 
-# Global cache instance
-_cache = get_cache()
+    data = response.json()
+    if _http_config["record_path"]:
+        _get_archive().save(method, path, params, json, data)
+    return data
 
 
 def get_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
-    """Fetch price data from cache or API."""
-    # Check cache first
-    if cached_data := _cache.get_prices(ticker):
-        # Filter cached data by date range and convert to Price objects
-        filtered_data = [Price(**price) for price in cached_data if start_date <= price["time"] <= end_date]
-        if filtered_data:
-            return filtered_data
+    """Fetch price data from cache or API, requesting only the date ranges not cached yet."""
+    _ensure_prices(ticker, start_date, end_date)
+
+    # The store hands back contiguous column slices for the date range
+    cached_columns = get_cache().get_price_columns(ticker, start_date, end_date)
+    if cached_columns is None:
+        return []
+    # Stored columns are already typed, so skip re-validating every row
+    return [Price.model_construct(**price) for price in columns_to_rows(cached_columns)]
+
+
+def _ensure_prices(ticker: str, start_date: str, end_date: str):
+    """Fetch and cache the parts of the date range not covered yet."""
+    cache = get_cache()
+    for gap_start, gap_end in cache.get_coverage("prices", ticker).gaps(start_date, end_date):
+        prices = _fetch_prices(ticker, gap_start, gap_end)
+        if prices:
+            # Cache the results as dicts
+            cache.set_prices(ticker, [p.model_dump() for p in prices])
+            _invalidate_price_frames(ticker)
+        _mark_covered("prices", ticker, gap_start, gap_end)
 
-    # If not in cache or no data in range, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
 
-    url = f"https://api.financialdatasets.ai/prices/?ticker={ticker}&interval=day&interval_multiplier=1&start_date={start_date}&end_date={end_date}"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+def _fetch_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+    """Fetch daily prices for an inclusive date range from the API."""
+    params = {"ticker": ticker, "interval": "day", "interval_multiplier": 1, "start_date": start_date, "end_date": end_date}
+    data = _request("GET", "/prices/", ticker, params=params)
 
     # Parse response with Pydantic model
-    price_response = PriceResponse(**response.json())
-    prices = price_response.prices
+    price_response = PriceResponse(**data)
+    return price_response.prices
+
+
+def _last_final_date() -> str:
+    """The latest date whose data can no longer change: yesterday."""
+    return (datetime.now().date() - timedelta(days=1)).isoformat()
 
-    if not prices:
-        return []
 
-    # Cache the results as dicts
-    _cache.set_prices(ticker, [p.model_dump() for p in prices])
-    return prices
+def _mark_covered(data_type: str, ticker: str, start_date: str, end_date: str):
+    """Record a fetched date range, leaving today and later open since that data can still change."""
+    end_date = min(end_date, _last_final_date())
+    if start_date <= end_date:
+        get_cache().add_coverage(data_type, ticker, start_date, end_date)
 
 
 def get_financial_metrics(
@@ -59,33 +312,23 @@ def get_financial_metrics(
 ) -> list[FinancialMetrics]:
     """Fetch financial metrics from cache or API."""
     # Check cache first
-    if cached_data := _cache.get_financial_metrics(ticker):
-        # Filter cached data by date and limit
-        filtered_data = [FinancialMetrics(**metric) for metric in cached_data if metric["report_period"] <= end_date]
-        filtered_data.sort(key=lambda x: x.report_period, reverse=True)
-        if filtered_data:
-            return filtered_data[:limit]
+    if cached_data := get_cache().find_financial_metrics(ticker, end_date, period, limit):
+        return cached_data
 
     # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
-
-    url = f"https://api.financialdatasets.ai/financial-metrics/?ticker={ticker}&report_period_lte={end_date}&limit={limit}&period={period}"
-    response = requests.get(url, headers=headers)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
+    params = {"ticker": ticker, "report_period_lte": end_date, "limit": limit, "period": period}
+    data = _request("GET", "/financial-metrics/", ticker, params=params)
 
     # Parse response with Pydantic model
-    metrics_response = FinancialMetricsResponse(**response.json())
+    metrics_response = FinancialMetricsResponse(**data)
     # Return the FinancialMetrics objects directly instead of converting to dict
     financial_metrics = metrics_response.financial_metrics
 
     if not financial_metrics:
         return []
 
-    # Cache the results as dicts
-    _cache.set_financial_metrics(ticker, [m.model_dump() for m in financial_metrics])
+    # Cache the already-validated models
+    get_cache().set_financial_metrics(ticker, financial_metrics)
     return financial_metrics
 
 
@@ -96,32 +339,120 @@ def search_line_items(
     period: str = "ttm",
     limit: int = 10,
 ) -> list[LineItem]:
-    """Fetch line items from API."""
-    # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
+    """Fetch line items from cache or API, requesting only the fields not cached yet."""
+    cache = get_cache()
+    report_periods = _cached_line_item_periods(ticker, end_date, period, limit)
+    if report_periods is None:
+        # The cached report periods don't answer this query, so fetch every field
+        missing_fields = list(line_items)
+    else:
+        missing_fields = [field for field in line_items if any(field not in cache.get_line_item_fields(ticker, period, report_period) for report_period in report_periods)]
+
+    if missing_fields:
+        search_results = _fetch_line_items([ticker], missing_fields, end_date, period, limit)
+        report_periods = _cache_line_items(ticker, search_results, missing_fields, end_date, period, limit)
+
+    cached_rows = {item["report_period"]: item for item in cache.get_line_items(ticker) or [] if item["period"] == period}
+    return [LineItem(**cached_rows[report_period]) for report_period in report_periods if report_period in cached_rows]
+
+
+def _cached_line_item_periods(ticker: str, end_date: str, period: str, limit: int) -> list[str] | None:
+    """Return the report periods that answer a line-item query from cache, or None if unknown."""
+    cache = get_cache()
+    # Coverage stops at yesterday, so a query for today or later is looked up as of yesterday
+    interval = cache.get_coverage(f"line_items_{period}", ticker).find(min(end_date, _last_final_date()))
+    if interval is None:
+        return None
 
-    url = "https://api.financialdatasets.ai/financials/search/line-items"
+    # Every report period inside a covered interval is cached, so the newest ones up to
+    # end_date are exactly what the API would return
+    coverage_start = interval[0]
+    report_periods = sorted(
+        {item["report_period"] for item in cache.get_line_items(ticker) or [] if item["period"] == period and coverage_start <= item["report_period"] <= end_date},
+        reverse=True,
+    )
+    if len(report_periods) >= limit or coverage_start == _EARLIEST_DATE:
+        return report_periods[:limit]
+    return None
 
+
+def prefetch_line_items(
+    tickers: list[str],
+    line_items: list[str],
+    end_date: str,
+    period: str = "ttm",
+    limit: int = 10,
+    batch_size: int | None = None,
+) -> int:
+    """
+    Populate the line-item cache for many tickers using multi-ticker requests.
+    Tickers whose requested fields are already cached are skipped. Returns the number of requests made.
+    """
+    cache = get_cache()
+    missing_by_ticker = {}
+    for ticker in tickers:
+        report_periods = _cached_line_item_periods(ticker, end_date, period, limit)
+        if report_periods is None:
+            missing_by_ticker[ticker] = set(line_items)
+        else:
+            missing = {field for field in line_items for report_period in report_periods if field not in cache.get_line_item_fields(ticker, period, report_period)}
+            if missing:
+                missing_by_ticker[ticker] = missing
+
+    if not missing_by_ticker:
+        return 0
+
+    fields = sorted(set().union(*missing_by_ticker.values()))
+    pending = list(missing_by_ticker)
+    batch_size = batch_size or _http_config["line_item_batch_size"]
+    request_count = 0
+    for i in range(0, len(pending), batch_size):
+        batch = pending[i : i + batch_size]
+        # Room for limit periods per ticker, whether the API applies the limit per ticker or to the whole response
+        batch_limit = limit * len(batch)
+        search_results = _fetch_line_items(batch, fields, end_date, period, batch_limit)
+        request_count += 1
+        # A full response may have been cut off before some tickers' older periods
+        truncated = len(search_results) >= batch_limit
+
+        results_by_ticker = {ticker: [] for ticker in batch}
+        for item in search_results:
+            results_by_ticker.setdefault(item.ticker, []).append(item)
+        for ticker in batch:
+            _cache_line_items(ticker, results_by_ticker[ticker], fields, end_date, period, limit, truncated)
+
+    return request_count
+
+
+def _cache_line_items(ticker: str, search_results: list[LineItem], fields: list[str], end_date: str, period: str, limit: int, truncated: bool = False) -> list[str]:
+    """
+    Cache fetched line items for one ticker and return their newest report periods, up to limit.
+    truncated marks results taken from a full multi-ticker response, which may stop short of this ticker's older periods.
+    """
+    search_results = sorted(search_results, key=lambda item: item.report_period, reverse=True)
+    cache = get_cache()
+    cache.set_line_items(ticker, [item.model_dump() for item in search_results])
+    cache.add_line_item_fields(ticker, period, [item.report_period for item in search_results], set(fields))
+    # A short page means there is nothing older; otherwise coverage starts at the oldest period returned
+    if len(search_results) < limit and not truncated:
+        _mark_covered(f"line_items_{period}", ticker, _EARLIEST_DATE, end_date)
+    elif search_results:
+        _mark_covered(f"line_items_{period}", ticker, search_results[-1].report_period, end_date)
+    return [item.report_period for item in search_results[:limit]]
+
+
+def _fetch_line_items(tickers: list[str], line_items: list[str], end_date: str, period: str, limit: int) -> list[LineItem]:
+    """Fetch line items from the API. Multi-ticker callers size the limit for every ticker in the request."""
     body = {
-        "tickers": [ticker],
+        "tickers": tickers,
         "line_items": line_items,
         "end_date": end_date,
         "period": period,
         "limit": limit,
     }
-    response = requests.post(url, headers=headers, json=body)
-    if response.status_code != 200:
-        raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-    data = response.json()
+    data = _request("POST", "/financials/search/line-items", ",".join(tickers), json=body)
     response_model = LineItemResponse(**data)
-    search_results = response_model.search_results
-    if not search_results:
-        return []
-
-    # Cache the results
-    return search_results[:limit]
+    return response_model.search_results
 
 
 def get_insider_trades(
@@ -131,61 +462,60 @@ def get_insider_trades(
     limit: int = 1000,
 ) -> list[InsiderTrade]:
     """Fetch insider trades from cache or API."""
+    # With a bounded range, only fetch the filing-date ranges not cached yet
+    if start_date:
+        _ensure_events("insider_trades", ticker, start_date, end_date, limit)
+        return get_cache().find_insider_trades(ticker, start_date, end_date)
+
     # Check cache first
-    if cached_data := _cache.get_insider_trades(ticker):
-        # Filter cached data by date range
-        filtered_data = [InsiderTrade(**trade) for trade in cached_data 
-                        if (start_date is None or (trade.get("transaction_date") or trade["filing_date"]) >= start_date)
-                        and (trade.get("transaction_date") or trade["filing_date"]) <= end_date]
-        filtered_data.sort(key=lambda x: x.transaction_date or x.filing_date, reverse=True)
-        if filtered_data:
-            return filtered_data
+    if filtered_data := get_cache().find_insider_trades(ticker, start_date, end_date):
+        return filtered_data
+
+    all_trades = _fetch_insider_trades(ticker, end_date, start_date, limit)
+    if not all_trades:
+        return []
+
+    # Cache the results
+    get_cache().set_insider_trades(ticker, all_trades)
+    return all_trades
 
-    # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
 
-    all_trades = []
+def _fetch_insider_trades(ticker: str, end_date: str, start_date: str | None, limit: int) -> list[InsiderTrade]:
+    """Fetch insider trades from the API, paging back to start_date when one is given."""
+    return [trade for page in _iter_insider_trade_pages(ticker, end_date, start_date, limit) for trade in page]
+
+
+def _iter_insider_trade_pages(ticker: str, end_date: str, start_date: str | None, limit: int) -> Iterator[list[InsiderTrade]]:
+    """Yield insider trades from the API page by page, newest first, paging back to start_date when one is given."""
     current_end_date = end_date
-    
+    # Pages overlap on their boundary date, so remember what was already yielded for it
+    boundary_keys = set()
+
     while True:
-        url = f"https://api.financialdatasets.ai/insider-trades/?ticker={ticker}&filing_date_lte={current_end_date}"
+        params = {"ticker": ticker, "filing_date_lte": current_end_date, "limit": limit}
         if start_date:
-            url += f"&filing_date_gte={start_date}"
-        url += f"&limit={limit}"
-        
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-        
-        data = response.json()
+            params["filing_date_gte"] = start_date
+        data = _request("GET", "/insider-trades/", ticker, params=params)
         response_model = InsiderTradeResponse(**data)
         insider_trades = response_model.insider_trades
-        
-        if not insider_trades:
+
+        page = [trade for trade in insider_trades if not (trade.filing_date.startswith(current_end_date) and trade.model_dump_json() in boundary_keys)]
+        if not page:
             break
-            
-        all_trades.extend(insider_trades)
-        
+        yield page
+
         # Only continue pagination if we have a start_date and got a full page
         if not start_date or len(insider_trades) < limit:
             break
-            
+
         # Update end_date to the oldest filing date from current batch for next iteration
         current_end_date = min(trade.filing_date for trade in insider_trades).split('T')[0]
-        
+        boundary_keys = {trade.model_dump_json() for trade in insider_trades if trade.filing_date.startswith(current_end_date)}
+
         # If we've reached or passed the start_date, we can stop
         if current_end_date <= start_date:
             break
 
-    if not all_trades:
-        return []
-
-    # Cache the results
-    _cache.set_insider_trades(ticker, [trade.model_dump() for trade in all_trades])
-    return all_trades
-
 
 def get_company_news(
     ticker: str,
@@ -194,61 +524,194 @@ def get_company_news(
     limit: int = 1000,
 ) -> list[CompanyNews]:
     """Fetch company news from cache or API."""
+    # With a bounded range, only fetch the date ranges not cached yet
+    if start_date:
+        _ensure_events("company_news", ticker, start_date, end_date, limit)
+        return get_cache().find_company_news(ticker, start_date, end_date)
+
     # Check cache first
-    if cached_data := _cache.get_company_news(ticker):
-        # Filter cached data by date range
-        filtered_data = [CompanyNews(**news) for news in cached_data 
-                        if (start_date is None or news["date"] >= start_date)
-                        and news["date"] <= end_date]
-        filtered_data.sort(key=lambda x: x.date, reverse=True)
-        if filtered_data:
-            return filtered_data
+    if filtered_data := get_cache().find_company_news(ticker, start_date, end_date):
+        return filtered_data
 
-    # If not in cache or insufficient data, fetch from API
-    headers = {}
-    if api_key := os.environ.get("FINANCIAL_DATASETS_API_KEY"):
-        headers["X-API-KEY"] = api_key
+    all_news = _fetch_company_news(ticker, end_date, start_date, limit)
+    if not all_news:
+        return []
 
-    all_news = []
+    # Cache the results
+    get_cache().set_company_news(ticker, all_news)
+    return all_news
+
+
+def _fetch_company_news(ticker: str, end_date: str, start_date: str | None, limit: int) -> list[CompanyNews]:
+    """Fetch company news from the API, paging back to start_date when one is given."""
+    return [news for page in _iter_company_news_pages(ticker, end_date, start_date, limit) for news in page]
+
+
+def _iter_company_news_pages(ticker: str, end_date: str, start_date: str | None, limit: int) -> Iterator[list[CompanyNews]]:
+    """Yield company news from the API page by page, newest first, paging back to start_date when one is given."""
     current_end_date = end_date
-    
+    # Pages overlap on their boundary date, so remember what was already yielded for it
+    boundary_keys = set()
+
     while True:
-        url = f"https://api.financialdatasets.ai/news/?ticker={ticker}&end_date={current_end_date}"
+        params = {"ticker": ticker, "end_date": current_end_date, "limit": limit}
         if start_date:
-            url += f"&start_date={start_date}"
-        url += f"&limit={limit}"
-        
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
-            raise Exception(f"Error fetching data: {ticker} - {response.status_code} - {response.text}")
-        
-        data = response.json()
+            params["start_date"] = start_date
+        data = _request("GET", "/news/", ticker, params=params)
         response_model = CompanyNewsResponse(**data)
         company_news = response_model.news
-        
-        if not company_news:
+
+        page = [news for news in company_news if not (news.date.startswith(current_end_date) and news.model_dump_json() in boundary_keys)]
+        if not page:
             break
-            
-        all_news.extend(company_news)
-        
+        yield page
+
         # Only continue pagination if we have a start_date and got a full page
         if not start_date or len(company_news) < limit:
             break
-            
+
         # Update end_date to the oldest date from current batch for next iteration
         current_end_date = min(news.date for news in company_news).split('T')[0]
-        
+        boundary_keys = {news.model_dump_json() for news in company_news if news.date.startswith(current_end_date)}
+
         # If we've reached or passed the start_date, we can stop
         if current_end_date <= start_date:
             break
 
-    if not all_news:
-        return []
-
-    # Cache the results
-    _cache.set_company_news(ticker, [news.model_dump() for news in all_news])
-    return all_news
 
+##### Streaming insider trades and news #####
+# Ranges are split into date windows that are fetched concurrently; pages are yielded
+# (and cached) newest first as they arrive, with already-cached stretches served from the cache.
+
+_EVENT_PAGES = {
+    "insider_trades": _iter_insider_trade_pages,
+    "company_news": _iter_company_news_pages,
+}
+
+# Window downloads get their own pool: callers of _iter_event_batches often run on the data API
+# pool themselves (async and batch helpers), and would deadlock waiting on windows queued behind them.
+_window_executor: ThreadPoolExecutor | None = None
+
+
+def _get_window_executor() -> ThreadPoolExecutor:
+    """Get the pool that downloads insider trade and news windows, which never waits on other work."""
+    global _window_executor
+    if _window_executor is None:
+        with _session_lock:
+            if _window_executor is None:
+                _window_executor = ThreadPoolExecutor(max_workers=_http_config["pool_size"], thread_name_prefix="financial-data-window")
+    return _window_executor
+
+
+def iter_insider_trades(ticker: str, end_date: str, start_date: str | None = None, limit: int = 1000) -> Iterator[InsiderTrade]:
+    """
+    Stream insider trades newest first. With a start_date every trade in the range is yielded, dated by
+    transaction date (filing date if missing) as get_insider_trades returns them; without one, every cached trade up to end_date, or else the most recent page of at most limit.
+    """
+    for batch in _iter_event_batches("insider_trades", ticker, end_date, start_date, limit):
+        yield from batch
+
+
+def iter_company_news(ticker: str, end_date: str, start_date: str | None = None, limit: int = 1000) -> Iterator[CompanyNews]:
+    """
+    Stream company news newest first. With a start_date every article in the range is yielded;
+    without one, every cached article up to end_date, or else the most recent page of at most limit.
+    """
+    for batch in _iter_event_batches("company_news", ticker, end_date, start_date, limit):
+        yield from batch
+
+
+def _ensure_events(data_type: str, ticker: str, start_date: str, end_date: str, limit: int):
+    """Fetch and cache the parts of the date range not covered yet."""
+    for _ in _iter_event_batches(data_type, ticker, end_date, start_date, limit, yield_batches=False):
+        pass
+
+
+def _iter_event_batches(data_type: str, ticker: str, end_date: str, start_date: str | None, limit: int, yield_batches: bool = True) -> Iterator[list]:
+    """Yield batches of insider trades or news newest first, fetching the windows not covered yet and storing them in the cache."""
+    cache = get_cache()
+    find = getattr(cache, f"find_{data_type}")
+    store = getattr(cache, f"set_{data_type}")
+
+    if not start_date:
+        # Unbounded: everything cached up to end_date, as get_insider_trades and get_company_news return,
+        # otherwise the most recent page from the API
+        if cached := find(ticker, None, end_date):
+            yield cached
+            return
+        for page in _EVENT_PAGES[data_type](ticker, end_date, None, limit):
+            store(ticker, page)
+            yield page
+        return
+
+    segments = _split_segments(cache.get_coverage(data_type, ticker), start_date, end_date)
+    gap_windows = iter([
+        window
+        for segment_start, segment_end, is_gap in segments if is_gap
+        for window in _split_window(segment_start, segment_end, _http_config["pagination_window_days"])
+    ])
+    # Windows download concurrently, at most max_concurrency ahead of the one being consumed
+    windows: dict[tuple[str, str], Future] = {}
+
+    def submit_ahead():
+        while len(windows) < _http_config["max_concurrency"] and (window := next(gap_windows, None)) is not None:
+            windows[window] = _get_window_executor().submit(lambda window=window: list(_EVENT_PAGES[data_type](ticker, window[1], window[0], limit)))
+
+    def find_within(range_start: str, range_end: str) -> list:
+        # Internal boundaries are whole days, so include items timestamped on range_end
+        return find(ticker, range_start, range_end if range_end == end_date else f"{range_end}T~")
+
+    submit_ahead()
+    try:
+        for segment_start, segment_end, is_gap in segments:
+            if not is_gap:
+                if yield_batches:
+                    yield find_within(segment_start, segment_end)
+                continue
+            for window in _split_window(segment_start, segment_end, _http_config["pagination_window_days"]):
+                pages = windows.pop(window).result()
+                submit_ahead()
+                for page in pages:
+                    store(ticker, page)
+                _mark_covered(data_type, ticker, *window)
+                if yield_batches:
+                    # Read back from the cache so the stream is filtered by the same date as get_insider_trades and
+                    # get_company_news: the API pages insider trades by filing date, the cache by transaction date.
+                    # A trade is filed on or after its transaction, so every trade dated in this window is stored by now.
+                    yield find_within(*window)
+    finally:
+        # A consumer that stops early leaves nothing running in the background
+        for future in windows.values():
+            future.cancel()
+
+
+def _split_segments(coverage: IntervalSet, start_date: str, end_date: str) -> list[tuple[str, str, bool]]:
+    """Split a range into (start, end, is_gap) segments, newest first."""
+    segments = []
+    cursor = start_date
+    for gap_start, gap_end in coverage.gaps(start_date, end_date):
+        if cursor < gap_start:
+            segments.append((cursor, _shift_date(gap_start, -1), False))
+        segments.append((gap_start, gap_end, True))
+        cursor = _shift_date(gap_end, 1)
+    if cursor <= end_date:
+        segments.append((cursor, end_date, False))
+    return segments[::-1]
+
+
+def _split_window(start_date: str, end_date: str, window_days: int) -> list[tuple[str, str]]:
+    """Split a range into consecutive windows of at most window_days, newest first."""
+    windows = []
+    window_end = end_date
+    while window_end >= start_date:
+        window_start = max(start_date, _shift_date(window_end, -(window_days - 1)))
+        windows.append((window_start, window_end))
+        window_end = _shift_date(window_start, -1)
+    return windows
+
+
+def _shift_date(date: str, days: int) -> str:
+    return (datetime.strptime(date[:10], "%Y-%m-%d") + timedelta(days=days)).strftime("%Y-%m-%d")
 
 
 def get_market_cap(
@@ -276,7 +739,220 @@ def prices_to_df(prices: list[Price]) -> pd.DataFrame:
     return df
 
 
-# Update the get_price_data function to use the new functions
+# Price frames memoized per (ticker, start_date, end_date), least recently used evicted first
+_price_frames: OrderedDict[tuple[str, str, str], pd.DataFrame] = OrderedDict()
+_price_frames_lock = threading.Lock()
+_PRICE_FRAME_CACHE_SIZE = 256
+
+
+def get_price_frame(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    Fetch prices as a typed, date-indexed DataFrame built straight from the cached price columns.
+    Callers get a shallow copy of a memoized frame: adding columns is fine, writing into existing ones is not.
+    """
+    _ensure_prices(ticker, start_date, end_date)
+
+    key = (ticker, start_date, end_date)
+    with _price_frames_lock:
+        if (df := _price_frames.get(key)) is not None:
+            _price_frames.move_to_end(key)
+            return df.copy(deep=False)
+
+    df = columns_to_df(get_cache().get_price_columns(ticker, start_date, end_date))
+    with _price_frames_lock:
+        _price_frames[key] = df
+        if len(_price_frames) > _PRICE_FRAME_CACHE_SIZE:
+            _price_frames.popitem(last=False)
+    return df.copy(deep=False)
+
+
+def _invalidate_price_frames(ticker: str):
+    """Drop memoized frames for a ticker after new prices were stored."""
+    with _price_frames_lock:
+        for key in [key for key in _price_frames if key[0] == ticker]:
+            del _price_frames[key]
+
+
+def _price_index(columns: dict[str, np.ndarray]) -> pd.DatetimeIndex:
+    """Build the Date index from the stored date column, parsing the time strings only if they vary in time of day."""
+    times = np.ascontiguousarray(columns["time"])
+    # Daily bars share one time-of-day suffix after the date, e.g. "T00:00:00Z"; compare the suffixes as code points, without per-row strings
+    chars = times.view(np.uint32).reshape(len(times), -1)
+    if (chars[:, 10:] != chars[0, 10:]).any():
+        return pd.DatetimeIndex(pd.to_datetime(times), name="Date")
+    first = pd.Timestamp(str(times[0]))
+    offset = first.tz_localize(None) - first.tz_localize(None).normalize()
+    index = pd.DatetimeIndex(columns["date"].astype("datetime64[ns]") + offset.to_timedelta64(), name="Date")
+    return index.tz_localize(first.tz) if first.tz is not None else index
+
+
+def columns_to_df(columns: dict[str, np.ndarray] | None) -> pd.DataFrame:
+    """Convert price columns to the same DataFrame layout as prices_to_df, without parsing each row's time."""
+    if columns is None or not len(columns["time"]):
+        return pd.DataFrame(columns=["open", "close", "high", "low", "volume", "time"], index=pd.DatetimeIndex([], name="Date"))
+    return pd.DataFrame(
+        {
+            "open": np.asarray(columns["open"]),
+            "close": np.asarray(columns["close"]),
+            "high": np.asarray(columns["high"]),
+            "low": np.asarray(columns["low"]),
+            "volume": np.asarray(columns["volume"]),
+            "time": np.asarray(columns["time"]).astype(object),
+        },
+        index=_price_index(columns),
+    )
+
+
 def get_price_data(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
-    prices = get_prices(ticker, start_date, end_date)
-    return prices_to_df(prices)
+    return get_price_frame(ticker, start_date, end_date)
+
+
+##### Async API #####
+# The async variants run the synchronous fetchers on worker threads, so they share
+# the cache and the pooled session. Batch helpers fan a ticker list out concurrently.
+# They wrap the sync fetchers rather than the other way round because everything under
+# them - the cache and its lock, single-flight, the rate limiter's token buckets and the
+# retrying pooled session - is built for threads, which the agents run on. An async-native
+# client would need a second copy of each of those and an async HTTP dependency.
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the data API worker pool, which is sized to the HTTP connection pool."""
+    global _executor
+    if _executor is None:
+        with _session_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=_http_config["pool_size"], thread_name_prefix="financial-data")
+    return _executor
+
+
+async def _to_thread(func, *args):
+    """Run func on the data API worker pool."""
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+
+
+async def aget_prices(ticker: str, start_date: str, end_date: str) -> list[Price]:
+    """Async variant of get_prices."""
+    return await _to_thread(get_prices, ticker, start_date, end_date)
+
+
+async def aget_financial_metrics(ticker: str, end_date: str, period: str = "ttm", limit: int = 10) -> list[FinancialMetrics]:
+    """Async variant of get_financial_metrics."""
+    return await _to_thread(get_financial_metrics, ticker, end_date, period, limit)
+
+
+async def asearch_line_items(ticker: str, line_items: list[str], end_date: str, period: str = "ttm", limit: int = 10) -> list[LineItem]:
+    """Async variant of search_line_items."""
+    return await _to_thread(search_line_items, ticker, line_items, end_date, period, limit)
+
+
+async def aget_insider_trades(ticker: str, end_date: str, start_date: str | None = None, limit: int = 1000) -> list[InsiderTrade]:
+    """Async variant of get_insider_trades."""
+    return await _to_thread(get_insider_trades, ticker, end_date, start_date, limit)
+
+
+async def aget_company_news(ticker: str, end_date: str, start_date: str | None = None, limit: int = 1000) -> list[CompanyNews]:
+    """Async variant of get_company_news."""
+    return await _to_thread(get_company_news, ticker, end_date, start_date, limit)
+
+
+async def aget_market_cap(ticker: str, end_date: str) -> float | None:
+    """Async variant of get_market_cap."""
+    return await _to_thread(get_market_cap, ticker, end_date)
+
+
+async def aiter_insider_trades(ticker: str, end_date: str, start_date: str | None = None, limit: int = 1000) -> AsyncIterator[InsiderTrade]:
+    """Async variant of iter_insider_trades."""
+    async for batch in _aiter_batches(_iter_event_batches("insider_trades", ticker, end_date, start_date, limit)):
+        for trade in batch:
+            yield trade
+
+
+async def aiter_company_news(ticker: str, end_date: str, start_date: str | None = None, limit: int = 1000) -> AsyncIterator[CompanyNews]:
+    """Async variant of iter_company_news."""
+    async for batch in _aiter_batches(_iter_event_batches("company_news", ticker, end_date, start_date, limit)):
+        for news in batch:
+            yield news
+
+
+async def _aiter_batches(batches: Iterator[list]) -> AsyncIterator[list]:
+    """Drive a blocking batch generator on the worker pool, one batch per hop."""
+    try:
+        while (batch := await _to_thread(next, batches, None)) is not None:
+            yield batch
+    finally:
+        batches.close()
+
+
+async def _gather_by_ticker(fetch, tickers: list[str], max_concurrency: int | None, *args) -> dict[str, Any]:
+    """Run fetch(ticker, *args) for every ticker concurrently, at most max_concurrency at a time."""
+    semaphore = asyncio.Semaphore(max_concurrency or _http_config["max_concurrency"])
+
+    async def run(ticker: str):
+        async with semaphore:
+            return await fetch(ticker, *args)
+
+    results = await asyncio.gather(*(run(ticker) for ticker in tickers))
+    return dict(zip(tickers, results))
+
+
+async def aget_prices_batch(tickers: list[str], start_date: str, end_date: str, max_concurrency: int | None = None) -> dict[str, list[Price]]:
+    """Fetch prices for many tickers concurrently."""
+    return await _gather_by_ticker(aget_prices, tickers, max_concurrency, start_date, end_date)
+
+
+async def aget_financial_metrics_batch(tickers: list[str], end_date: str, period: str = "ttm", limit: int = 10, max_concurrency: int | None = None) -> dict[str, list[FinancialMetrics]]:
+    """Fetch financial metrics for many tickers concurrently."""
+    return await _gather_by_ticker(aget_financial_metrics, tickers, max_concurrency, end_date, period, limit)
+
+
+async def asearch_line_items_batch(tickers: list[str], line_items: list[str], end_date: str, period: str = "ttm", limit: int = 10, max_concurrency: int | None = None) -> dict[str, list[LineItem]]:
+    """Fetch line items for many tickers concurrently."""
+    return await _gather_by_ticker(asearch_line_items, tickers, max_concurrency, line_items, end_date, period, limit)
+
+
+async def aget_insider_trades_batch(tickers: list[str], end_date: str, start_date: str | None = None, limit: int = 1000, max_concurrency: int | None = None) -> dict[str, list[InsiderTrade]]:
+    """Fetch insider trades for many tickers concurrently."""
+    return await _gather_by_ticker(aget_insider_trades, tickers, max_concurrency, end_date, start_date, limit)
+
+
+async def aget_company_news_batch(tickers: list[str], end_date: str, start_date: str | None = None, limit: int = 1000, max_concurrency: int | None = None) -> dict[str, list[CompanyNews]]:
+    """Fetch company news for many tickers concurrently."""
+    return await _gather_by_ticker(aget_company_news, tickers, max_concurrency, end_date, start_date, limit)
+
+
+def run_sync(coroutine):
+    """Run a coroutine to completion from synchronous code, even if an event loop is already running."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def get_prices_batch(tickers: list[str], start_date: str, end_date: str, max_concurrency: int | None = None) -> dict[str, list[Price]]:
+    """Synchronous wrapper around aget_prices_batch."""
+    return run_sync(aget_prices_batch(tickers, start_date, end_date, max_concurrency))
+
+
+def get_financial_metrics_batch(tickers: list[str], end_date: str, period: str = "ttm", limit: int = 10, max_concurrency: int | None = None) -> dict[str, list[FinancialMetrics]]:
+    """Synchronous wrapper around aget_financial_metrics_batch."""
+    return run_sync(aget_financial_metrics_batch(tickers, end_date, period, limit, max_concurrency))
+
+
+def search_line_items_batch(tickers: list[str], line_items: list[str], end_date: str, period: str = "ttm", limit: int = 10, max_concurrency: int | None = None) -> dict[str, list[LineItem]]:
+    """Synchronous wrapper around asearch_line_items_batch."""
+    return run_sync(asearch_line_items_batch(tickers, line_items, end_date, period, limit, max_concurrency))
+
+
+def get_insider_trades_batch(tickers: list[str], end_date: str, start_date: str | None = None, limit: int = 1000, max_concurrency: int | None = None) -> dict[str, list[InsiderTrade]]:
+    """Synchronous wrapper around aget_insider_trades_batch."""
+    return run_sync(aget_insider_trades_batch(tickers, end_date, start_date, limit, max_concurrency))
+
+
+def get_company_news_batch(tickers: list[str], end_date: str, start_date: str | None = None, limit: int = 1000, max_concurrency: int | None = None) -> dict[str, list[CompanyNews]]:
+    """Synchronous wrapper around aget_company_news_batch."""
+    return run_sync(aget_company_news_batch(tickers, end_date, start_date, limit, max_concurrency))
@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Status codes worth retrying: rate limited, or a transient server-side failure
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _check_rate(rate: float):
+    if rate < 0:
+        raise ValueError(f"Rate limit must be a positive number of requests per second, or 0 for unlimited: {rate}")
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. A 429 halves the refill rate and pauses the bucket until the server's
+    Retry-After; each success then recovers the rate a little, back up to the configured maximum.
+    A rate of 0 means unlimited: only a 429's Retry-After holds callers back.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None, min_rate: float = 0.5):
+        _check_rate(rate)
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if not self.max_rate:
+                    if now >= self._paused_until:
+                        return
+                    wait = self._paused_until - now
+                else:
+                    self._refill(now)
+                    if now >= self._paused_until and self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def penalize(self, retry_after: float | None):
+        """React to a 429: slow down and hold every caller until Retry-After has passed."""
+        with self._lock:
+            if self.max_rate:
+                self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                self._tokens = 0
+
+    def reward(self):
+        """React to a success: recover towards the configured rate."""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class RateLimiter:
+    """Process-wide registry of token buckets, one per endpoint."""
+
+    def __init__(self, default_rate: float, endpoint_rates: dict[str, float] | None = None):
+        # Fail on a bad setting up front rather than on the first request to that endpoint
+        for rate in [default_rate, *(endpoint_rates or {}).values()]:
+            _check_rate(rate)
+        self.default_rate = default_rate
+        self.endpoint_rates = endpoint_rates or {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, endpoint: str) -> TokenBucket:
+        with self._lock:
+            if endpoint not in self._buckets:
+                self._buckets[endpoint] = TokenBucket(self.endpoint_rates.get(endpoint, self.default_rate))
+            return self._buckets[endpoint]
+
+
+def parse_rates(value: str | None) -> dict[str, float]:
+    """Parse per-endpoint rates such as "prices=20,news=5"."""
+    rates = {}
+    for entry in (value or "").split(","):
+        if "=" in entry:
+            endpoint, rate = entry.split("=", 1)
+            rates[endpoint.strip().strip("/")] = float(rate)
+    return rates
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: float | None = None) -> float:
+    """Delay before a retry: the server's Retry-After if given, otherwise full-jitter exponential backoff."""
+    if retry_after is not None:
+        # A little jitter keeps parallel callers from retrying in lockstep
+        return retry_after + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * 2**attempt))
@@ -0,0 +1,238 @@
+"""
+Record/replay support for the financial datasets API.
+
+Set FINANCIAL_DATASETS_RECORD=<archive> to capture every successful response into a compact
+SQLite archive, or FINANCIAL_DATASETS_REPLAY=<archive> to serve requests from it in-process.
+The archive can also be served over HTTP as a stand-in for api.financialdatasets.ai:
+
+    python src/tools/replay.py --archive responses.db --port 8765
+    FINANCIAL_DATASETS_BASE_URL=http://127.0.0.1:8765 poetry run python src/main.py ...
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+NOT_ARCHIVED = {"error": "Not found in archive"}
+
+
+def archive_key(method: str, path: str, params: dict | None, body: dict | None) -> str:
+    """Build the lookup key for a request. Param values are compared as strings, as they arrive over HTTP."""
+    params = {key: str(value) for key, value in (params or {}).items()}
+    return json.dumps([method.upper(), path, params, body], sort_keys=True)
+
+
+class ResponseArchive:
+    """SQLite archive of API responses, stored as zlib-compressed JSON keyed by request."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, method TEXT, path TEXT, params TEXT, body TEXT, data BLOB)"
+        )
+        self._conn.commit()
+
+    def save(self, method: str, path: str, params: dict | None, body: dict | None, data: dict):
+        """Store a successful response, replacing any earlier one for the same request."""
+        row = (
+            archive_key(method, path, params, body),
+            method.upper(),
+            path,
+            json.dumps(params or {}),
+            json.dumps(body),
+            zlib.compress(json.dumps(data).encode()),
+        )
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)", row)
+            self._conn.commit()
+
+    def lookup(self, method: str, path: str, params: dict | None, body: dict | None) -> dict | None:
+        """Return the archived response for exactly this request, if any."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM responses WHERE key = ?", (archive_key(method, path, params, body),)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def responses(self):
+        """Yield (path, params, body, data) for every archived response."""
+        with self._lock:
+            rows = self._conn.execute("SELECT path, params, body, data FROM responses").fetchall()
+        for path, params, body, data in rows:
+            yield path, json.loads(params), json.loads(body), json.loads(zlib.decompress(data))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class StandInAPI:
+    """
+    Answers API requests from an archive. Exact matches are served as recorded; other requests are
+    answered from everything archived for the ticker, using the endpoint's own filtering, ordering
+    and limit semantics so that paginated and gap-filling callers behave as they do online.
+    """
+
+    def __init__(self, archive: ResponseArchive):
+        self.archive = archive
+        self._lock = threading.Lock()
+        self._indexed = False
+        self._prices: dict[str, dict[str, dict]] = {}
+        self._metrics: dict[str, dict[tuple[str, str], dict]] = {}
+        self._line_items: dict[str, dict[tuple[str, str], dict]] = {}
+        self._insider_trades: dict[str, dict[str, dict]] = {}
+        self._news: dict[str, dict[str, dict]] = {}
+
+    def handle(self, method: str, path: str, params: dict | None = None, body: dict | None = None) -> tuple[int, dict]:
+        """Return (status_code, response_json) for a request."""
+        if (data := self.archive.lookup(method, path, params, body)) is not None:
+            return 200, data
+
+        self._index()
+        params = params or {}
+        route = path.rstrip("/")
+        if route == "/prices":
+            return self._handle_prices(params)
+        if route == "/financial-metrics":
+            return self._handle_metrics(params)
+        if route == "/financials/search/line-items":
+            return self._handle_line_items(body or {})
+        if route == "/insider-trades":
+            return self._handle_insider_trades(params)
+        if route == "/news":
+            return self._handle_news(params)
+        return 404, NOT_ARCHIVED
+
+    def _index(self):
+        """Collect every archived row per endpoint and ticker, de-duplicated."""
+        with self._lock:
+            if self._indexed:
+                return
+            for path, params, body, data in self.archive.responses():
+                route = path.rstrip("/")
+                if route == "/prices":
+                    rows = self._prices.setdefault(params["ticker"], {})
+                    rows.update({price["time"]: price for price in data.get("prices", [])})
+                elif route == "/financial-metrics":
+                    for metric in data.get("financial_metrics", []):
+                        self._metrics.setdefault(metric["ticker"], {})[(metric["report_period"], metric["period"])] = metric
+                elif route == "/financials/search/line-items":
+                    for item in data.get("search_results", []):
+                        rows = self._line_items.setdefault(item["ticker"], {})
+                        key = (item["report_period"], item["period"])
+                        rows[key] = {**rows.get(key, {}), **item}
+                elif route == "/insider-trades":
+                    rows = self._insider_trades.setdefault(params["ticker"], {})
+                    rows.update({json.dumps(trade, sort_keys=True): trade for trade in data.get("insider_trades", [])})
+                elif route == "/news":
+                    rows = self._news.setdefault(params["ticker"], {})
+                    rows.update({json.dumps(news, sort_keys=True): news for news in data.get("news", [])})
+            self._indexed = True
+
+    def _handle_prices(self, params: dict) -> tuple[int, dict]:
+        ticker = params.get("ticker")
+        if ticker not in self._prices:
+            return 404, NOT_ARCHIVED
+        start_date, end_date = str(params["start_date"]), str(params["end_date"])
+        prices = sorted((price for time, price in self._prices[ticker].items() if start_date <= time[:10] <= end_date), key=lambda price: price["time"])
+        return 200, {"ticker": ticker, "prices": prices}
+
+    def _handle_metrics(self, params: dict) -> tuple[int, dict]:
+        ticker = params.get("ticker")
+        if ticker not in self._metrics:
+            return 404, NOT_ARCHIVED
+        end_date, period, limit = str(params["report_period_lte"]), params.get("period", "ttm"), int(params.get("limit", 10))
+        metrics = [metric for (report_period, metric_period), metric in self._metrics[ticker].items() if report_period <= end_date and metric_period == period]
+        metrics.sort(key=lambda metric: metric["report_period"], reverse=True)
+        return 200, {"financial_metrics": metrics[:limit]}
+
+    def _handle_line_items(self, body: dict) -> tuple[int, dict]:
+        fields, end_date, period, limit = body.get("line_items", []), body["end_date"], body.get("period", "ttm"), int(body.get("limit", 10))
+        search_results = []
+        for ticker in body.get("tickers", []):
+            if ticker not in self._line_items:
+                return 404, NOT_ARCHIVED
+            rows = [row for (report_period, row_period), row in self._line_items[ticker].items() if report_period <= end_date and row_period == period]
+            rows = sorted(rows, key=lambda row: row["report_period"], reverse=True)[:limit]
+            # Refuse rather than silently drop fields that were never recorded
+            if any(field not in row for row in rows for field in fields):
+                return 404, NOT_ARCHIVED
+            base = ("ticker", "report_period", "period", "currency")
+            search_results.extend({key: row[key] for key in (*base, *fields)} for row in rows)
+        return 200, {"search_results": search_results}
+
+    def _handle_insider_trades(self, params: dict) -> tuple[int, dict]:
+        ticker = params.get("ticker")
+        if ticker not in self._insider_trades:
+            return 404, NOT_ARCHIVED
+        end_date, start_date, limit = str(params["filing_date_lte"]), params.get("filing_date_gte"), int(params.get("limit", 1000))
+        trades = [
+            trade for trade in self._insider_trades[ticker].values()
+            if trade["filing_date"][:10] <= end_date and (start_date is None or trade["filing_date"][:10] >= str(start_date))
+        ]
+        trades.sort(key=lambda trade: trade["filing_date"], reverse=True)
+        return 200, {"insider_trades": trades[:limit]}
+
+    def _handle_news(self, params: dict) -> tuple[int, dict]:
+        ticker = params.get("ticker")
+        if ticker not in self._news:
+            return 404, NOT_ARCHIVED
+        end_date, start_date, limit = str(params["end_date"]), params.get("start_date"), int(params.get("limit", 1000))
+        news = [item for item in self._news[ticker].values() if item["date"][:10] <= end_date and (start_date is None or item["date"][:10] >= str(start_date))]
+        news.sort(key=lambda item: item["date"], reverse=True)
+        return 200, {"news": news[:limit]}
+
+
+def make_handler(stand_in: StandInAPI):
+    """Build a request handler class that serves the stand-in API."""
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, method: str, body: dict | None):
+            url = urlsplit(self.path)
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            status, data = stand_in.handle(method, url.path, params, body)
+            payload = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._respond("GET", None)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            self._respond("POST", json.loads(self.rfile.read(length)) if length else None)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StandInHandler
+
+
+def run_server(archive_path: str, host: str = "127.0.0.1", port: int = 8765):
+    """Serve an archive over HTTP until interrupted."""
+    server = ThreadingHTTPServer((host, port), make_handler(StandInAPI(ResponseArchive(archive_path))))
+    print(f"Serving {archive_path} at http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a recorded response archive as a local financial datasets API")
+    parser.add_argument("--archive", type=str, required=True, help="Path to the recorded response archive")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host to bind")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    args = parser.parse_args()
+    run_server(args.archive, args.host, args.port)
@@ -1,64 +1,108 @@
 """Constants and utilities related to analysts configuration."""
 
-from agents.ben_graham import ben_graham_agent
-from agents.bill_ackman import bill_ackman_agent
-from agents.cathie_wood import cathie_wood_agent
-from agents.charlie_munger import charlie_munger_agent
+from agents.ben_graham import ben_graham_agent, ben_graham_agent_async, BEN_GRAHAM_LINE_ITEMS
+from agents.bill_ackman import bill_ackman_agent, bill_ackman_agent_async, BILL_ACKMAN_LINE_ITEMS
+from agents.cathie_wood import cathie_wood_agent, cathie_wood_agent_async, CATHIE_WOOD_LINE_ITEMS
+from agents.charlie_munger import charlie_munger_agent, charlie_munger_agent_async, CHARLIE_MUNGER_LINE_ITEMS
 from agents.fundamentals import fundamentals_agent
-from agents.michael_burry import michael_burry_agent
-from agents.phil_fisher import phil_fisher_agent
-from agents.peter_lynch import peter_lynch_agent
+from agents.michael_burry import michael_burry_agent, michael_burry_agent_async, MICHAEL_BURRY_LINE_ITEMS
+from agents.phil_fisher import phil_fisher_agent, phil_fisher_agent_async, PHIL_FISHER_LINE_ITEMS
+from agents.peter_lynch import peter_lynch_agent, peter_lynch_agent_async, PETER_LYNCH_LINE_ITEMS
 from agents.sentiment import sentiment_agent
-from agents.stanley_druckenmiller import stanley_druckenmiller_agent
+from agents.stanley_druckenmiller import stanley_druckenmiller_agent, stanley_druckenmiller_agent_async, STANLEY_DRUCKENMILLER_LINE_ITEMS
 from agents.technicals import technical_analyst_agent
-from agents.valuation import valuation_agent
-from agents.warren_buffett import warren_buffett_agent
+from agents.valuation import valuation_agent, VALUATION_LINE_ITEMS
+from agents.warren_buffett import warren_buffett_agent, warren_buffett_agent_async, WARREN_BUFFETT_LINE_ITEMS
 
-# Define analyst configuration - single source of truth
+# get_market_cap reads the latest ttm financial metrics
+MARKET_CAP_METRICS = {"period": "ttm", "limit": 10}
+
+# Define analyst configuration - single source of truth.
+# Besides the agent itself, each analyst declares the data it reads so it can be fetched up front:
+#   line_items / financial_metrics: requests by period and limit
+#   insider_trades / company_news: how many days before the run's start date are read
+# Analysts that call the LLM per ticker also provide an async_agent_func that makes those calls concurrently.
 ANALYST_CONFIG = {
     "ben_graham": {
         "display_name": "Ben Graham",
         "agent_func": ben_graham_agent,
+        "async_agent_func": ben_graham_agent_async,
+        "line_items": [BEN_GRAHAM_LINE_ITEMS],
+        "financial_metrics": [{"period": "annual", "limit": 10}, MARKET_CAP_METRICS],
         "order": 0,
     },
     "bill_ackman": {
         "display_name": "Bill Ackman",
         "agent_func": bill_ackman_agent,
+        "async_agent_func": bill_ackman_agent_async,
+        "line_items": [BILL_ACKMAN_LINE_ITEMS],
+        "financial_metrics": [{"period": "annual", "limit": 5}, MARKET_CAP_METRICS],
         "order": 1,
     },
     "cathie_wood": {
         "display_name": "Cathie Wood",
         "agent_func": cathie_wood_agent,
+        "async_agent_func": cathie_wood_agent_async,
+        "line_items": [CATHIE_WOOD_LINE_ITEMS],
+        "financial_metrics": [{"period": "annual", "limit": 5}, MARKET_CAP_METRICS],
         "order": 2,
     },
     "charlie_munger": {
         "display_name": "Charlie Munger",
         "agent_func": charlie_munger_agent,
+        "async_agent_func": charlie_munger_agent_async,
+        "line_items": [CHARLIE_MUNGER_LINE_ITEMS],
+        "financial_metrics": [{"period": "annual", "limit": 10}, MARKET_CAP_METRICS],
+        "insider_trades": {"lookback_days": 365},
+        "company_news": {"lookback_days": 365},
         "order": 3,
     },
     "michael_burry": {
         "display_name": "Michael Burry",
         "agent_func": michael_burry_agent,
+        "async_agent_func": michael_burry_agent_async,
+        "line_items": [MICHAEL_BURRY_LINE_ITEMS],
+        "financial_metrics": [{"period": "ttm", "limit": 5}, MARKET_CAP_METRICS],
+        "insider_trades": {"lookback_days": 365},
+        "company_news": {"lookback_days": 365},
         "order": 4,
     },
     "peter_lynch": {
         "display_name": "Peter Lynch",
         "agent_func": peter_lynch_agent,
+        "async_agent_func": peter_lynch_agent_async,
+        "line_items": [PETER_LYNCH_LINE_ITEMS],
+        "financial_metrics": [{"period": "annual", "limit": 5}, MARKET_CAP_METRICS],
+        "insider_trades": {"lookback_days": 365},
+        "company_news": {"lookback_days": 365},
         "order": 5,
     },
     "phil_fisher": {
         "display_name": "Phil Fisher",
         "agent_func": phil_fisher_agent,
+        "async_agent_func": phil_fisher_agent_async,
+        "line_items": [PHIL_FISHER_LINE_ITEMS],
+        "financial_metrics": [{"period": "annual", "limit": 5}, MARKET_CAP_METRICS],
+        "insider_trades": {"lookback_days": 365},
+        "company_news": {"lookback_days": 365},
         "order": 6,
     },
     "stanley_druckenmiller": {
         "display_name": "Stanley Druckenmiller",
         "agent_func": stanley_druckenmiller_agent,
+        "async_agent_func": stanley_druckenmiller_agent_async,
+        "line_items": [STANLEY_DRUCKENMILLER_LINE_ITEMS],
+        "financial_metrics": [{"period": "annual", "limit": 5}, MARKET_CAP_METRICS],
+        "insider_trades": {"lookback_days": 365},
+        "company_news": {"lookback_days": 365},
         "order": 7,
     },
     "warren_buffett": {
         "display_name": "Warren Buffett",
         "agent_func": warren_buffett_agent,
+        "async_agent_func": warren_buffett_agent_async,
+        "line_items": [WARREN_BUFFETT_LINE_ITEMS],
+        "financial_metrics": [{"period": "ttm", "limit": 5}, MARKET_CAP_METRICS],
         "order": 8,
     },
     "technical_analyst": {
@@ -69,16 +113,21 @@ ANALYST_CONFIG = {
     "fundamentals_analyst": {
         "display_name": "Fundamentals Analyst",
         "agent_func": fundamentals_agent,
+        "financial_metrics": [{"period": "ttm", "limit": 10}],
         "order": 10,
     },
     "sentiment_analyst": {
         "display_name": "Sentiment Analyst",
         "agent_func": sentiment_agent,
+        "insider_trades": {"lookback_days": 365},
+        "company_news": {"lookback_days": 365},
         "order": 11,
     },
     "valuation_analyst": {
         "display_name": "Valuation Analyst",
         "agent_func": valuation_agent,
+        "line_items": [VALUATION_LINE_ITEMS],
+        "financial_metrics": [MARKET_CAP_METRICS],
         "order": 12,
     },
 }
@@ -87,6 +136,19 @@ ANALYST_CONFIG = {
 ANALYST_ORDER = [(config["display_name"], key) for key, config in sorted(ANALYST_CONFIG.items(), key=lambda x: x[1]["order"])]
 
 
-def get_analyst_nodes():
-    """Get the mapping of analyst keys to their (node_name, agent_func) tuples."""
-    return {key: (f"{key}_agent", config["agent_func"]) for key, config in ANALYST_CONFIG.items()}
+def get_analyst_nodes(use_async: bool = False):
+    """Get the mapping of analyst keys to their (node_name, agent_func) tuples, preferring async agents if use_async."""
+    return {key: (f"{key}_agent", (use_async and config.get("async_agent_func")) or config["agent_func"]) for key, config in ANALYST_CONFIG.items()}
+
+
+def get_line_item_requests(selected_analysts: list[str] | None = None) -> list[dict]:
+    """Merge the line items declared by the selected analysts into one request per period."""
+    merged = {}
+    for key in selected_analysts or ANALYST_CONFIG:
+        for request in ANALYST_CONFIG[key].get("line_items", []):
+            entry = merged.setdefault(request["period"], {"line_items": [], "period": request["period"], "limit": 0})
+            entry["line_items"] += [field for field in request["line_items"] if field not in entry["line_items"]]
+            # The longest history requested also answers every shorter request
+            entry["limit"] = max(entry["limit"], request["limit"])
+    return list(merged.values())
+
@@ -0,0 +1,86 @@
+"""Plan and prefetch all the data a set of analysts will read over a date range."""
+
+import asyncio
+import math
+from datetime import datetime, timedelta
+
+from tools.api import (
+    aget_company_news_batch,
+    aget_financial_metrics_batch,
+    aget_insider_trades_batch,
+    aget_prices_batch,
+    prefetch_line_items,
+    run_sync,
+)
+from utils.analysts import ANALYST_CONFIG, get_line_item_requests
+
+# Roughly how often a new report appears for each period
+REPORT_INTERVAL_DAYS = {"annual": 365, "quarterly": 91, "ttm": 91}
+
+
+def _extend_limit(limit: int, period: str, window_days: int) -> int:
+    """Extend a per-request limit so one fetch at the end date also answers requests made earlier in the window."""
+    return limit + math.ceil(window_days / REPORT_INTERVAL_DAYS.get(period, 91)) + 1
+
+
+def _days_before(date: str, days: int) -> str:
+    return (datetime.strptime(date, "%Y-%m-%d") - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def build_fetch_plan(selected_analysts: list[str] | None, start_date: str, end_date: str) -> dict:
+    """
+    Merge the data requirements of the selected analysts into a minimal fetch plan for the date range.
+    Requests for the same period collapse into one with the longest history, widened to cover every date in the range.
+    Insider trade and news lookbacks are counted back from start_date, the earliest date an agent runs for.
+    """
+    analysts = selected_analysts or list(ANALYST_CONFIG)
+    window_days = (datetime.strptime(end_date, "%Y-%m-%d") - datetime.strptime(start_date, "%Y-%m-%d")).days
+
+    metric_limits = {}
+    for key in analysts:
+        for request in ANALYST_CONFIG[key].get("financial_metrics", []):
+            metric_limits[request["period"]] = max(metric_limits.get(request["period"], 0), request["limit"])
+
+    line_items = get_line_item_requests(analysts)
+    for request in line_items:
+        request["limit"] = _extend_limit(request["limit"], request["period"], window_days)
+
+    plan = {
+        # Prices are always read by the risk manager
+        "prices": (start_date, end_date),
+        "financial_metrics": [{"period": period, "limit": _extend_limit(limit, period, window_days)} for period, limit in metric_limits.items()],
+        "line_items": line_items,
+        "insider_trades": None,
+        "company_news": None,
+    }
+    for data_type in ("insider_trades", "company_news"):
+        lookbacks = [ANALYST_CONFIG[key][data_type]["lookback_days"] for key in analysts if data_type in ANALYST_CONFIG[key]]
+        if lookbacks:
+            plan[data_type] = (_days_before(start_date, max(lookbacks)), end_date)
+    return plan
+
+
+async def aexecute_fetch_plan(plan: dict, tickers: list[str], end_date: str):
+    """Fetch everything in a plan for all tickers, running the data types concurrently."""
+    tasks = [aget_prices_batch(tickers, *plan["prices"])]
+    tasks += [aget_financial_metrics_batch(tickers, end_date, request["period"], request["limit"]) for request in plan["financial_metrics"]]
+    tasks += [asyncio.to_thread(prefetch_line_items, tickers, end_date=end_date, **request) for request in plan["line_items"]]
+    if plan["insider_trades"]:
+        trades_start, trades_end = plan["insider_trades"]
+        tasks.append(aget_insider_trades_batch(tickers, trades_end, start_date=trades_start, limit=1000))
+    if plan["company_news"]:
+        news_start, news_end = plan["company_news"]
+        tasks.append(aget_company_news_batch(tickers, news_end, start_date=news_start, limit=1000))
+    await asyncio.gather(*tasks)
+
+
+def prefetch_analyst_data(
+    selected_analysts: list[str] | None,
+    tickers: list[str],
+    start_date: str,
+    end_date: str,
+) -> dict:
+    """Plan and fetch all data the selected analysts will read between start_date and end_date. Returns the plan."""
+    plan = build_fetch_plan(selected_analysts, start_date, end_date)
+    run_sync(aexecute_fetch_plan(plan, tickers, end_date))
+    return plan
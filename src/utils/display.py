@@ -226,6 +226,40 @@ def print_trading_output(result: dict) -> None:
         print(f"{Fore.CYAN}{wrapped_reasoning}{Style.RESET_ALL}")
 
 
+def print_prompt_token_stats(stats: dict) -> None:
+    """Print the LLM calls and prompt tokens sent per agent"""
+    if not stats:
+        return
+
+    rows = [
+        [
+            agent_name.replace("_agent", "").replace("_", " ").title(),
+            agent_stats["calls"],
+            agent_stats["prompt_tokens"],
+            agent_stats["max_prompt_tokens"],
+        ]
+        for agent_name, agent_stats in sorted(stats.items())
+    ]
+    rows.append(
+        [
+            f"{Style.BRIGHT}Total{Style.RESET_ALL}",
+            sum(agent_stats["calls"] for agent_stats in stats.values()),
+            sum(agent_stats["prompt_tokens"] for agent_stats in stats.values()),
+            max(agent_stats["max_prompt_tokens"] for agent_stats in stats.values()),
+        ]
+    )
+
+    print(f"\n{Fore.WHITE}{Style.BRIGHT}PROMPT TOKENS:{Style.RESET_ALL}")
+    print(
+        tabulate(
+            rows,
+            headers=["Agent", "LLM Calls", "Prompt Tokens", "Largest Prompt"],
+            tablefmt="grid",
+            colalign=("left", "right", "right", "right"),
+        )
+    )
+
+
 def print_backtest_results(table_rows: list) -> None:
     """Print the backtest results in a nicely formatted table"""
     # Clear the screen
@@ -1,12 +1,116 @@
 """Helper functions for LLM"""
 
+import asyncio
 import json
+import os
+import threading
+import weakref
+from functools import lru_cache
 from typing import TypeVar, Type, Optional, Any
-from pydantic import BaseModel
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel, create_model
+from llm.prompts import count_prompt_tokens, encode_analysis, record_prompt_tokens
+from tools.rate_limit import parse_rates
 from utils.progress import progress
 
 T = TypeVar('T', bound=BaseModel)
 
+# Concurrent acall_llm requests allowed per (provider, model), with per-provider overrides (e.g. "OpenAI=16,Groq=2")
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY") or 8)
+LLM_PROVIDER_CONCURRENCY = {provider: int(limit) for provider, limit in parse_rates(os.environ.get("LLM_PROVIDER_CONCURRENCY")).items()}
+
+# Tickers per batched persona-agent call; 1 makes one call per ticker
+LLM_BATCH_SIZE = int(os.environ.get("LLM_BATCH_SIZE") or 1)
+
+BATCH_PROMPT = """Based on the following data, create an investment signal for each of these tickers: {tickers}
+
+{analyses}
+
+Return the trading signals in the following JSON format exactly, with one entry per ticker:
+{{
+  "signals": {{
+    "<ticker>": {{
+      "signal": "bullish" | "bearish" | "neutral",
+      "confidence": float between 0 and 100,
+      "reasoning": "string"
+    }}
+  }}
+}}"""
+
+# asyncio semaphores are bound to one event loop, so each loop gets its own set
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple[str, str], asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+_semaphores_lock = threading.Lock()
+
+
+def get_llm_semaphore(model_name: str, model_provider: str) -> asyncio.Semaphore:
+    """Get the running loop's semaphore limiting concurrent requests to a provider's model."""
+    provider = getattr(model_provider, "value", model_provider)
+    with _semaphores_lock:
+        loop_semaphores = _semaphores.setdefault(asyncio.get_running_loop(), {})
+        semaphore = loop_semaphores.get((provider, model_name))
+        if semaphore is None:
+            limit = LLM_PROVIDER_CONCURRENCY.get(provider, LLM_MAX_CONCURRENCY)
+            semaphore = loop_semaphores[(provider, model_name)] = asyncio.Semaphore(limit)
+        return semaphore
+
+
+class _LLMCall:
+    """
+    The steps call_llm and acall_llm share around the request itself: the response cache lookup,
+    prompt accounting and model setup, parsing, caching the result, and the fallback after failures.
+    """
+
+    def __init__(self, prompt: Any, model_name: str, model_provider: str, pydantic_model: Type[T], agent_name: Optional[str], max_retries: int, default_factory):
+        from llm.response_cache import get_llm_cache, response_key
+
+        self.prompt = prompt
+        self.model_name = model_name
+        self.model_provider = model_provider
+        self.pydantic_model = pydantic_model
+        self.agent_name = agent_name
+        self.max_retries = max_retries
+        self.default_factory = default_factory
+        self.cache = get_llm_cache()
+        self.key = response_key(prompt, model_name, model_provider, pydantic_model) if self.cache is not None else None
+        self.model_info = None
+
+    def cached(self) -> Optional[T]:
+        """Serve identical calls (e.g. re-running a backtest over the same dates) from the response cache."""
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self.key)
+        return self.pydantic_model.model_validate(cached) if cached is not None else None
+
+    def prepare(self) -> Any:
+        """Record the prompt's size for its agent and get the model to send it to."""
+        from llm.models import get_cached_model, get_model_info
+
+        record_prompt_tokens(self.agent_name, count_prompt_tokens(self.prompt))
+        self.model_info = get_model_info(self.model_name)
+        # Reused across calls; JSON-mode models come wrapped for structured output
+        return get_cached_model(self.model_name, self.model_provider, self.pydantic_model)
+
+    def parse(self, response: Any) -> Optional[T]:
+        return parse_llm_result(response, self.model_info, self.pydantic_model)
+
+    def store(self, result: T):
+        """Cache a real response; the defaults used after failures are never cached."""
+        if self.cache is not None:
+            self.cache.set(self.key, self.model_name, self.model_provider, self.pydantic_model.__name__, result.model_dump(mode="json"))
+
+    def failed(self, attempt: int, error: Exception):
+        if self.agent_name:
+            progress.update_status(self.agent_name, None, f"Error - retry {attempt + 1}/{self.max_retries}")
+        if attempt == self.max_retries - 1:
+            print(f"Error in LLM call after {self.max_retries} attempts: {error}")
+
+    def default(self) -> T:
+        """Use default_factory if provided, otherwise create a basic default."""
+        if self.default_factory:
+            return self.default_factory()
+        return create_default_response(self.pydantic_model)
+
+
 def call_llm(
     prompt: Any,
     model_name: str,
@@ -31,45 +135,126 @@ def call_llm(
     Returns:
         An instance of the specified Pydantic model
     """
-    from llm.models import get_model, get_model_info
-    
-    model_info = get_model_info(model_name)
-    llm = get_model(model_name, model_provider)
-    
-    # For non-JSON support models, we can use structured output
-    if not (model_info and not model_info.has_json_mode()):
-        llm = llm.with_structured_output(
-            pydantic_model,
-            method="json_mode",
-        )
-    
+    call = _LLMCall(prompt, model_name, model_provider, pydantic_model, agent_name, max_retries, default_factory)
+    if (cached := call.cached()) is not None:
+        return cached
+    llm = call.prepare()
+
     # Call the LLM with retries
     for attempt in range(max_retries):
         try:
-            # Call the LLM
-            result = llm.invoke(prompt)
-            
-            # For non-JSON support models, we need to extract and parse the JSON manually
-            if model_info and not model_info.has_json_mode():
-                parsed_result = extract_json_from_deepseek_response(result.content)
-                if parsed_result:
-                    return pydantic_model(**parsed_result)
-            else:
-                return result
-                
+            result = call.parse(llm.invoke(prompt))
+        except Exception as e:
+            call.failed(attempt, e)
+            continue
+        if result is not None:
+            call.store(result)
+            return result
+    return call.default()
+
+async def acall_llm(
+    prompt: Any,
+    model_name: str,
+    model_provider: str,
+    pydantic_model: Type[T],
+    agent_name: Optional[str] = None,
+    max_retries: int = 3,
+    default_factory = None
+) -> T:
+    """
+    Async variant of call_llm. Requests go out through ainvoke, so many calls can wait on the
+    provider at once; each (provider, model) is limited to its configured number of concurrent requests.
+    The blocking steps (the SQLite response cache, token counting) run on worker threads, off the event loop.
+    """
+    call = await asyncio.to_thread(_LLMCall, prompt, model_name, model_provider, pydantic_model, agent_name, max_retries, default_factory)
+    if (cached := await asyncio.to_thread(call.cached)) is not None:
+        return cached
+    llm = await asyncio.to_thread(call.prepare)
+    semaphore = get_llm_semaphore(model_name, model_provider)
+
+    for attempt in range(max_retries):
+        try:
+            async with semaphore:
+                result = call.parse(await llm.ainvoke(prompt))
         except Exception as e:
-            if agent_name:
-                progress.update_status(agent_name, None, f"Error - retry {attempt + 1}/{max_retries}")
-            
-            if attempt == max_retries - 1:
-                print(f"Error in LLM call after {max_retries} attempts: {e}")
-                # Use default_factory if provided, otherwise create a basic default
-                if default_factory:
-                    return default_factory()
-                return create_default_response(pydantic_model)
-
-    # This should never be reached due to the retry logic above
-    return create_default_response(pydantic_model)
+            call.failed(attempt, e)
+            continue
+        if result is not None:
+            await asyncio.to_thread(call.store, result)
+            return result
+    return call.default()
+
+def get_llm_batch_size(metadata: dict) -> int:
+    """Get the tickers per persona-agent LLM call for a run, from its metadata or LLM_BATCH_SIZE."""
+    return max(1, int(metadata.get("llm_batch_size") or LLM_BATCH_SIZE))
+
+@lru_cache(maxsize=None)
+def batch_signal_model(signal_model: Type[T]) -> Type[BaseModel]:
+    """Output model of a batched call: a signal per ticker. Built once per model so LLM clients are reused."""
+    return create_model(f"{signal_model.__name__}Batch", signals=(dict[str, signal_model], ...))
+
+def batch_llm_request(requests: dict[str, dict], analyses: dict[str, Any]) -> dict:
+    """
+    Combine per-ticker call_llm requests into one request for all of their tickers.
+    The system prompt is sent once; each ticker contributes only its analysis data.
+    """
+    request = next(iter(requests.values()))
+    system_message = request["prompt"].to_messages()[0]
+    tickers = list(requests)
+    human_message = HumanMessage(
+        content=BATCH_PROMPT.format(
+            tickers=", ".join(tickers),
+            analyses="\n\n".join(f"Analysis Data for {ticker}:\n{encode_analysis(analyses[ticker])}" for ticker in tickers),
+        )
+    )
+    return {
+        **request,
+        "prompt": [system_message, human_message],
+        "pydantic_model": batch_signal_model(request["pydantic_model"]),
+        # A failed batch falls back to per-ticker calls rather than default signals
+        "default_factory": lambda: None,
+    }
+
+def _chunks(tickers: list[str], batch_size: int) -> list[list[str]]:
+    return [tickers[i:i + batch_size] for i in range(0, len(tickers), batch_size)]
+
+def call_llm_for_tickers(requests: dict[str, dict], analyses: dict[str, Any], batch_size: int = 1) -> dict[str, Any]:
+    """
+    Run per-ticker call_llm requests, asking for up to batch_size tickers' signals per call.
+    Tickers missing from a batched response, or in a batch that failed validation, get their own call.
+    """
+    if batch_size <= 1:
+        return {ticker: call_llm(**request) for ticker, request in requests.items()}
+
+    outputs = {}
+    for chunk in _chunks(list(requests), batch_size):
+        result = call_llm(**batch_llm_request({ticker: requests[ticker] for ticker in chunk}, analyses)) if len(chunk) > 1 else None
+        signals = result.signals if result is not None else {}
+        for ticker in chunk:
+            outputs[ticker] = signals[ticker] if ticker in signals else call_llm(**requests[ticker])
+    return outputs
+
+async def acall_llm_for_tickers(requests: dict[str, dict], analyses: dict[str, Any], batch_size: int = 1) -> dict[str, Any]:
+    """Async variant of call_llm_for_tickers: all calls, batched or not, are made concurrently."""
+    async def run_chunk(chunk: list[str]) -> list[Any]:
+        result = await acall_llm(**batch_llm_request({ticker: requests[ticker] for ticker in chunk}, analyses)) if len(chunk) > 1 else None
+        signals = result.signals if result is not None else {}
+        return await asyncio.gather(*(_resolved(signals[ticker]) if ticker in signals else acall_llm(**requests[ticker]) for ticker in chunk))
+
+    chunks = _chunks(list(requests), max(1, batch_size))
+    results = await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+    return {ticker: output for chunk, outputs in zip(chunks, results) for ticker, output in zip(chunk, outputs)}
+
+async def _resolved(value: Any) -> Any:
+    return value
+
+def parse_llm_result(result: Any, model_info: Any, pydantic_model: Type[T]) -> Optional[T]:
+    """Get the structured output from an LLM response, or None if it could not be parsed."""
+    # For non-JSON support models, we need to extract and parse the JSON manually
+    if model_info and not model_info.has_json_mode():
+        parsed_result = extract_json_from_deepseek_response(result.content)
+        return pydantic_model(**parsed_result) if parsed_result else None
+    return result
 
 def create_default_response(model_class: Type[T]) -> T:
     """Creates a safe default response based on the model's fields."""
@@ -0,0 +1,191 @@
+"""
+Worker pool that drains the AnalysisRequest queue.
+
+Each worker claims pending requests atomically, runs the hedge fund on them and writes the
+analyst signals back as AnalysisResult rows. Workers can run as threads or as processes, and
+several pools (on one box or many) can drain the same database concurrently:
+
+    poetry run python src/worker.py --workers 4 --mode process
+"""
+
+import argparse
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file before the database and data modules read them on import
+load_dotenv()
+
+from database.data.cache import TieredCache, use_tiered_cache
+from database.models import AnalysisRequest, AnalysisResult, Portfolio, SignalType
+from database.repositories import AnalysisRequestRepository, AnalysisResultRepository, unit_of_work
+from database.session import SessionLocal, engine
+
+# Portfolio each request is analysed against; requests don't reference a stored portfolio
+DEFAULT_INITIAL_CASH = 100000.0
+DEFAULT_MARGIN_REQUIREMENT = 0.0
+
+# Seconds after which a request still processing is taken to belong to a dead worker and is claimed
+# again; it must outlast the longest analysis
+DEFAULT_LEASE_SECONDS = float(os.environ.get("ANALYSIS_LEASE_SECONDS") or 3600)
+
+
+def build_portfolio(tickers: list[str], initial_cash: float = DEFAULT_INITIAL_CASH, margin_requirement: float = DEFAULT_MARGIN_REQUIREMENT) -> dict:
+    """Build an empty starting portfolio in the shape run_hedge_fund expects."""
+    # A transient portfolio with no positions: every ticker gets an empty position
+    return Portfolio(cash_balance=initial_cash, margin_requirement=margin_requirement, margin_used=0.0).to_hedge_fund_portfolio(tickers)
+
+
+def signals_to_results(request: AnalysisRequest, analyst_signals: dict) -> list[dict]:
+    """Convert run_hedge_fund's analyst signals into AnalysisResult rows for a request."""
+    results = []
+    for analyst_name, signals in analyst_signals.items():
+        signal = signals.get(request.ticker)
+        # The risk manager reports position limits rather than a signal
+        if not signal or signal.get("signal") not in {s.value for s in SignalType}:
+            continue
+        reasoning = signal.get("reasoning")
+        results.append(
+            {
+                "analysis_request_id": request.id,
+                "analyst_name": analyst_name,
+                "ticker": request.ticker,
+                "signal": SignalType(signal["signal"]),
+                "confidence": float(signal.get("confidence") or 0.0),
+                "reasoning": reasoning if isinstance(reasoning, str) or reasoning is None else str(reasoning),
+            }
+        )
+    return results
+
+
+def process_request(request: AnalysisRequest) -> list[dict]:
+    """Run the hedge fund for one request and return its result rows."""
+    # Imported here so the agents and their LLM clients are only loaded in processes that run analyses
+    from main import run_hedge_fund
+    from utils.analysts import ANALYST_ORDER
+
+    selected_analysts = request.analysts or [key for _, key in ANALYST_ORDER]
+    tickers = [request.ticker]
+    output = run_hedge_fund(
+        tickers=tickers,
+        start_date=request.start_date.strftime("%Y-%m-%d"),
+        end_date=request.end_date.strftime("%Y-%m-%d"),
+        portfolio=build_portfolio(tickers),
+        selected_analysts=selected_analysts,
+        model_name=request.model_name or "gpt-4o",
+        model_provider=request.model_provider or "OpenAI",
+    )
+    return signals_to_results(request, output["analyst_signals"])
+
+
+def run_worker(worker_id: int, batch_size: int = 1, poll_interval: float = 2.0, exit_when_idle: bool = False, stop_event: threading.Event | None = None, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+    """
+    Claim and process requests until stopped, or until the queue is empty with exit_when_idle.
+    Requests left processing for longer than lease_seconds by a crashed worker are claimed again.
+    Returns the number of requests processed.
+    """
+    processed = 0
+    db = SessionLocal()
+    requests_repo = AnalysisRequestRepository(AnalysisRequest, db)
+    results_repo = AnalysisResultRepository(AnalysisResult, db)
+    try:
+        while not (stop_event and stop_event.is_set()):
+            claimed = requests_repo.claim_pending(batch_size, lease_seconds)
+            if not claimed:
+                if exit_when_idle:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            for request in claimed:
+                # Read before anything can roll back and expire the loaded request
+                request_id = request.id
+                try:
+                    results = process_request(request)
+                    # Results and the status change land in one transaction
+                    with unit_of_work(db):
+                        results_repo.bulk_create(results)
+                        requests_repo.update_status(request_id, "completed")
+                except Exception as e:
+                    print(f"Worker {worker_id}: request {request_id} failed: {e}")
+                    traceback.print_exc()
+                    db.rollback()
+                    mark_failed(requests_repo, request_id, worker_id)
+                    continue
+                processed += 1
+    finally:
+        db.close()
+    return processed
+
+
+def mark_failed(requests_repo: AnalysisRequestRepository, request_id: int, worker_id: int):
+    """Mark a request as failed, without letting a database error stop the worker."""
+    try:
+        requests_repo.update_status(request_id, "failed", completed_at=datetime.utcnow())
+    except Exception as e:
+        # The request stays processing; the worker moves on rather than dying with it
+        print(f"Worker {worker_id}: could not mark request {request_id} as failed: {e}")
+        requests_repo.db.rollback()
+
+
+def install_db_cache() -> TieredCache:
+    """
+    Serve the analyses' market data from a tiered cache over the database, so data fetched by one
+    worker is reused by every other. The cache gets a session of its own, apart from the queue's.
+    """
+    return use_tiered_cache(SessionLocal())
+
+
+def _run_worker_process(worker_id: int, batch_size: int, poll_interval: float, exit_when_idle: bool, lease_seconds: float) -> int:
+    # Connections inherited from the parent over fork must not be shared with it
+    engine.dispose(close=False)
+    cache = install_db_cache()
+    try:
+        return run_worker(worker_id, batch_size, poll_interval, exit_when_idle, lease_seconds=lease_seconds)
+    finally:
+        cache.l2.db.close()
+
+
+def run_worker_pool(workers: int = 1, mode: str = "process", batch_size: int = 1, poll_interval: float = 2.0, exit_when_idle: bool = False, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+    """
+    Run a pool of workers draining the request queue. Processes sidestep the GIL for the
+    CPU-bound parts of an analysis; threads are lighter when the work is mostly waiting on LLM calls.
+    Returns the total number of requests processed.
+    """
+    if mode == "thread":
+        stop_event = threading.Event()
+        # One cache for the whole process: its lock serializes the worker threads' use of its session
+        cache = install_db_cache()
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-worker") as executor:
+                futures = [executor.submit(run_worker, worker_id, batch_size, poll_interval, exit_when_idle, stop_event, lease_seconds) for worker_id in range(workers)]
+                try:
+                    return sum(future.result() for future in futures)
+                except KeyboardInterrupt:
+                    stop_event.set()
+                    raise
+        finally:
+            cache.l2.db.close()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_worker_process, worker_id, batch_size, poll_interval, exit_when_idle, lease_seconds) for worker_id in range(workers)]
+        return sum(future.result() for future in futures)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process queued analysis requests")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("ANALYSIS_WORKERS") or os.cpu_count() or 1), help="Number of workers in the pool")
+    parser.add_argument("--mode", choices=["process", "thread"], default="process", help="Run workers as processes or threads")
+    parser.add_argument("--batch-size", type=int, default=1, help="Requests each worker claims at a time")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to wait when the queue is empty")
+    parser.add_argument("--exit-when-idle", action="store_true", help="Stop once the queue is empty instead of polling")
+    parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS, help="Seconds before a request left processing by a dead worker is claimed again")
+    args = parser.parse_args()
+
+    processed = run_worker_pool(args.workers, args.mode, args.batch_size, args.poll_interval, args.exit_when_idle, args.lease_seconds)
+    print(f"Processed {processed} analysis requests")
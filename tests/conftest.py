@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# Modules import each other from src/, as when running src/main.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+# The database package builds its engine at import; tests use their own SQLite engines
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from data.cache import Cache, set_cache  # noqa: E402
+from data.price_store import PriceStore  # noqa: E402
+from tools import api  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path):
+    """Give every test an empty data cache whose prices live in a temporary directory."""
+    cache = Cache(price_store=PriceStore(root=str(tmp_path / "prices")))
+    previous = set_cache(cache)
+    yield cache
+    set_cache(previous)
+
+
+@pytest.fixture
+def http_config():
+    """Restore the HTTP client settings (and rebuild its pools) after a test overrides them."""
+    saved = dict(api._http_config)
+    yield api._http_config
+    api._http_config.update(saved)
+    api.configure_http_client()
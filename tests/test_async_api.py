@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from tools import api
+
+
+def _price(day: str, close: float = 10.0) -> dict:
+    return {"open": close, "close": close, "high": close, "low": close, "volume": 100, "time": f"{day}T00:00:00Z"}
+
+
+@pytest.fixture
+def prices_endpoint(monkeypatch):
+    """Serve two days of prices per ticker, recording the tickers requested and the most requests in flight at once."""
+    calls = {"tickers": [], "in_flight": 0, "max_in_flight": 0}
+    lock = threading.Lock()
+
+    def fake_request(method, path, ticker, params=None, json=None):
+        with lock:
+            calls["tickers"].append(ticker)
+            calls["in_flight"] += 1
+            calls["max_in_flight"] = max(calls["max_in_flight"], calls["in_flight"])
+        time.sleep(0.02)
+        with lock:
+            calls["in_flight"] -= 1
+        return {"ticker": ticker, "prices": [_price("2024-01-02"), _price("2024-01-03")]}
+
+    monkeypatch.setattr(api, "_request", fake_request)
+    return calls
+
+
+def test_async_fetch_shares_the_cache_with_sync_calls(prices_endpoint):
+    first = asyncio.run(api.aget_prices("AAPL", "2024-01-01", "2024-01-31"))
+    second = api.get_prices("AAPL", "2024-01-01", "2024-01-31")
+
+    assert [p.time for p in first] == [p.time for p in second] == ["2024-01-02T00:00:00Z", "2024-01-03T00:00:00Z"]
+    assert prices_endpoint["tickers"] == ["AAPL"]
+
+
+def test_batch_fetches_every_ticker_at_most_max_concurrency_at_a_time(prices_endpoint, http_config):
+    api.configure_http_client(pool_size=8)
+    tickers = [f"T{i:02d}" for i in range(12)]
+
+    results = asyncio.run(api.aget_prices_batch(tickers, "2024-01-01", "2024-01-31", max_concurrency=3))
+
+    assert list(results) == tickers
+    assert all(len(prices) == 2 for prices in results.values())
+    assert sorted(prices_endpoint["tickers"]) == tickers
+    assert 1 < prices_endpoint["max_in_flight"] <= 3
+
+
+def test_sync_batch_wrapper_works_inside_a_running_event_loop(prices_endpoint):
+    async def caller():
+        # e.g. a notebook or an async web handler calling the sync API
+        return api.get_prices_batch(["AAPL", "MSFT"], "2024-01-01", "2024-01-31")
+
+    results = asyncio.run(caller())
+
+    assert sorted(results) == ["AAPL", "MSFT"]
+
+
+def test_async_errors_reach_the_caller(monkeypatch):
+    def failing_request(method, path, ticker, params=None, json=None):
+        raise Exception(f"Error fetching data: {ticker} - 500")
+
+    monkeypatch.setattr(api, "_request", failing_request)
+
+    with pytest.raises(Exception, match="Error fetching data"):
+        asyncio.run(api.aget_prices_batch(["AAPL", "MSFT"], "2024-01-01", "2024-01-31"))
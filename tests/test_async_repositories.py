@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database.models import Base
+from database.repositories import AsyncAnalysisRequestRepository, AsyncLineItemObservationRepository, AsyncPriceObservationRepository
+
+
+@pytest.fixture
+def async_session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+
+    async def create_tables():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def test_observations_round_trip(async_session_factory):
+    async def scenario():
+        async with async_session_factory() as db:
+            prices = AsyncPriceObservationRepository(db)
+            bars = [{"open": 1.0, "close": close, "high": 1.0, "low": 1.0, "volume": 10, "time": f"2024-01-0{day}T00:00:00Z"} for day, close in [(2, 1.5), (3, 2.5)]]
+            written = await prices.insert_new("AAPL", bars)
+            return written, await prices.get_dicts("AAPL", "2024-01-03", "2024-01-31"), await prices.latest_update("AAPL")
+
+    written, rows, last_updated = asyncio.run(scenario())
+
+    assert written == 2
+    assert [row["close"] for row in rows] == [2.5]
+    assert last_updated is not None
+
+
+def test_line_item_merge_keeps_union_of_fields(async_session_factory):
+    async def scenario():
+        async with async_session_factory() as db:
+            line_items = AsyncLineItemObservationRepository(db)
+            row = {"ticker": "AAPL", "report_period": "2024-03-31", "period": "ttm", "currency": "USD"}
+            await line_items.merge("AAPL", [{**row, "revenue": 10.0}])
+            await line_items.merge("AAPL", [{**row, "net_income": 2.0}])
+            return await line_items.get_dicts("AAPL")
+
+    (merged,) = asyncio.run(scenario())
+
+    assert (merged["revenue"], merged["net_income"]) == (10.0, 2.0)
+
+
+def test_claim_and_complete_request(async_session_factory):
+    async def scenario():
+        async with async_session_factory() as db:
+            requests = AsyncAnalysisRequestRepository(db)
+            created = await requests.create({"user_id": 1, "ticker": "MSFT", "start_date": datetime(2024, 1, 1), "end_date": datetime(2024, 2, 1), "status": "pending"})
+            claimed = await requests.claim_pending(5)
+            await requests.update_status(created.id, "completed")
+            return [request.id for request in claimed], (await requests.get(created.id)).status
+
+    claimed_ids, status = asyncio.run(scenario())
+
+    assert len(claimed_ids) == 1
+    assert status == "completed"
+
+
+def test_unknown_methods_are_not_forwarded(async_session_factory):
+    async def scenario():
+        async with async_session_factory() as db:
+            return AsyncPriceObservationRepository(db)
+
+    with pytest.raises(AttributeError):
+        asyncio.run(scenario()).get_prices
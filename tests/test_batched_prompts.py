@@ -0,0 +1,118 @@
+import asyncio
+from typing import Literal
+
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel
+
+from utils import llm
+
+
+class Signal(BaseModel):
+    signal: Literal["bullish", "bearish", "neutral"]
+    confidence: float
+    reasoning: str
+
+
+ANALYSES = {ticker: {"score": score} for ticker, score in [("AAPL", 7), ("MSFT", 5), ("NVDA", 9)]}
+
+
+def _requests() -> dict[str, dict]:
+    template = ChatPromptTemplate.from_messages([("system", "You are a value investor."), ("human", "Analyze {ticker}: {data}")])
+    return {
+        ticker: {
+            "prompt": template.invoke({"ticker": ticker, "data": analysis}),
+            "model_name": "test-model",
+            "model_provider": "Test",
+            "pydantic_model": Signal,
+            "agent_name": "test_agent",
+        }
+        for ticker, analysis in ANALYSES.items()
+    }
+
+
+class ScriptedLLM:
+    """Answers batched calls with signals for the given tickers only, and single-ticker calls with a neutral signal."""
+
+    def __init__(self, batch_tickers: list[str] | None):
+        self.batch_tickers = batch_tickers
+        self.calls = []
+
+    def answer(self, prompt, pydantic_model, **kwargs):
+        if pydantic_model is Signal:
+            ticker = prompt.to_messages()[1].content.split(":")[0].removeprefix("Analyze ")
+            self.calls.append(ticker)
+            return Signal(signal="neutral", confidence=50, reasoning=f"single {ticker}")
+        self.calls.append(tuple(prompt[1].content.split("tickers: ")[1].split("\n")[0].split(", ")))
+        if self.batch_tickers is None:
+            # A batch that failed validation comes back as the request's default: None
+            return kwargs["default_factory"]()
+        return pydantic_model(signals={t: Signal(signal="bullish", confidence=80, reasoning=f"batch {t}") for t in self.batch_tickers})
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    def install(batch_tickers):
+        fake = ScriptedLLM(batch_tickers)
+        monkeypatch.setattr(llm, "call_llm", fake.answer)
+
+        async def acall(**kwargs):
+            return fake.answer(**kwargs)
+
+        monkeypatch.setattr(llm, "acall_llm", acall)
+        return fake
+
+    return install
+
+
+def test_batched_call_sends_the_system_prompt_once_with_every_analysis():
+    request = llm.batch_llm_request(_requests(), ANALYSES)
+    system, human = request["prompt"]
+
+    assert system.content == "You are a value investor."
+    assert "AAPL, MSFT, NVDA" in human.content
+    for ticker in ANALYSES:
+        assert f"Analysis Data for {ticker}:" in human.content
+    assert request["pydantic_model"] is llm.batch_signal_model(Signal)
+    assert request["default_factory"]() is None
+
+
+def test_tickers_missing_from_a_batch_get_their_own_call(scripted):
+    fake = scripted(batch_tickers=["AAPL", "NVDA"])
+    outputs = llm.call_llm_for_tickers(_requests(), ANALYSES, batch_size=3)
+
+    assert fake.calls == [("AAPL", "MSFT", "NVDA"), "MSFT"]
+    assert {ticker: output.reasoning for ticker, output in outputs.items()} == {
+        "AAPL": "batch AAPL",
+        "MSFT": "single MSFT",
+        "NVDA": "batch NVDA",
+    }
+
+
+def test_failed_batch_falls_back_to_per_ticker_calls(scripted):
+    fake = scripted(batch_tickers=None)
+    outputs = llm.call_llm_for_tickers(_requests(), ANALYSES, batch_size=2)
+
+    # The trailing chunk of one ticker is never batched
+    assert fake.calls == [("AAPL", "MSFT"), "AAPL", "MSFT", "NVDA"]
+    assert all(output.reasoning.startswith("single") for output in outputs.values())
+    assert list(outputs) == list(ANALYSES)
+
+
+def test_async_batching_falls_back_the_same_way(scripted):
+    fake = scripted(batch_tickers=["MSFT"])
+    outputs = asyncio.run(llm.acall_llm_for_tickers(_requests(), ANALYSES, batch_size=2))
+
+    assert sorted(map(str, fake.calls)) == sorted(map(str, [("AAPL", "MSFT"), "AAPL", "NVDA"]))
+    assert {ticker: output.reasoning for ticker, output in outputs.items()} == {
+        "AAPL": "single AAPL",
+        "MSFT": "batch MSFT",
+        "NVDA": "single NVDA",
+    }
+
+
+def test_batch_size_one_makes_one_call_per_ticker(scripted):
+    fake = scripted(batch_tickers=list(ANALYSES))
+    llm.call_llm_for_tickers(_requests(), ANALYSES, batch_size=1)
+
+    assert fake.calls == ["AAPL", "MSFT", "NVDA"]
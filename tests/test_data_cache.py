@@ -0,0 +1,105 @@
+import sys
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from data.cache import Cache
+from data.price_store import PriceStore
+
+
+def _news(ticker: str, day: int) -> dict:
+    published = (date(2024, 1, 1) + timedelta(days=day)).isoformat()
+    return {
+        "ticker": ticker,
+        "title": f"{ticker} story {day}",
+        "author": "Staff",
+        "source": "Wire",
+        "date": published,
+        "url": f"https://example.com/{ticker}/{day}",
+    }
+
+
+@pytest.fixture
+def fast_switching():
+    """Switch threads far more often than usual so unguarded read-modify-write sequences interleave."""
+    previous = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(previous)
+
+
+def test_concurrent_out_of_order_adds_keep_records_sorted_and_unique(isolated_cache, fast_switching):
+    # Each writer inserts an interleaved slice of days, newest first, so most adds merge into the middle
+    writers = 8
+    days = list(range(400))
+    errors = []
+
+    def write(offset):
+        try:
+            for day in reversed(days[offset::writers]):
+                isolated_cache.set_company_news("AAPL", [_news("AAPL", day), _news("AAPL", (day + 1) % len(days))])
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        try:
+            for _ in range(200):
+                found = isolated_cache.find_company_news("AAPL", None, "2030-01-01")
+                assert [n.date for n in found] == sorted((n.date for n in found), reverse=True)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(offset,)) for offset in range(writers)]
+    threads += [threading.Thread(target=read) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    cached = isolated_cache.get_company_news("AAPL")
+    assert [row["url"] for row in cached] == [_news("AAPL", day)["url"] for day in days]
+
+
+def test_line_item_merges_from_many_threads_keep_every_field(isolated_cache, fast_switching):
+    fields = [f"field_{i}" for i in range(32)]
+
+    def write(field):
+        for report_period in ("2024-03-31", "2024-06-30"):
+            isolated_cache.set_line_items("MSFT", [{"period": "ttm", "report_period": report_period, field: 1.0}])
+            isolated_cache.add_line_item_fields("MSFT", "ttm", [report_period], {field})
+
+    threads = [threading.Thread(target=write, args=(field,)) for field in fields]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for row in isolated_cache.get_line_items("MSFT"):
+        assert set(fields) <= row.keys()
+    assert isolated_cache.get_line_item_fields("MSFT", "ttm", "2024-06-30") == set(fields)
+
+
+def test_evicting_a_ticker_forgets_its_coverage(tmp_path):
+    # Room for about one ticker's news, so caching a second evicts the first
+    probe = Cache(price_store=PriceStore(root=str(tmp_path / "probe")))
+    probe.set_company_news("AAPL", [_news("AAPL", day) for day in range(50)])
+    budget = probe.stats()["company_news"]["bytes"] * 3 // 2
+
+    cache = Cache(price_store=PriceStore(root=str(tmp_path / "prices")), max_bytes=budget)
+    cache.set_company_news("AAPL", [_news("AAPL", day) for day in range(50)])
+    cache.add_coverage("company_news", "AAPL", "2024-01-01", "2024-02-19")
+    cache.set_company_news("MSFT", [_news("MSFT", day) for day in range(50)])
+
+    assert cache.stats()["company_news"]["evictions"] == 1
+    assert cache.find_company_news("AAPL", None, "2030-01-01") == []
+    assert not cache.get_coverage("company_news", "AAPL")
+    assert len(cache.find_company_news("MSFT", None, "2030-01-01")) == 50
+
+
+def test_returned_line_item_fields_are_a_snapshot(isolated_cache):
+    isolated_cache.add_line_item_fields("NVDA", "ttm", ["2024-03-31"], {"revenue"})
+    fields = isolated_cache.get_line_item_fields("NVDA", "ttm", "2024-03-31")
+    fields.add("net_income")
+    assert isolated_cache.get_line_item_fields("NVDA", "ttm", "2024-03-31") == {"revenue"}
@@ -0,0 +1,97 @@
+import pytest
+
+from tools import api
+
+# The planner reads each analyst's declared data from utils.analysts, which imports the agents and their LLM clients
+data_planner = pytest.importorskip("utils.data_planner")
+from utils.analysts import ANALYST_CONFIG  # noqa: E402
+
+START_DATE = "2024-01-01"
+END_DATE = "2024-03-31"
+TICKERS = ["AAPL", "MSFT"]
+
+# Empty answers in the shape of each endpoint, so every fetch completes without data
+EMPTY_RESPONSES = {
+    "/prices/": {"prices": []},
+    "/financial-metrics/": {"financial_metrics": []},
+    "/financials/search/line-items": {"search_results": []},
+    "/insider-trades/": {"insider_trades": []},
+    "/news/": {"news": []},
+}
+
+
+def _declared_fields(analysts: list[str]) -> dict[str, set[str]]:
+    fields = {}
+    for key in analysts:
+        for request in ANALYST_CONFIG[key].get("line_items", []):
+            fields.setdefault(request["period"], set()).update(request["line_items"])
+    return fields
+
+
+@pytest.fixture
+def api_calls(monkeypatch):
+    """Answer every data API request with an empty result and record (path, tickers) for each."""
+    calls = []
+
+    def fake_request(method, path, ticker, params=None, json=None):
+        calls.append((path, ticker))
+        return {"ticker": ticker, **EMPTY_RESPONSES[path]}
+
+    monkeypatch.setattr(api, "_request", fake_request)
+    return calls
+
+
+def test_plan_merges_the_selected_analysts_requirements():
+    analysts = ["ben_graham", "charlie_munger"]
+    plan = data_planner.build_fetch_plan(analysts, START_DATE, END_DATE)
+
+    assert plan["prices"] == (START_DATE, END_DATE)
+    # Both read 10 annual periods and the ttm metrics behind market cap; a quarter-long range adds two more of each
+    assert {request["period"]: request["limit"] for request in plan["financial_metrics"]} == {"annual": 12, "ttm": 12}
+    # One line-item request per period, with the union of both analysts' fields and no others
+    assert {request["period"]: set(request["line_items"]) for request in plan["line_items"]} == _declared_fields(analysts)
+    assert all(len(request["line_items"]) == len(set(request["line_items"])) for request in plan["line_items"])
+    # Charlie Munger reads a year of insider trades and news before the first run date
+    assert plan["insider_trades"] == ("2023-01-01", END_DATE)
+    assert plan["company_news"] == ("2023-01-01", END_DATE)
+
+
+def test_plan_leaves_out_data_no_selected_analyst_reads():
+    plan = data_planner.build_fetch_plan(["ben_graham"], START_DATE, END_DATE)
+
+    assert plan["insider_trades"] is None
+    assert plan["company_news"] is None
+    assert {request["period"] for request in plan["financial_metrics"]} == {"annual", "ttm"}
+
+
+def test_the_longest_lookback_wins():
+    lookbacks = {key: config["company_news"]["lookback_days"] for key, config in ANALYST_CONFIG.items() if "company_news" in config}
+    plan = data_planner.build_fetch_plan(list(lookbacks), START_DATE, END_DATE)
+
+    assert plan["company_news"] == (data_planner._days_before(START_DATE, max(lookbacks.values())), END_DATE)
+
+
+def test_prefetch_makes_only_the_planned_calls(api_calls):
+    plan = data_planner.prefetch_analyst_data(["ben_graham"], TICKERS, START_DATE, END_DATE)
+
+    # Prices and each metrics period per ticker, and one multi-ticker line-item search per period
+    expected = {("/prices/", ticker) for ticker in TICKERS}
+    expected |= {("/financial-metrics/", ticker) for ticker in TICKERS}
+    expected.add(("/financials/search/line-items", ",".join(TICKERS)))
+    assert set(api_calls) == expected
+    assert len(api_calls) == len(TICKERS) * (1 + len(plan["financial_metrics"])) + len(plan["line_items"])
+
+
+def test_prefetch_fetches_events_only_over_the_planned_range(api_calls, monkeypatch):
+    ranges = []
+    ensure_events = api._ensure_events
+
+    def record_range(data_type, ticker, start_date, end_date, limit):
+        ranges.append((data_type, ticker, start_date, end_date))
+        return ensure_events(data_type, ticker, start_date, end_date, limit)
+
+    monkeypatch.setattr(api, "_ensure_events", record_range)
+    plan = data_planner.prefetch_analyst_data(["charlie_munger"], TICKERS, START_DATE, END_DATE)
+
+    assert sorted(ranges) == sorted((data_type, ticker, *plan[data_type]) for data_type in ("insider_trades", "company_news") for ticker in TICKERS)
+    assert {path for path, _ in api_calls} == set(EMPTY_RESPONSES)
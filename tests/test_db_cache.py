@@ -0,0 +1,210 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from data.cache import set_cache
+from data.price_store import PriceStore
+from database.data import cache as tiered_cache
+from database.data.cache import TieredCache
+from database.data.db_cache_adapter import DatabaseBackedCache
+from database.models import Base
+from tools import api
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def _price(day: str, close: float = 10.0) -> dict:
+    return {"open": close, "close": close, "high": close, "low": close, "volume": 100, "time": f"{day}T00:00:00Z"}
+
+
+def _news(day: int) -> dict:
+    published = f"2024-01-{day:02d}"
+    return {"ticker": "AAPL", "title": f"story {day}", "author": "Staff", "source": "Wire", "date": published, "url": f"https://example.com/{day}"}
+
+
+class CountingCache(DatabaseBackedCache):
+    """Counts the L2 lookups and loads a TieredCache makes."""
+
+    def __init__(self, db):
+        super().__init__(db)
+        self.calls = []
+
+    def last_updated(self, data_type, ticker):
+        self.calls.append(("last_updated", data_type, ticker))
+        return super().last_updated(data_type, ticker)
+
+    def get_company_news(self, ticker):
+        self.calls.append(("get_company_news", ticker))
+        return super().get_company_news(ticker)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Stands in for time.monotonic in the tiered cache, so the revalidation window can be stepped over."""
+    now = [1000.0]
+    monkeypatch.setattr(tiered_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _serve_prices(monkeypatch, days: list[str]) -> list[dict]:
+    """Serve the given trading days from a fake prices endpoint and return the requests made."""
+    requests = []
+
+    def fake_request(method, path, ticker, params=None, json=None):
+        requests.append(params)
+        return {"ticker": ticker, "prices": [_price(day) for day in days if params["start_date"] <= day <= params["end_date"]]}
+
+    monkeypatch.setattr(api, "_request", fake_request)
+    return requests
+
+
+def test_fresh_database_ignores_price_store_coverage(db_session, tmp_path, monkeypatch):
+    # A price store elsewhere already covers the range, but this database holds no rows
+    monkeypatch.setenv("PRICE_STORE_DIR", str(tmp_path / "prices"))
+    PriceStore().save_coverage("AAPL", [("2024-01-01", "2024-01-31")])
+    set_cache(DatabaseBackedCache(db_session))
+    requests = _serve_prices(monkeypatch, ["2024-01-02", "2024-01-03"])
+
+    prices = api.get_prices("AAPL", "2024-01-01", "2024-01-31")
+
+    assert [price.time[:10] for price in prices] == ["2024-01-02", "2024-01-03"]
+    assert len(requests) == 1
+
+
+def test_database_cache_only_fetches_uncovered_ranges(db_session, monkeypatch):
+    set_cache(DatabaseBackedCache(db_session))
+    requests = _serve_prices(monkeypatch, ["2024-01-02", "2024-01-03", "2024-02-01"])
+
+    api.get_prices("AAPL", "2024-01-01", "2024-01-31")
+    prices = api.get_prices("AAPL", "2024-01-01", "2024-02-29")
+
+    assert [(params["start_date"], params["end_date"]) for params in requests] == [("2024-01-01", "2024-01-31"), ("2024-02-01", "2024-02-29")]
+    assert len(prices) == 3
+
+
+def test_refetched_price_bars_replace_stored_ones(db_session):
+    cache = DatabaseBackedCache(db_session)
+
+    cache.set_prices("AAPL", [_price("2024-01-02", 10.0), _price("2024-01-03", 11.0)])
+    # The 3rd was fetched again (e.g. while it was still trading), so its refreshed bar replaces the stored one
+    cache.set_prices("AAPL", [_price("2024-01-03", 99.0), _price("2024-01-04", 12.0)])
+
+    assert [row["close"] for row in cache.get_prices("AAPL")] == [10.0, 99.0, 12.0]
+
+
+def test_tiered_cache_sees_writes_from_another_instance(db_session):
+    reader = TieredCache(DatabaseBackedCache(db_session), revalidate_seconds=0)
+    writer = DatabaseBackedCache(db_session)
+
+    assert reader.get_prices("AAPL") is None
+    writer.set_prices("AAPL", [_price("2024-01-02")])
+    db_session.commit()
+
+    assert [row["time"] for row in reader.get_prices("AAPL")] == ["2024-01-02T00:00:00Z"]
+    assert reader.tier_stats()["prices"]["invalidations"] == 1
+
+
+def test_tiered_cache_serves_repeat_reads_from_l1(db_session, clock):
+    DatabaseBackedCache(db_session).set_company_news("AAPL", [_news(2), _news(3)])
+    l2 = CountingCache(db_session)
+    cache = TieredCache(l2, revalidate_seconds=30)
+
+    first = cache.find_company_news("AAPL", None, "2024-12-31")
+    second = cache.find_company_news("AAPL", "2024-01-03", "2024-12-31")
+
+    assert [n.date for n in first] == ["2024-01-03", "2024-01-02"]
+    assert [n.date for n in second] == ["2024-01-03"]
+    # Only the first read reached the database; it was promoted to L1 in one load
+    assert l2.calls == [("last_updated", "company_news", "AAPL"), ("get_company_news", "AAPL")]
+    stats = cache.tier_stats()["company_news"]
+    assert (stats["l2_hits"], stats["l1_hits"], stats["misses"]) == (1, 1, 0)
+    assert stats["l1_hit_rate"] == 0.5
+
+
+def test_tiered_cache_remembers_misses_and_writes_through(db_session, clock):
+    l2 = CountingCache(db_session)
+    cache = TieredCache(l2, revalidate_seconds=30)
+
+    assert cache.find_company_news("AAPL", None, "2024-12-31") == []
+    assert cache.find_company_news("AAPL", None, "2024-12-31") == []
+    cache.set_company_news("AAPL", [_news(2)])
+
+    assert [n.date for n in cache.find_company_news("AAPL", None, "2024-12-31")] == ["2024-01-02"]
+    assert [row["date"] for row in DatabaseBackedCache(db_session).get_company_news("AAPL")] == ["2024-01-02"]
+    # The write went to L1 too, so nothing was loaded back from L2
+    assert ("get_company_news", "AAPL") not in l2.calls
+    assert cache.tier_stats()["company_news"]["misses"] == 2
+
+
+def test_tiered_cache_trusts_l1_until_the_revalidation_window_passes(db_session, clock):
+    l2 = CountingCache(db_session)
+    cache = TieredCache(l2, revalidate_seconds=30)
+    other_process = DatabaseBackedCache(db_session)
+    other_process.set_company_news("AAPL", [_news(2)])
+    cache.find_company_news("AAPL", None, "2024-12-31")
+
+    other_process.set_company_news("AAPL", [_news(3)])
+    clock[0] += 29
+    assert len(cache.find_company_news("AAPL", None, "2024-12-31")) == 1
+    assert len(l2.calls) == 2
+
+    clock[0] += 1
+    assert [n.date for n in cache.find_company_news("AAPL", None, "2024-12-31")] == ["2024-01-03", "2024-01-02"]
+    assert cache.tier_stats()["company_news"]["invalidations"] == 1
+
+    # Unchanged since, so the next check past the window keeps the entry without reloading it
+    clock[0] += 30
+    cache.find_company_news("AAPL", None, "2024-12-31")
+    assert [call[0] for call in l2.calls].count("get_company_news") == 2
+    assert cache.tier_stats()["company_news"]["invalidations"] == 1
+
+
+def test_tiered_cache_evicts_over_budget_and_reloads_from_l2(db_session, clock):
+    l2 = CountingCache(db_session)
+    l2.set_company_news("AAPL", [_news(day) for day in range(1, 29)])
+    l2.set_company_news("MSFT", [{**_news(day), "ticker": "MSFT"} for day in range(1, 29)])
+    # Room for about one ticker's news, so loading the second evicts the first
+    probe = TieredCache(CountingCache(db_session))
+    probe.find_company_news("AAPL", None, "2024-12-31")
+    budget = probe.stats()["l1"]["company_news"]["bytes"] * 3 // 2
+    cache = TieredCache(l2, max_bytes=budget, revalidate_seconds=30)
+
+    cache.find_company_news("AAPL", None, "2024-12-31")
+    cache.find_company_news("MSFT", None, "2024-12-31")
+    assert cache.stats()["l1"]["company_news"]["evictions"] == 1
+
+    # Evicted from L1 but still in L2: loaded again in full rather than reported as a miss
+    assert len(cache.find_company_news("AAPL", None, "2024-12-31")) == 28
+    stats = cache.tier_stats()["company_news"]
+    assert (stats["l2_hits"], stats["misses"]) == (3, 0)
+
+
+def test_database_cache_serializes_threads_sharing_its_session(db_session):
+    cache = DatabaseBackedCache(db_session)
+    errors = []
+
+    def work(ticker):
+        try:
+            for day in range(1, 21):
+                cache.set_prices(ticker, [_price(f"2024-01-{day:02d}", float(day))])
+                assert len(cache.get_prices(ticker)) == day
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(f"T{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
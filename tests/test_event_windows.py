@@ -0,0 +1,157 @@
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from data.cache import Cache, set_cache
+from data.price_store import PriceStore
+from tools import api
+
+
+def _fake_insider_trades(method, path, ticker, params=None, json=None):
+    """Answer every window with one trade filed on its last day."""
+    return {
+        "insider_trades": [
+            {
+                "ticker": ticker,
+                "issuer": None,
+                "name": "Jane Doe",
+                "title": None,
+                "is_board_director": None,
+                "transaction_date": params["filing_date_lte"],
+                "transaction_shares": 100.0,
+                "transaction_price_per_share": 10.0,
+                "transaction_value": 1000.0,
+                "shares_owned_before_transaction": None,
+                "shares_owned_after_transaction": None,
+                "security_title": "Common Stock",
+                "filing_date": params["filing_date_lte"],
+            }
+        ]
+    }
+
+
+def test_batch_with_pool_size_equal_to_tickers_does_not_deadlock(monkeypatch, http_config):
+    # Every pool worker runs one ticker, and each ticker's year spans several windows
+    api.configure_http_client(pool_size=4, max_concurrency=4)
+    monkeypatch.setitem(http_config, "pagination_window_days", 90)
+    monkeypatch.setattr(api, "_request", _fake_insider_trades)
+    tickers = ["AAPL", "MSFT", "NVDA", "TSLA"]
+
+    # Hold each ticker until all of them occupy a pool worker, before any window is submitted
+    all_running = threading.Barrier(len(tickers), timeout=5)
+    split_segments = api._split_segments
+
+    def split_when_all_running(*args):
+        all_running.wait()
+        return split_segments(*args)
+
+    monkeypatch.setattr(api, "_split_segments", split_when_all_running)
+    end_date = date.today() - timedelta(days=1)
+    start_date = end_date - timedelta(days=365)
+
+    results = {}
+    worker = threading.Thread(
+        target=lambda: results.update(api.get_insider_trades_batch(tickers, end_date.isoformat(), start_date.isoformat())),
+        daemon=True,
+    )
+    worker.start()
+    worker.join(timeout=10)
+
+    assert not worker.is_alive(), "batch fetch deadlocked"
+    assert sorted(results) == tickers
+    # One trade per 90-day window across 366 days
+    assert all(len(trades) == 5 for trades in results.values())
+
+
+def test_windows_are_fetched_once_then_served_from_cache(monkeypatch):
+    calls = []
+
+    def fake_request(method, path, ticker, params=None, json=None):
+        calls.append((params["filing_date_gte"], params["filing_date_lte"]))
+        return _fake_insider_trades(method, path, ticker, params, json)
+
+    monkeypatch.setattr(api, "_request", fake_request)
+    first = api.get_insider_trades("AAPL", "2024-06-30", "2024-01-01")
+    fetched = len(calls)
+    second = api.get_insider_trades("AAPL", "2024-06-30", "2024-01-01")
+
+    assert fetched == len(api._split_window("2024-01-01", "2024-06-30", api._http_config["pagination_window_days"]))
+    assert len(calls) == fetched
+    assert first == second
+
+
+def test_unbounded_stream_yields_every_cached_item(isolated_cache, monkeypatch):
+    # More trades are cached than one API page holds; the stream sees all of them, as get_insider_trades does
+    trades = [_fake_insider_trades("GET", "/insider-trades/", "AAPL", {"filing_date_lte": f"2024-01-{day:02d}"})["insider_trades"][0] for day in range(1, 31)]
+    isolated_cache.set_insider_trades("AAPL", trades)
+    monkeypatch.setattr(api, "_request", lambda *args, **kwargs: pytest.fail("cached trades should not be fetched"))
+
+    streamed = list(api.iter_insider_trades("AAPL", "2024-02-01", limit=10))
+
+    assert streamed == api.get_insider_trades("AAPL", "2024-02-01", limit=10)
+    assert len(streamed) == 30
+    assert [trade.filing_date for trade in streamed] == sorted((trade["filing_date"] for trade in trades), reverse=True)
+
+
+def test_stream_downloads_at_most_max_concurrency_windows_ahead(monkeypatch, http_config):
+    api.configure_http_client(pool_size=8, max_concurrency=2)
+    monkeypatch.setitem(http_config, "pagination_window_days", 30)
+    in_flight = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def slow_request(method, path, ticker, params=None, json=None):
+        with lock:
+            in_flight.append(params["filing_date_lte"])
+            peak[0] = max(peak[0], len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.remove(params["filing_date_lte"])
+        return _fake_insider_trades(method, path, ticker, params, json)
+
+    monkeypatch.setattr(api, "_request", slow_request)
+
+    # A year of 30-day windows: all thirteen are fetched, but never more than two at a time
+    assert len(list(api.iter_insider_trades("AAPL", "2023-12-31", "2023-01-01"))) == 13
+    assert peak[0] == 2
+
+
+def test_stopping_a_stream_early_does_not_fetch_the_remaining_windows(monkeypatch, http_config):
+    api.configure_http_client(pool_size=8, max_concurrency=2)
+    monkeypatch.setitem(http_config, "pagination_window_days", 30)
+    calls = []
+
+    def fake_request(method, path, ticker, params=None, json=None):
+        calls.append(params["filing_date_lte"])
+        return _fake_insider_trades(method, path, ticker, params, json)
+
+    monkeypatch.setattr(api, "_request", fake_request)
+
+    stream = api.iter_insider_trades("AAPL", "2023-12-31", "2023-01-01")
+    assert next(stream).filing_date == "2023-12-31"
+    stream.close()
+
+    # The window consumed, plus at most max_concurrency fetched ahead of it
+    assert len(calls) <= 3
+
+
+def test_stream_and_cached_call_filter_trades_by_the_same_date(monkeypatch, tmp_path):
+    def filed_after_trading(method, path, ticker, params=None, json=None):
+        # Each window holds a trade made ten days before it was filed, and one filed on the window's first day
+        trades = _fake_insider_trades(method, path, ticker, params, json)["insider_trades"]
+        late = {**trades[0], "transaction_date": api._shift_date(params["filing_date_lte"], -10)}
+        early = {**trades[0], "filing_date": params["filing_date_gte"], "transaction_date": api._shift_date(params["filing_date_gte"], -10)}
+        return {"insider_trades": [late, early]}
+
+    monkeypatch.setattr(api, "_request", filed_after_trading)
+
+    streamed = list(api.iter_insider_trades("AAPL", "2023-06-30", "2023-01-01"))
+    set_cache(Cache(price_store=PriceStore(root=str(tmp_path / "fresh"))))
+    fetched = api.get_insider_trades("AAPL", "2023-06-30", "2023-01-01")
+
+    assert streamed == fetched
+    # Trades made before start_date are left out, even though they were filed inside the range
+    assert all(trade.transaction_date >= "2023-01-01" for trade in streamed)
+    assert [trade.transaction_date for trade in streamed] == sorted((trade.transaction_date for trade in streamed), reverse=True)
@@ -0,0 +1,112 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from tools import api
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    """Serves prices over keep-alive connections, first answering with any failures queued on the server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.client_address)
+            failure = server.failures.pop(0) if server.failures else None
+        if failure == "drop":
+            # Hang up without answering, as a reset or idle-closed connection looks to the client
+            self.close_connection = True
+            return
+
+        ticker = parse_qs(urlsplit(self.path).query)["ticker"][0]
+        data = {"error": "try again"} if failure else {"ticker": ticker, "prices": [{"open": 1.0, "close": 1.0, "high": 1.0, "low": 1.0, "volume": 10, "time": "2024-01-02T00:00:00Z"}]}
+        payload = json.dumps(data).encode()
+        self.send_response(failure or 200)
+        if failure == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(http_config, monkeypatch):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ScriptedHandler)
+    httpd.lock = threading.Lock()
+    httpd.requests = []
+    httpd.failures = []
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    api.configure_http_client(base_url=f"http://127.0.0.1:{httpd.server_port}", pool_size=4)
+    # Retry at once rather than after a real backoff
+    monkeypatch.setattr(api, "_BACKOFF_BASE", 0.0)
+    yield httpd
+    # Close the pooled connections before the server goes away
+    api.configure_http_client()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _connections(server) -> set:
+    return set(server.requests)
+
+
+def test_sequential_requests_reuse_one_connection(server):
+    for ticker in ["AAPL", "MSFT", "NVDA", "TSLA", "AMZN"]:
+        assert len(api.get_prices(ticker, "2024-01-01", "2024-01-31")) == 1
+
+    assert len(server.requests) == 5
+    assert len(_connections(server)) == 1
+
+
+def test_concurrent_requests_share_the_connection_pool(server):
+    tickers = [f"T{i:02d}" for i in range(24)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda ticker: api.get_prices(ticker, "2024-01-01", "2024-01-31"), tickers))
+
+    assert all(len(prices) == 1 for prices in results)
+    assert len(server.requests) == 24
+    # Never more connections than the pool holds, each reused for several requests
+    assert len(_connections(server)) <= 4
+
+
+def test_retryable_statuses_are_retried_on_the_same_connection(server):
+    server.failures = [503, 429, 502]
+
+    assert len(api.get_prices("AAPL", "2024-01-01", "2024-01-31")) == 1
+    assert len(server.requests) == 4
+    assert len(_connections(server)) == 1
+
+
+def test_dropped_connection_is_retried_on_a_new_one(server):
+    server.failures = ["drop"]
+
+    assert len(api.get_prices("AAPL", "2024-01-01", "2024-01-31")) == 1
+    assert len(server.requests) == 2
+    assert len(_connections(server)) == 2
+
+
+def test_client_errors_are_not_retried(server):
+    server.failures = [404]
+
+    with pytest.raises(Exception, match="404"):
+        api.get_prices("AAPL", "2024-01-01", "2024-01-31")
+    assert len(server.requests) == 1
+
+
+def test_retries_stop_after_max_retries(server):
+    api.configure_http_client(max_retries=2)
+    server.failures = [503] * 5
+
+    with pytest.raises(Exception, match="503"):
+        api.get_prices("AAPL", "2024-01-01", "2024-01-31")
+    assert len(server.requests) == 3
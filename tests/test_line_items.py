@@ -0,0 +1,109 @@
+from datetime import date
+
+import pytest
+
+from tools import api
+
+REPORT_PERIODS = ["2024-03-31", "2023-12-31", "2023-09-30", "2023-06-30"]
+
+
+class FakeLineItemAPI:
+    """Answers line-item searches from a fixed set of quarterly reports and records each request body."""
+
+    def __init__(self):
+        self.bodies = []
+
+    def __call__(self, method, path, ticker, params=None, json=None):
+        self.bodies.append(json)
+        results = [
+            {"ticker": ticker, "report_period": report_period, "period": json["period"], "currency": "USD", **{field: 1.0 for field in json["line_items"]}}
+            for ticker in json["tickers"]
+            for report_period in REPORT_PERIODS
+            if report_period <= json["end_date"]
+        ]
+        return {"search_results": results}
+
+
+@pytest.fixture
+def line_item_api(monkeypatch):
+    fake = FakeLineItemAPI()
+    monkeypatch.setattr(api, "_request", fake)
+    return fake
+
+
+def test_query_ending_today_is_served_from_cache(line_item_api):
+    today = date.today().isoformat()
+
+    first = api.search_line_items("AAPL", ["revenue", "net_income"], today, period="quarterly", limit=10)
+    second = api.search_line_items("AAPL", ["revenue"], today, period="quarterly", limit=10)
+
+    assert len(line_item_api.bodies) == 1
+    assert [item.report_period for item in second] == REPORT_PERIODS
+    assert [item.revenue for item in second] == [item.revenue for item in first]
+
+
+def test_prefetch_for_today_answers_later_searches(line_item_api):
+    today = date.today().isoformat()
+
+    assert api.prefetch_line_items(["AAPL", "MSFT"], ["revenue", "free_cash_flow"], today, limit=10) == 1
+    for ticker in ["AAPL", "MSFT"]:
+        items = api.search_line_items(ticker, ["free_cash_flow"], today, limit=10)
+        assert [item.report_period for item in items] == REPORT_PERIODS
+    # A second prefetch finds everything cached
+    assert api.prefetch_line_items(["AAPL", "MSFT"], ["revenue"], today, limit=10) == 0
+    assert len(line_item_api.bodies) == 1
+
+
+def test_only_missing_fields_are_fetched(line_item_api):
+    api.search_line_items("AAPL", ["revenue"], "2024-06-30", limit=10)
+    api.search_line_items("AAPL", ["revenue", "capital_expenditure"], "2024-06-30", limit=10)
+
+    assert [body["line_items"] for body in line_item_api.bodies] == [["revenue"], ["capital_expenditure"]]
+
+
+class GlobalLimitLineItemAPI:
+    """Applies the limit to the whole multi-ticker response, as the search endpoint may, and ticker histories differ in length."""
+
+    def __init__(self, periods_by_ticker: dict[str, int]):
+        self.periods_by_ticker = periods_by_ticker
+        self.bodies = []
+
+    def __call__(self, method, path, ticker, params=None, json=None):
+        self.bodies.append(json)
+        results = [
+            {"ticker": ticker, "report_period": f"{2024 - year}-12-31", "period": json["period"], "currency": "USD", **{field: 1.0 for field in json["line_items"]}}
+            for ticker in json["tickers"]
+            for year in range(self.periods_by_ticker[ticker])
+        ]
+        return {"search_results": results[: json["limit"]]}
+
+
+def _annual_periods(ticker: str) -> list[str]:
+    return [item.report_period for item in api.search_line_items(ticker, ["revenue"], "2024-12-31", period="annual", limit=3)]
+
+
+def test_prefetch_gives_every_ticker_room_for_limit_periods(monkeypatch):
+    fake = GlobalLimitLineItemAPI({"AAPL": 3, "MSFT": 2, "NVDA": 3})
+    monkeypatch.setattr(api, "_request", fake)
+
+    api.prefetch_line_items(["AAPL", "MSFT", "NVDA"], ["revenue"], "2024-12-31", period="annual", limit=3, batch_size=3)
+
+    assert fake.bodies[0]["limit"] == 9
+    # MSFT's short history came back whole, so it is known to have nothing older
+    assert _annual_periods("MSFT") == ["2024-12-31", "2023-12-31"]
+    assert _annual_periods("NVDA") == ["2024-12-31", "2023-12-31", "2022-12-31"]
+    assert len(fake.bodies) == 1
+
+
+def test_full_prefetch_response_does_not_mark_cut_off_tickers_complete(monkeypatch):
+    fake = GlobalLimitLineItemAPI({"AAPL": 8, "MSFT": 2, "NVDA": 3})
+    monkeypatch.setattr(api, "_request", fake)
+
+    # AAPL fills most of the shared response, so MSFT's older period and all of NVDA's are cut off
+    api.prefetch_line_items(["AAPL", "MSFT", "NVDA"], ["revenue"], "2024-12-31", period="annual", limit=3, batch_size=3)
+
+    assert len(_annual_periods("AAPL")) == 3
+    assert len(fake.bodies) == 1
+    assert _annual_periods("MSFT") == ["2024-12-31", "2023-12-31"]
+    assert _annual_periods("NVDA") == ["2024-12-31", "2023-12-31", "2022-12-31"]
+    assert [body["tickers"] for body in fake.bodies[1:]] == [["MSFT"], ["NVDA"]]
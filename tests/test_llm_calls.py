@@ -0,0 +1,105 @@
+import asyncio
+import sys
+import threading
+import types
+from typing import Literal
+
+import pytest
+from pydantic import BaseModel
+
+from llm import response_cache
+from utils import llm
+
+
+class Signal(BaseModel):
+    signal: Literal["bullish", "bearish", "neutral"]
+    confidence: float
+    reasoning: str
+
+
+class FlakyModel:
+    """A chat model that fails a set number of times before answering; sync and async alike."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def _answer(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise TimeoutError("provider timed out")
+        return Signal(signal="bullish", confidence=70, reasoning="answered")
+
+    def invoke(self, prompt):
+        return self._answer()
+
+    async def ainvoke(self, prompt):
+        return self._answer()
+
+
+class RecordingCache:
+    """In-memory response cache that notes which thread each lookup and write ran on."""
+
+    def __init__(self):
+        self.entries = {}
+        self.threads = []
+
+    def get(self, key):
+        self.threads.append(threading.get_ident())
+        return self.entries.get(key)
+
+    def set(self, key, model_name, model_provider, schema_name, data):
+        self.threads.append(threading.get_ident())
+        self.entries[key] = data
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """Route call_llm/acall_llm to a FlakyModel through a stand-in llm.models module, with a RecordingCache."""
+    state = types.SimpleNamespace(model=FlakyModel(failures=0), cache=RecordingCache())
+    models = types.ModuleType("llm.models")
+    models.get_model_info = lambda model_name: None
+    models.get_cached_model = lambda model_name, model_provider, pydantic_model: state.model
+    monkeypatch.setitem(sys.modules, "llm.models", models)
+    monkeypatch.setattr(response_cache, "get_llm_cache", lambda: state.cache)
+    monkeypatch.setattr(llm.progress, "update_status", lambda *args, **kwargs: None)
+    return state
+
+
+def _call(use_async: bool, **kwargs):
+    kwargs = {"prompt": "Analyze AAPL", "model_name": "test-model", "model_provider": "Test", "pydantic_model": Signal, **kwargs}
+    return asyncio.run(llm.acall_llm(**kwargs)) if use_async else llm.call_llm(**kwargs)
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_retries_then_caches_the_answer(provider, use_async):
+    provider.model = FlakyModel(failures=2)
+
+    assert _call(use_async).reasoning == "answered"
+    assert provider.model.calls == 3
+
+    # The second identical call is served from the cache without reaching the model
+    assert _call(use_async).reasoning == "answered"
+    assert provider.model.calls == 3
+
+
+@pytest.mark.parametrize("use_async", [False, True], ids=["sync", "async"])
+def test_exhausted_retries_use_the_default_and_cache_nothing(provider, use_async, capsys):
+    provider.model = FlakyModel(failures=10)
+
+    assert _call(use_async, default_factory=lambda: None) is None
+    assert _call(use_async).reasoning == "Error in analysis, using default"
+    assert provider.cache.entries == {}
+    assert "after 3 attempts" in capsys.readouterr().out
+
+
+def test_async_cache_access_stays_off_the_event_loop(provider):
+    async def scenario():
+        loop_thread = threading.get_ident()
+        await llm.acall_llm("Analyze MSFT", "test-model", "Test", Signal)
+        return loop_thread
+
+    loop_thread = asyncio.run(scenario())
+
+    assert len(provider.cache.threads) == 2
+    assert loop_thread not in provider.cache.threads
@@ -0,0 +1,72 @@
+import pytest
+
+from llm import response_cache
+from llm.response_cache import LLMResponseCache, configure_llm_cache, get_llm_cache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "llm" / "responses.db")
+
+
+@pytest.fixture
+def llm_cache_config(monkeypatch):
+    """Let a test change the shared cache settings; they and the open cache are restored afterwards."""
+    monkeypatch.setattr(response_cache, "_llm_cache_config", dict(response_cache._llm_cache_config))
+    monkeypatch.setattr(response_cache, "_llm_cache", None)
+    yield response_cache._llm_cache_config
+    if response_cache._llm_cache is not None:
+        response_cache._llm_cache.close()
+
+
+def test_round_trip_and_least_recently_used_eviction(cache_path):
+    blob_size = len(response_cache.zlib.compress(b'{"signal": "bullish", "n": 0}'))
+    cache = LLMResponseCache(cache_path, max_bytes=blob_size * 2)
+    for n in range(2):
+        cache.set(f"k{n}", "gpt-4o", "OpenAI", "Signal", {"signal": "bullish", "n": n})
+    # Reading k0 makes k1 the least recently used, so storing k2 evicts it
+    assert cache.get("k0") == {"signal": "bullish", "n": 0}
+    cache.set("k2", "gpt-4o", "OpenAI", "Signal", {"signal": "bullish", "n": 2})
+
+    assert cache.get("k1") is None
+    assert cache.get("k2") == {"signal": "bullish", "n": 2}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_read_only_cache_serves_but_never_stores(cache_path):
+    LLMResponseCache(cache_path, max_bytes=1 << 20).set("k", "m", "p", "S", {"a": 1})
+    read_only = LLMResponseCache(cache_path, max_bytes=1 << 20, read_only=True)
+
+    read_only.set("other", "m", "p", "S", {"a": 2})
+
+    assert read_only.get("k") == {"a": 1}
+    assert read_only.get("other") is None
+
+
+def test_database_errors_degrade_to_misses(cache_path, capsys):
+    cache = LLMResponseCache(cache_path, max_bytes=1 << 20)
+    cache.set("k", "m", "p", "S", {"a": 1})
+    cache._conn.close()
+
+    assert cache.get("k") is None
+    cache.set("k2", "m", "p", "S", {"a": 2})
+
+    assert cache.stats()["errors"] >= 2
+    # Warned about once, not on every call
+    assert capsys.readouterr().out.count("Warning") == 1
+
+
+def test_unreadable_cache_file_disables_the_cache(tmp_path, llm_cache_config):
+    corrupt = tmp_path / "corrupt.db"
+    corrupt.write_bytes(b"not a database" * 100)
+    configure_llm_cache(path=str(corrupt), mode="readwrite")
+
+    assert get_llm_cache() is None
+    assert llm_cache_config["mode"] == "off"
+
+
+def test_invalid_mode_from_environment_is_rejected(llm_cache_config):
+    llm_cache_config["mode"] = "read-write"
+
+    with pytest.raises(ValueError, match="Unknown LLM cache mode"):
+        get_llm_cache()
@@ -0,0 +1,62 @@
+import numpy as np
+
+from data.lru_cache import LRUCache, estimate_size
+
+
+def _by_length(value) -> int:
+    return len(value)
+
+
+def test_least_recently_used_entry_is_evicted_first():
+    evicted = []
+    cache = LRUCache(max_bytes=10, sizeof=_by_length, on_evict=lambda key, value: evicted.append(key))
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    cache.get("a")
+    cache.set("c", "xxxx")
+
+    assert evicted == ["b"]
+    assert "a" in cache and "c" in cache
+    assert cache.stats() == {"hits": 1, "misses": 0, "evictions": 1, "entries": 2, "bytes": 8, "max_bytes": 10}
+
+
+def test_peek_does_not_protect_an_entry():
+    cache = LRUCache(max_bytes=10, sizeof=_by_length)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    assert cache.peek("a") == "xxxx"
+    cache.set("c", "xxxx")
+
+    assert "a" not in cache
+    assert cache.stats()["hits"] == 0
+
+
+def test_growing_an_entry_is_remeasured_and_oversized_entries_are_kept_alone():
+    cache = LRUCache(max_bytes=10, sizeof=_by_length)
+    cache.set("a", "xx")
+    cache.set("b", "xx")
+    cache.set("a", "x" * 9)
+    assert "b" not in cache and len(cache) == 1
+
+    # An entry bigger than the whole budget still stays, evicting everything else
+    cache.set("huge", "x" * 50)
+    assert "a" not in cache and len(cache) == 1
+    assert cache.stats()["bytes"] == 50
+
+
+def test_pop_is_not_an_eviction():
+    evicted = []
+    cache = LRUCache(max_bytes=10, sizeof=_by_length, on_evict=lambda key, value: evicted.append(key))
+    cache.set("a", "xxxx")
+
+    assert cache.pop("a") == "xxxx"
+    assert cache.pop("a", "gone") == "gone"
+    assert evicted == []
+    assert cache.stats()["bytes"] == 0
+
+
+def test_size_estimates_scale_with_content():
+    assert estimate_size(np.zeros(1000)) == 8000
+    small = estimate_size([{"close": 1.0, "time": "2024-01-01"}] * 10)
+    large = estimate_size([{"close": 1.0, "time": "2024-01-01"}] * 1000)
+    assert 50 < large / small < 150
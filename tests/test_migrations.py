@@ -0,0 +1,77 @@
+import os
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from database.models import ActionType, Base, Portfolio, Trade, User
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def database_url(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    # alembic.ini locates the migrations and the src package relative to the repository root
+    monkeypatch.chdir(REPO_ROOT)
+    return url
+
+
+def _upgrade():
+    command.upgrade(Config(os.path.join(REPO_ROOT, "alembic.ini")), "head")
+
+
+def test_upgrade_after_create_all_moves_cached_market_data(database_url):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            text("INSERT INTO financial_data_cache (ticker, data_type, time_period, data) VALUES (:ticker, :data_type, :time_period, :data)"),
+            [
+                {"ticker": "AAPL", "data_type": "prices", "time_period": "daily", "data": '[{"open": 1, "close": 2, "high": 3, "low": 0.5, "volume": 10, "time": "2024-01-02T00:00:00Z"}]'},
+                {"ticker": "AAPL", "data_type": "company_news", "time_period": None, "data": '[{"ticker": "AAPL", "title": "Up", "author": "A", "source": "S", "date": "2024-01-02", "url": "u", "sentiment": "positive"}]'},
+                {"ticker": "AAPL", "data_type": "analyst_notes", "time_period": None, "data": '{"keep": true}'},
+            ],
+        )
+
+    _upgrade()
+
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT ticker, date, close FROM price_observations")).all() == [("AAPL", "2024-01-02", 2.0)]
+        assert connection.execute(text("SELECT title FROM company_news_observations")).scalars().all() == ["Up"]
+        # Only market data documents are moved out of the old cache table
+        assert connection.execute(text("SELECT data_type FROM financial_data_cache")).scalars().all() == ["analyst_notes"]
+        assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar() == "0002"
+    engine.dispose()
+
+
+def test_upgrade_on_empty_database_creates_tables(database_url):
+    _upgrade()
+
+    engine = create_engine(database_url)
+    tables = set(inspect(engine).get_table_names())
+    assert {"price_observations", "insider_trade_observations", "company_news_observations"} <= tables
+    assert "insider_trade_date_idx" in {index["name"] for index in inspect(engine).get_indexes("insider_trade_observations")}
+    engine.dispose()
+
+
+def test_upgrade_on_empty_database_gives_the_models_schema(database_url):
+    _upgrade()
+
+    engine = create_engine(database_url)
+    inspector = inspect(engine)
+    assert set(Base.metadata.tables) <= set(inspector.get_table_names())
+    for name, table in Base.metadata.tables.items():
+        assert {column["name"] for column in inspector.get_columns(name)} == set(table.columns.keys()), name
+
+    # The application's models work against the migrated schema
+    with Session(engine) as db:
+        user = User(email="pm@example.com", password_hash="x")
+        portfolio = Portfolio(user=user, name="Main", cash_balance=100.0)
+        db.add(Trade(user=user, portfolio=portfolio, ticker="AAPL", action=ActionType.BUY, quantity=1, price=10.0))
+        db.commit()
+        assert db.query(Trade).one().action == ActionType.BUY
+    engine.dispose()
@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from database.models import Base, PriceObservation
+from database.repositories import (
+    CompanyNewsObservationRepository, FinancialMetricObservationRepository, PriceObservationRepository
+)
+from database.repositories.observations import ObservationRepository
+
+
+@pytest.fixture
+def db():
+    # One shared in-memory connection: nothing to clean up on disk
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _bar(day: int, close: float) -> dict:
+    return {"open": close, "close": close, "high": close, "low": close, "volume": 1000, "time": f"2024-02-{day:02d}T00:00:00Z"}
+
+
+def test_observation_repository_requires_row_conversions(db):
+    with pytest.raises(TypeError):
+        ObservationRepository(PriceObservation, db)
+
+    class PartialRepository(ObservationRepository):
+        def to_row(self, ticker, item):
+            return item
+
+    with pytest.raises(TypeError):
+        PartialRepository(PriceObservation, db)
+
+
+def test_insert_new_leaves_stored_rows_untouched(db):
+    prices = PriceObservationRepository(db)
+    assert prices.insert_new("AAPL", [_bar(1, 10.0), _bar(2, 11.0)]) == 2
+
+    # Day 2 is already stored, so its new close is ignored; duplicates in one call count once
+    assert prices.insert_new("AAPL", [_bar(2, 99.0), _bar(3, 12.0), _bar(3, 12.0)]) == 2
+
+    assert [row["close"] for row in prices.get_dicts("AAPL")] == [10.0, 11.0, 12.0]
+
+
+def test_bulk_upsert_overwrites_conflicting_rows(db):
+    metrics = FinancialMetricObservationRepository(db)
+    first = {"report_period": "2024-03-31", "period": "ttm", "currency": "USD", "revenue": 1.0}
+    metrics.insert_new("MSFT", [first])
+
+    revised = {**first, "revenue": 2.0}
+    assert metrics.bulk_upsert([metrics.to_row("MSFT", revised)]) == 1
+
+    assert metrics.get_dicts("MSFT") == [revised]
+
+
+def test_news_sharing_a_date_are_kept_apart(db):
+    news = CompanyNewsObservationRepository(db)
+    stories = [
+        {"title": title, "author": "Staff", "source": "Wire", "date": "2024-02-01", "url": f"https://example.com/{title}"}
+        for title in ("earnings", "guidance")
+    ]
+    news.insert_new("NVDA", stories)
+
+    assert sorted(row["title"] for row in news.get_dicts("NVDA", "2024-02-01", "2024-02-01")) == ["earnings", "guidance"]
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from database.models import ActionType, Base, Portfolio, Position, Trade, User
+from database.repositories.portfolio import PortfolioRepository, PositionRepository
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def portfolio_id(engine) -> int:
+    """A portfolio holding 50 positions with 30 trades on record."""
+    with Session(engine) as db:
+        user = User(email="pm@example.com", password_hash="x")
+        portfolio = Portfolio(user=user, name="Main", cash_balance=1000.0, margin_requirement=0.5, margin_used=10.0)
+        portfolio.positions = [Position(ticker=f"T{i:02d}", long_shares=i, short_shares=0, long_cost_basis=10.0, last_price=10.0) for i in range(50)]
+        db.add(portfolio)
+        db.flush()
+        start = datetime(2024, 1, 1)
+        db.add_all(
+            Trade(user_id=user.id, portfolio_id=portfolio.id, ticker=f"T{i:02d}", action=ActionType.BUY, quantity=1, price=10.0, timestamp=start + timedelta(days=i))
+            for i in range(30)
+        )
+        db.commit()
+        return portfolio.id
+
+
+@pytest.fixture
+def statements(engine):
+    """Record every SQL statement sent, to count round trips."""
+    sent = []
+    listener = lambda conn, cursor, statement, parameters, context, executemany: sent.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    yield sent
+    event.remove(engine, "before_cursor_execute", listener)
+
+
+def test_snapshot_loads_positions_and_trades_in_three_queries(engine, portfolio_id, statements):
+    with Session(engine) as db:
+        snapshot = PortfolioRepository(Portfolio, db).get_snapshot(portfolio_id, trade_limit=5)
+        # Reading positions after the snapshot loads nothing more
+        held = {position.ticker: position.long_shares for position in snapshot["portfolio"].positions}
+
+        assert len(statements) == 3
+        assert len(held) == len(snapshot["positions"]) == 50
+        assert [trade.ticker for trade in snapshot["latest_trades"]] == ["T29", "T28", "T27", "T26", "T25"]
+        assert snapshot["total_value"] == 1000.0 + sum(range(50)) * 10.0
+
+
+def test_missing_portfolio_has_no_snapshot(engine):
+    with Session(engine) as db:
+        assert PortfolioRepository(Portfolio, db).get_snapshot(999) is None
+        assert PortfolioRepository(Portfolio, db).get_hedge_fund_portfolio(999) is None
+
+
+def test_revalue_positions_reads_once_and_writes_once(engine, portfolio_id, statements):
+    prices = {f"T{i:02d}": 20.0 + i for i in range(40)}
+    with Session(engine) as db:
+        revalued = PositionRepository(Position, db).revalue_positions(portfolio_id, prices)
+
+    assert len(revalued) == 40
+    assert [statement.split()[0] for statement in statements] == ["SELECT", "UPDATE"]
+    with Session(engine) as db:
+        positions = {position.ticker: position.last_price for position in PositionRepository(Position, db).get_all_by_portfolio(portfolio_id)}
+    assert positions["T05"] == 25.0
+    # Positions missing from the price map keep their last price
+    assert positions["T45"] == 10.0
+
+
+def test_hedge_fund_portfolio_has_the_shape_run_hedge_fund_takes(engine, portfolio_id):
+    with Session(engine) as db:
+        portfolio = PortfolioRepository(Portfolio, db).get_hedge_fund_portfolio(portfolio_id, ["T03", "NEW"])
+
+    assert portfolio == {
+        "cash": 1000.0,
+        "margin_requirement": 0.5,
+        "margin_used": 10.0,
+        "positions": {
+            "T03": {"long": 3, "short": 0, "long_cost_basis": 10.0, "short_cost_basis": 0.0, "short_margin_used": 0.0},
+            "NEW": {"long": 0, "short": 0, "long_cost_basis": 0.0, "short_cost_basis": 0.0, "short_margin_used": 0.0},
+        },
+        "realized_gains": {"T03": {"long": 0.0, "short": 0.0}, "NEW": {"long": 0.0, "short": 0.0}},
+    }
@@ -0,0 +1,84 @@
+import os
+import random
+import threading
+import time
+
+import pytest
+
+from data.intervals import IntervalSet
+from data import price_store
+from data.price_store import PriceStore
+from tools import api
+
+
+@pytest.mark.parametrize(
+    "added, expected",
+    [
+        # Overlapping and adjacent days collapse into one interval
+        ([("2024-01-01", "2024-01-10"), ("2024-01-05", "2024-01-20")], [("2024-01-01", "2024-01-20")]),
+        ([("2024-01-01", "2024-01-10"), ("2024-01-11", "2024-01-15")], [("2024-01-01", "2024-01-15")]),
+        # A one-day hole keeps them apart
+        ([("2024-01-01", "2024-01-10"), ("2024-01-12", "2024-01-15")], [("2024-01-01", "2024-01-10"), ("2024-01-12", "2024-01-15")]),
+        # A wide interval swallows the ones it spans; reversed ranges are ignored
+        ([("2024-02-01", "2024-02-02"), ("2024-03-01", "2024-03-02"), ("2024-01-01", "2024-12-31"), ("2024-06-01", "2024-05-01")], [("2024-01-01", "2024-12-31")]),
+    ],
+)
+def test_intervals_merge(added, expected):
+    intervals = IntervalSet()
+    for start, end in added:
+        intervals.add(start, end)
+    assert intervals.to_list() == expected
+
+
+def test_gaps_and_lookups():
+    intervals = IntervalSet([("2024-01-10", "2024-01-20"), ("2024-02-01", "2024-02-10")])
+
+    assert intervals.gaps("2024-01-01", "2024-02-15") == [
+        ("2024-01-01", "2024-01-09"),
+        ("2024-01-21", "2024-01-31"),
+        ("2024-02-11", "2024-02-15"),
+    ]
+    assert intervals.gaps("2024-01-12", "2024-01-18") == []
+    assert intervals.contains("2024-02-01", "2024-02-10")
+    assert intervals.find("2024-01-15T16:00:00Z") == ("2024-01-10", "2024-01-20")
+    assert intervals.find("2024-01-25") is None
+
+
+def test_get_prices_only_requests_the_missing_ranges(monkeypatch):
+    requested = []
+
+    def fake_request(method, path, ticker, params=None, json=None):
+        requested.append((params["start_date"], params["end_date"]))
+        return {"ticker": ticker, "prices": [{"open": 1.0, "close": 1.0, "high": 1.0, "low": 1.0, "volume": 1, "time": f"{params['start_date']}T00:00:00Z"}]}
+
+    monkeypatch.setattr(api, "_request", fake_request)
+
+    api.get_prices("AAPL", "2023-03-01", "2023-03-31")
+    api.get_prices("AAPL", "2023-02-15", "2023-04-10")
+    prices = api.get_prices("AAPL", "2023-02-15", "2023-04-10")
+
+    assert requested == [("2023-03-01", "2023-03-31"), ("2023-02-15", "2023-02-28"), ("2023-04-01", "2023-04-10")]
+    assert [price.time[:10] for price in prices] == ["2023-02-15", "2023-03-01", "2023-04-01"]
+
+
+def test_concurrent_coverage_saves_keep_every_interval(isolated_cache, monkeypatch):
+    # Stall each file replace a little so saves from different threads overlap and can land out of order
+    replace = os.replace
+
+    def slow_replace(src, dst):
+        time.sleep(random.uniform(0, 0.002))
+        replace(src, dst)
+
+    monkeypatch.setattr(price_store.os, "replace", slow_replace)
+
+    # Each thread adds a separate week; whichever save lands last must hold all of them
+    weeks = [(f"2023-{month:02d}-01", f"2023-{month:02d}-07") for month in range(1, 13)]
+    threads = [threading.Thread(target=isolated_cache.add_coverage, args=("prices", "AAPL", *week)) for week in weeks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    store = PriceStore(root=isolated_cache._price_store.root)
+    assert store.load_coverage("AAPL") == weeks
+    assert not [name for name in os.listdir(os.path.join(store.root, "AAPL")) if name.endswith(".tmp")]
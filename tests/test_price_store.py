@@ -0,0 +1,55 @@
+import numpy as np
+
+from data.price_store import PriceStore
+
+
+def _rows(days: list[int], close: float) -> list[dict]:
+    return [
+        {"open": close, "close": close, "high": close, "low": close, "volume": 100, "time": f"2024-03-{day:02d}T00:00:00Z"}
+        for day in days
+    ]
+
+
+def test_appends_merge_in_date_order_and_refreshed_rows_win(tmp_path):
+    store = PriceStore(root=str(tmp_path))
+    store.append("aapl", _rows([4, 5], close=10.0))
+    store.append("AAPL", _rows([1, 5, 6], close=20.0))
+
+    columns = store.load("AAPL")
+    assert list(columns["time"]) == [f"2024-03-{day:02d}T00:00:00Z" for day in (1, 4, 5, 6)]
+    # The 5th was fetched again (e.g. while the day was still trading), so its refreshed bar replaces the stored one
+    assert list(columns["close"]) == [20.0, 10.0, 20.0, 20.0]
+
+
+def test_refreshed_bar_survives_a_restart(tmp_path):
+    PriceStore(root=str(tmp_path)).append("AAPL", _rows([5], close=100.0))
+    PriceStore(root=str(tmp_path)).append("AAPL", _rows([5], close=150.0))
+
+    assert list(PriceStore(root=str(tmp_path)).load("AAPL")["close"]) == [150.0]
+
+
+def test_columns_survive_a_new_store_instance(tmp_path):
+    PriceStore(root=str(tmp_path)).append("MSFT", _rows(list(range(1, 11)), close=5.0))
+
+    reopened = PriceStore(root=str(tmp_path))
+    window = reopened.read("MSFT", "2024-03-03", "2024-03-05")
+
+    assert list(window["date"]) == list(np.arange("2024-03-03", "2024-03-06", dtype="datetime64[D]"))
+    assert window["volume"].dtype == np.int64
+    # Slices of the memory-mapped columns, not copies
+    assert isinstance(reopened.load("MSFT")["close"], np.memmap)
+
+
+def test_unknown_ticker_and_empty_append(tmp_path):
+    store = PriceStore(root=str(tmp_path))
+    store.append("NVDA", [])
+
+    assert store.load("NVDA") is None
+    assert store.read("NVDA", "2024-01-01", "2024-12-31") is None
+    assert store.load_coverage("NVDA") == []
+
+
+def test_coverage_is_persisted_per_ticker(tmp_path):
+    PriceStore(root=str(tmp_path)).save_coverage("TSLA", [("2024-01-01", "2024-02-29")])
+
+    assert PriceStore(root=str(tmp_path)).load_coverage("TSLA") == [("2024-01-01", "2024-02-29")]
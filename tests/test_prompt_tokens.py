@@ -0,0 +1,79 @@
+import contextvars
+import threading
+
+import pytest
+
+from llm import prompts
+
+
+class BrokenTiktoken:
+    """A tiktoken whose encoding download fails, as it does offline."""
+
+    def __init__(self):
+        self.attempts = 0
+
+    def get_encoding(self, name):
+        self.attempts += 1
+        raise OSError("could not download cl100k_base")
+
+
+@pytest.fixture
+def broken_tiktoken(monkeypatch):
+    broken = BrokenTiktoken()
+    monkeypatch.setattr(prompts, "tiktoken", broken)
+    monkeypatch.setattr(prompts, "_encoding", None)
+    monkeypatch.setattr(prompts, "_encoding_failed", False)
+    return broken
+
+
+def test_failed_encoding_download_falls_back_to_the_estimate(broken_tiktoken):
+    assert prompts.count_prompt_tokens("x" * 40) == 10
+    assert prompts.count_prompt_tokens("x" * 41) == 11
+    # The download is not retried on every call
+    assert broken_tiktoken.attempts == 1
+
+
+def test_runs_only_see_their_own_calls():
+    prompts.record_prompt_tokens("outside_agent", 99)
+    with prompts.track_prompt_tokens() as first:
+        prompts.record_prompt_tokens("buffett_agent", 100)
+        with prompts.track_prompt_tokens() as nested:
+            prompts.record_prompt_tokens("buffett_agent", 300)
+    with prompts.track_prompt_tokens() as second:
+        prompts.record_prompt_tokens(None, 5)
+
+    assert first == {"buffett_agent": {"calls": 2, "prompt_tokens": 400, "max_prompt_tokens": 300}}
+    assert nested == {"buffett_agent": {"calls": 1, "prompt_tokens": 300, "max_prompt_tokens": 300}}
+    assert second == {"unknown": {"calls": 1, "prompt_tokens": 5, "max_prompt_tokens": 5}}
+
+
+def test_concurrent_runs_in_one_process_stay_apart():
+    results = {}
+    both_tracking = threading.Barrier(2, timeout=5)
+
+    def run(name, tokens):
+        with prompts.track_prompt_tokens() as stats:
+            both_tracking.wait()
+            # Work the run hands to a thread of its own, the way graph nodes run, still counts for it
+            worker = threading.Thread(target=contextvars.copy_context().run, args=(prompts.record_prompt_tokens, "agent", tokens))
+            worker.start()
+            worker.join()
+            prompts.record_prompt_tokens("agent", tokens)
+        results[name] = stats
+
+    threads = [threading.Thread(target=run, args=(name, tokens)) for name, tokens in [("a", 10), ("b", 1000)]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results["a"] == {"agent": {"calls": 2, "prompt_tokens": 20, "max_prompt_tokens": 10}}
+    assert results["b"] == {"agent": {"calls": 2, "prompt_tokens": 2000, "max_prompt_tokens": 1000}}
+
+
+def test_daily_stats_add_up_over_a_backtest():
+    totals = {}
+    prompts.merge_prompt_token_stats(totals, {"lynch_agent": {"calls": 2, "prompt_tokens": 500, "max_prompt_tokens": 300}})
+    prompts.merge_prompt_token_stats(totals, {"lynch_agent": {"calls": 1, "prompt_tokens": 400, "max_prompt_tokens": 400}})
+
+    assert totals == {"lynch_agent": {"calls": 3, "prompt_tokens": 900, "max_prompt_tokens": 400}}
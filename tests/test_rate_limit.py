@@ -0,0 +1,86 @@
+import pytest
+
+from tools import api, rate_limit
+from tools.rate_limit import RateLimiter, TokenBucket, parse_rates
+
+
+class FakeClock:
+    """Stands in for time.monotonic and time.sleep, so waits advance the clock instead of blocking."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(rate_limit.time, "sleep", fake.sleep)
+    return fake
+
+
+def test_burst_is_free_then_requests_are_spaced_by_the_rate(clock):
+    bucket = TokenBucket(rate=2, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.slept == []
+
+    bucket.acquire()
+    assert clock.slept == [pytest.approx(0.5)]
+
+
+def test_zero_rate_is_unlimited(clock):
+    bucket = TokenBucket(rate=0)
+    for _ in range(100):
+        bucket.acquire()
+    assert clock.slept == []
+
+
+def test_unlimited_bucket_still_honors_retry_after(clock):
+    bucket = TokenBucket(rate=0)
+    bucket.penalize(retry_after=3)
+    assert bucket.rate == 0
+
+    bucket.acquire()
+    assert sum(clock.slept) == pytest.approx(3)
+
+
+def test_429_halves_the_rate_and_successes_recover_it(clock):
+    bucket = TokenBucket(rate=10)
+    bucket.penalize(retry_after=None)
+    bucket.penalize(retry_after=None)
+    assert bucket.rate == pytest.approx(2.5)
+
+    for _ in range(100):
+        bucket.reward()
+    assert bucket.rate == 10
+
+
+def test_negative_rates_are_rejected():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=-1)
+    with pytest.raises(ValueError):
+        RateLimiter(0, parse_rates("prices=20,news=-5"))
+
+
+def test_endpoint_overrides_get_their_own_bucket():
+    limiter = RateLimiter(0, parse_rates(" /prices/ = 20, news=5"))
+    assert limiter.bucket("prices").max_rate == 20
+    assert limiter.bucket("news").max_rate == 5
+    assert limiter.bucket("insider-trades").max_rate == 0
+    assert limiter.bucket("prices") is limiter.bucket("prices")
+
+
+def test_client_builds_its_limiter_from_the_configured_rates(http_config):
+    api.configure_http_client(rate_limit=0, endpoint_rate_limits={"news": 5})
+    limiter = api.get_rate_limiter()
+    assert limiter.bucket("prices").max_rate == 0
+    assert limiter.bucket("news").max_rate == 5
@@ -0,0 +1,89 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from data.cache import Cache, set_cache
+from data.price_store import PriceStore
+from tools import api
+from tools.replay import ResponseArchive, StandInAPI, make_handler
+
+
+def _price(day: int, close: float) -> dict:
+    return {"open": close, "close": close, "high": close, "low": close, "volume": 1000, "time": f"2024-01-{day:02d}T00:00:00Z"}
+
+
+def _line_item(ticker: str, report_period: str, **fields) -> dict:
+    return {"ticker": ticker, "report_period": report_period, "period": "ttm", "currency": "USD", **fields}
+
+
+@pytest.fixture
+def upstream(tmp_path, http_config):
+    """A stand-in server over a seeded archive, playing the part of the live API."""
+    archive = ResponseArchive(str(tmp_path / "upstream.db"))
+    params = {"ticker": "AAPL", "interval": "day", "interval_multiplier": 1, "start_date": "2024-01-01", "end_date": "2024-01-31"}
+    archive.save("GET", "/prices/", params, None, {"ticker": "AAPL", "prices": [_price(day, 100.0 + day) for day in (2, 3, 4, 5)]})
+    body = {"tickers": ["AAPL"], "line_items": ["revenue", "net_income"], "end_date": "2024-12-31", "period": "ttm", "limit": 10}
+    archive.save("POST", "/financials/search/line-items", None, body, {"search_results": [
+        _line_item("AAPL", "2024-09-30", revenue=3.0, net_income=1.0),
+        _line_item("AAPL", "2024-06-30", revenue=2.0, net_income=0.5),
+    ]})
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(StandInAPI(archive)))
+    threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    api.configure_http_client(base_url=f"http://127.0.0.1:{httpd.server_port}")
+    yield httpd
+    api.configure_http_client()
+    httpd.shutdown()
+    httpd.server_close()
+    archive.close()
+
+
+def _fresh_cache(tmp_path, name: str):
+    set_cache(Cache(price_store=PriceStore(root=str(tmp_path / name))))
+
+
+def test_stand_in_server_answers_exact_and_narrower_requests(upstream, tmp_path):
+    assert [p.close for p in api.get_prices("AAPL", "2024-01-01", "2024-01-31")] == [102.0, 103.0, 104.0, 105.0]
+
+    # Not archived as such: answered from every archived AAPL row, filtered and limited like the live endpoint
+    _fresh_cache(tmp_path, "narrower")
+    assert [p.close for p in api.get_prices("AAPL", "2024-01-03", "2024-01-04")] == [103.0, 104.0]
+    items = api.search_line_items("AAPL", ["revenue"], "2024-12-31", limit=1)
+    assert [(item.report_period, item.revenue) for item in items] == [("2024-09-30", 3.0)]
+
+
+def test_record_then_replay_serves_the_same_data_offline(upstream, tmp_path):
+    record_path = str(tmp_path / "recorded.db")
+    api.configure_http_client(record_path=record_path)
+    recorded_prices = api.get_prices("AAPL", "2024-01-01", "2024-01-31")
+    recorded_items = api.search_line_items("AAPL", ["revenue", "net_income"], "2024-12-31")
+
+    # Replay from the archive alone, with a fresh cache and nothing listening at the base URL
+    _fresh_cache(tmp_path, "replay")
+    api.configure_http_client(record_path="", replay_path=record_path, base_url="http://127.0.0.1:9")
+    assert api.get_prices("AAPL", "2024-01-01", "2024-01-31") == recorded_prices
+    assert api.search_line_items("AAPL", ["revenue", "net_income"], "2024-12-31") == recorded_items
+    # A narrower range was never recorded, but is answered from the recorded rows
+    assert [p.time[:10] for p in api.get_prices("AAPL", "2024-01-03", "2024-01-04")] == ["2024-01-03", "2024-01-04"]
+
+
+def test_replay_miss_raises_instead_of_going_online(upstream, tmp_path):
+    record_path = str(tmp_path / "recorded.db")
+    api.configure_http_client(record_path=record_path)
+    api.get_prices("AAPL", "2024-01-01", "2024-01-31")
+    api.search_line_items("AAPL", ["revenue"], "2024-12-31")
+
+    _fresh_cache(tmp_path, "replay")
+    api.configure_http_client(record_path="", replay_path=record_path)
+    with pytest.raises(Exception, match="404"):
+        api.get_prices("MSFT", "2024-01-01", "2024-01-31")
+    # Fields that were never recorded are refused rather than silently dropped
+    with pytest.raises(Exception, match="404"):
+        api.search_line_items("AAPL", ["free_cash_flow"], "2024-12-31")
+
+
+def test_missing_replay_archive_is_an_error(tmp_path, http_config):
+    api.configure_http_client(replay_path=str(tmp_path / "missing.db"))
+    with pytest.raises(FileNotFoundError):
+        api.get_prices("AAPL", "2024-01-01", "2024-01-31")
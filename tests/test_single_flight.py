@@ -0,0 +1,83 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tools import api
+
+
+class BlockingSender:
+    """Stands in for _send_request: every call waits until released, so callers pile up behind the first."""
+
+    def __init__(self, result=None, error=None):
+        self.calls = []
+        self.release = threading.Event()
+        self._result = result
+        self._error = error
+
+    def __call__(self, method, path, ticker, params=None, json=None):
+        self.calls.append(params)
+        assert self.release.wait(timeout=5)
+        if self._error:
+            raise self._error
+        return self._result
+
+
+def _wait_for_coalesced(count: int):
+    deadline = time.monotonic() + 5
+    while api.get_request_stats()["coalesced"] < count:
+        assert time.monotonic() < deadline, "callers never joined the in-flight request"
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def sender(monkeypatch):
+    api.reset_request_stats()
+    blocking = BlockingSender(result={"prices": []})
+    monkeypatch.setattr(api, "_send_request", blocking)
+    yield blocking
+    blocking.release.set()
+
+
+def test_identical_concurrent_requests_share_one_call(sender):
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        # Same parameters in a different order make the same request
+        futures = [pool.submit(api._request, "GET", "/prices/", "AAPL", {"ticker": "AAPL", "interval": "day"})]
+        futures += [pool.submit(api._request, "GET", "/prices/", "AAPL", {"interval": "day", "ticker": "AAPL"}) for _ in range(4)]
+        _wait_for_coalesced(4)
+        sender.release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert len(sender.calls) == 1
+    assert all(result is results[0] for result in results)
+    assert api.get_request_stats() == {"calls": 5, "executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_a_failed_call_fails_every_waiter_and_the_next_call_retries(monkeypatch):
+    api.reset_request_stats()
+    failing = BlockingSender(error=RuntimeError("503"))
+    monkeypatch.setattr(api, "_send_request", failing)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(api._request, "GET", "/news/", "MSFT", {"ticker": "MSFT"}) for _ in range(3)]
+        _wait_for_coalesced(2)
+        failing.release.set()
+        for future in futures:
+            with pytest.raises(RuntimeError, match="503"):
+                future.result(timeout=5)
+
+    # Nothing is left in flight, so a later identical call is sent again
+    with pytest.raises(RuntimeError):
+        api._request("GET", "/news/", "MSFT", {"ticker": "MSFT"})
+    assert len(failing.calls) == 2
+
+
+def test_different_requests_are_not_coalesced(sender):
+    sender.release.set()
+    api._request("GET", "/prices/", "AAPL", {"ticker": "AAPL"})
+    api._request("GET", "/prices/", "NVDA", {"ticker": "NVDA"})
+    api._request("POST", "/prices/", "AAPL", {"ticker": "AAPL"})
+
+    assert len(sender.calls) == 3
+    assert api.get_request_stats()["coalesced"] == 0
@@ -0,0 +1,163 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import worker
+from data.cache import get_cache
+from database.data.cache import TieredCache
+from database.models import AnalysisRequest, Base
+from database.repositories import AnalysisRequestRepository
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    """A file-backed SQLite queue that workers on several threads can share."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'queue.db'}", connect_args={"timeout": 30})
+
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(worker, "SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+def _enqueue(factory, tickers: list[str]) -> list[int]:
+    with factory() as db:
+        requests = [AnalysisRequest(user_id=1, ticker=ticker, start_date=datetime(2024, 1, 1), end_date=datetime(2024, 3, 1), status="pending") for ticker in tickers]
+        db.add_all(requests)
+        db.commit()
+        return [request.id for request in requests]
+
+
+def _statuses(factory) -> dict[str, str]:
+    with factory() as db:
+        return {request.ticker: request.status for request in db.query(AnalysisRequest)}
+
+
+def test_concurrent_claims_never_overlap(session_factory):
+    ids = _enqueue(session_factory, [f"T{i:02d}" for i in range(40)])
+    claims = []
+
+    def claim_until_empty():
+        with session_factory() as db:
+            repo = AnalysisRequestRepository(AnalysisRequest, db)
+            while claimed := repo.claim_pending(3):
+                claims.extend(request.id for request in claimed)
+
+    threads = [threading.Thread(target=claim_until_empty) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claims) == ids
+    assert set(_statuses(session_factory).values()) == {"processing"}
+
+
+def test_claims_oldest_first(session_factory):
+    _enqueue(session_factory, ["AAPL", "MSFT", "NVDA"])
+    with session_factory() as db:
+        claimed = AnalysisRequestRepository(AnalysisRequest, db).claim_pending(2)
+        assert [request.ticker for request in claimed] == ["AAPL", "MSFT"]
+
+
+def test_sqlite_claims_with_one_update_returning(session_factory):
+    _enqueue(session_factory, ["AAPL", "MSFT"])
+    with session_factory() as db:
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+        claimed = AnalysisRequestRepository(AnalysisRequest, db).claim_pending(2)
+
+        assert [statement.split()[0] for statement in statements] == ["UPDATE"]
+        assert "RETURNING" in statements[0]
+        assert [request.ticker for request in claimed] == ["AAPL", "MSFT"]
+        assert all(request.status == "processing" and request.claimed_at for request in claimed)
+
+
+def test_postgres_claims_with_skip_locked(session_factory, monkeypatch):
+    _enqueue(session_factory, ["AAPL", "MSFT"])
+    with session_factory() as db:
+        # SQLite ignores FOR UPDATE, so the postgres path runs here and the locking it asks for is checked
+        monkeypatch.setattr(db.get_bind().dialect, "name", "postgresql")
+        for_update = []
+        event.listen(db, "do_orm_execute", lambda state: for_update.append(state.statement._for_update_arg))
+        claimed = AnalysisRequestRepository(AnalysisRequest, db).claim_pending(1)
+
+        assert [request.ticker for request in claimed] == ["AAPL"]
+        assert for_update[0] is not None and for_update[0].skip_locked
+    assert _statuses(session_factory) == {"AAPL": "processing", "MSFT": "pending"}
+
+
+def test_requests_past_their_lease_are_claimed_again(session_factory):
+    _enqueue(session_factory, ["AAPL", "MSFT"])
+    with session_factory() as db:
+        repo = AnalysisRequestRepository(AnalysisRequest, db)
+        stale, live = repo.claim_pending(2)
+        # AAPL's worker died an hour and a half ago; MSFT's is still within its lease
+        stale.claimed_at = datetime.utcnow() - timedelta(minutes=90)
+        db.commit()
+
+        assert repo.claim_pending(2) == []
+        reclaimed = repo.claim_pending(2, lease_seconds=3600)
+        assert [request.ticker for request in reclaimed] == ["AAPL"]
+        assert reclaimed[0].claimed_at > datetime.utcnow() - timedelta(minutes=1)
+
+
+def test_worker_finishes_requests_abandoned_by_a_crashed_worker(session_factory, monkeypatch):
+    _enqueue(session_factory, ["AAPL"])
+    with session_factory() as db:
+        (request,) = AnalysisRequestRepository(AnalysisRequest, db).claim_pending(1)
+        request.claimed_at = datetime.utcnow() - timedelta(hours=2)
+        db.commit()
+    monkeypatch.setattr(worker, "process_request", lambda request: [])
+
+    assert worker.run_worker(0, exit_when_idle=True, lease_seconds=3600) == 1
+    assert _statuses(session_factory) == {"AAPL": "completed"}
+
+
+def test_failed_result_write_marks_request_failed_and_worker_continues(session_factory, monkeypatch):
+    _enqueue(session_factory, ["AAPL", "MSFT"])
+    monkeypatch.setattr(worker, "process_request", lambda request: [{"analysis_request_id": request.id, "ticker": request.ticker, "analyst_name": None}])
+
+    processed = worker.run_worker(0, exit_when_idle=True)
+
+    # analyst_name is required, so every results insert fails
+    assert processed == 0
+    assert _statuses(session_factory) == {"AAPL": "failed", "MSFT": "failed"}
+
+
+def test_completed_request_stores_results(session_factory, monkeypatch):
+    _enqueue(session_factory, ["AAPL"])
+    signals = {"warren_buffett_agent": {"AAPL": {"signal": "bullish", "confidence": 80, "reasoning": "moat"}}, "risk_management_agent": {"AAPL": {"remaining_position_limit": 1000}}}
+    monkeypatch.setattr(worker, "process_request", lambda request: worker.signals_to_results(request, signals))
+
+    assert worker.run_worker(0, exit_when_idle=True) == 1
+    assert _statuses(session_factory) == {"AAPL": "completed"}
+
+
+def test_thread_pool_reads_market_data_through_the_database_cache(session_factory, monkeypatch):
+    _enqueue(session_factory, ["AAPL", "MSFT"])
+    caches = []
+
+    def process_request(request):
+        caches.append(get_cache())
+        return []
+
+    monkeypatch.setattr(worker, "process_request", process_request)
+
+    assert worker.run_worker_pool(workers=2, mode="thread", exit_when_idle=True) == 2
+    # Every worker thread shares the one tiered cache installed for the process
+    assert len(caches) == 2 and caches[0] is caches[1]
+    assert isinstance(caches[0], TieredCache)
+
+
+def test_build_portfolio_has_an_empty_position_per_ticker():
+    portfolio = worker.build_portfolio(["AAPL", "MSFT"], initial_cash=5000.0)
+
+    assert portfolio["cash"] == 5000.0
+    assert portfolio["margin_used"] == 0.0
+    assert portfolio["positions"]["MSFT"] == {"long": 0, "short": 0, "long_cost_basis": 0.0, "short_cost_basis": 0.0, "short_margin_used": 0.0}
+    assert portfolio["realized_gains"] == {"AAPL": {"long": 0.0, "short": 0.0}, "MSFT": {"long": 0.0, "short": 0.0}}